@@ -15,6 +15,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 # 기존 모듈 import
 from document_manager import Document, DocumentsManager
 from query_engine import QueryEngine
+from rate_limiter import all_limiter_stats
 
 # 템플릿 및 정적 파일 디렉터리 설정
 template_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'GrokParseNoteLM/templates')
@@ -258,6 +259,11 @@ def get_task_status(task_id):
         return jsonify(task)
     return jsonify({'error': '작업을 찾을 수 없습니다'}), 404
 
+# API 요청 한도 통계 (대기열 길이, 대기 시간)
+@app.route('/api/rate_limits', methods=['GET'])
+def get_rate_limit_stats():
+    return jsonify(all_limiter_stats())
+
 # 이미지 파일 서빙
 @app.route('/images/<path:filename>')
 def serve_image(filename):
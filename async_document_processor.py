@@ -0,0 +1,316 @@
+import os
+import time
+import asyncio
+import logging
+import weakref
+from pathlib import Path
+from typing import Dict, Any, Optional, TYPE_CHECKING
+
+import httpx
+
+# 내부 모듈 임포트
+from document_processor import DocumentProcessor, DocumentProcessorError
+from image_dedup import ImageDeduplicator
+from image_analyzer import OCR_MIN_CONF, OCR_TIMEOUT
+from image_filter import ImageFilter
+from ocr_endpoints import EndpointAttempt
+
+if TYPE_CHECKING:
+    from model_handler import ModelHandler
+
+logger = logging.getLogger('async_document_processor')
+
+# 파싱 완료 신호 (이미지 큐 종료 표시)
+_PARSE_DONE = object()
+
+
+class AsyncDocumentProcessor(DocumentProcessor):
+    """
+    DocumentProcessor와 같은 결과 형식을 사용하되 네트워크 단계를 겹쳐 실행하는 비동기 문서 처리기
+
+    이미지는 파서가 저장하는 즉시 OCR 요청을 보내고, 텍스트 요약은 OCR이 진행되는 동안 함께 실행합니다.
+    OCR 서버와 요약 모델에는 각각 동시 요청 수 제한이 적용됩니다.
+    """
+
+    def __init__(
+        self,
+        upstage_api_key: Optional[str] = None,
+        image_server_url: str = "http://localhost:5050",
+        output_dir: str = "output",
+        log_level: int = logging.INFO,
+        model_handler: Optional["ModelHandler"] = None,
+        ocr_concurrency: int = 8,
+        summary_concurrency: int = 2,
+        ocr_timeout: float = OCR_TIMEOUT,
+        image_filter: Optional[ImageFilter] = None,
+        ocr_preprocess: Optional[str] = None,
+        ocr_min_conf: Optional[float] = OCR_MIN_CONF,
+        ocr_layout: bool = False
+    ):
+        """
+        비동기 문서 처리기 초기화
+
+        Args:
+            upstage_api_key: 업스테이지 API 키 (None인 경우 환경변수에서 로드)
+            image_server_url: 이미지 분석 서버 URL (여러 서버는 쉼표로 구분, 처리 중인 요청이 가장 적은 서버로 분산)
+            output_dir: 출력 디렉토리
+            log_level: 로깅 레벨
+            model_handler: 텍스트 요약에 사용할 ModelHandler (None이면 요약하지 않음)
+            ocr_concurrency: OCR 서버 동시 요청 수
+            summary_concurrency: 요약 모델 동시 요청 수
+            ocr_timeout: OCR 요청 응답 대기 타임아웃(초, 기본값: 환경변수 OCR_TIMEOUT 또는 120)
+            image_filter: OCR 전 이미지 필터 (None인 경우 기본 규칙 사용)
+            ocr_preprocess: OCR 서버 전처리 단계 (none, auto 또는 scale,deskew,binarize 조합, None인 경우 서버 기본값)
+            ocr_min_conf: OCR 단어 신뢰도 하한 (0~100, 이보다 낮은 단어는 제외, None이면 신뢰도를 받지 않음)
+            ocr_layout: OCR 결과에 단어 상자, 줄 묶음, 단어별 신뢰도(layout)를 포함할지 여부
+        """
+        super().__init__(
+            upstage_api_key=upstage_api_key,
+            image_server_url=image_server_url,
+            output_dir=output_dir,
+            log_level=log_level,
+            image_filter=image_filter,
+            ocr_preprocess=ocr_preprocess,
+            ocr_min_conf=ocr_min_conf,
+            ocr_layout=ocr_layout,
+            ocr_timeout=ocr_timeout
+        )
+        self.model_handler = model_handler
+        self.ocr_concurrency = ocr_concurrency
+        self.summary_concurrency = summary_concurrency
+        self.ocr_timeout = ocr_timeout
+        # 같은 처리기로 여러 문서를 동시에 처리해도 백엔드별 동시 요청 수가 유지되도록 이벤트 루프별로 공유
+        self._semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = weakref.WeakKeyDictionary()
+
+    def _semaphore(self, backend: str, limit: int) -> asyncio.Semaphore:
+        """현재 이벤트 루프에서 백엔드별로 공유되는 세마포어를 반환합니다."""
+        semaphores = self._semaphores.setdefault(asyncio.get_running_loop(), {})
+        if backend not in semaphores:
+            semaphores[backend] = asyncio.Semaphore(limit)
+        return semaphores[backend]
+
+    def process_pdf(
+        self,
+        pdf_path: str,
+        analyze_images: bool = True,
+        save_markdown: bool = True
+    ) -> Dict[str, Any]:
+        """process_pdf_async()를 이벤트 루프에서 실행하는 동기 래퍼"""
+        return asyncio.run(self.process_pdf_async(pdf_path, analyze_images, save_markdown))
+
+    async def process_pdf_async(
+        self,
+        pdf_path: str,
+        analyze_images: bool = True,
+        save_markdown: bool = True
+    ) -> Dict[str, Any]:
+        """
+        PDF 문서를 처리하고 분석 결과를 반환합니다.
+
+        Args:
+            pdf_path: 처리할 PDF 파일 경로
+            analyze_images: 이미지 분석 수행 여부
+            save_markdown: 마크다운 파일로 저장 여부
+
+        Returns:
+            DocumentProcessor.process_pdf()와 같은 형식의 분석 결과 딕셔너리
+            (model_handler가 있으면 'summary' 키 추가)
+        """
+        start_time = time.time()
+        pdf_name = Path(pdf_path).stem
+        output_subdir = self.output_dir / f"output_{pdf_name}"
+        images_dir = output_subdir / "images"
+        logs_dir = output_subdir / "logs"
+
+        images_dir.mkdir(exist_ok=True, parents=True)
+        logs_dir.mkdir(exist_ok=True)
+        self._setup_file_logging(logs_dir / "analysis.log")
+
+        loop = asyncio.get_running_loop()
+        image_queue: asyncio.Queue = asyncio.Queue()
+        ocr_semaphore = self._semaphore("ocr", self.ocr_concurrency)
+        summary_semaphore = self._semaphore("summary", self.summary_concurrency)
+
+        def on_figure_saved(image_path: str) -> None:
+            # 파서 스레드에서 호출되므로 이벤트 루프 스레드로 넘겨서 큐에 넣음
+            loop.call_soon_threadsafe(image_queue.put_nowait, image_path)
+
+        limits = httpx.Limits(max_connections=self.ocr_concurrency, max_keepalive_connections=self.ocr_concurrency)
+        try:
+            async with httpx.AsyncClient(timeout=self.ocr_timeout, limits=limits) as client:
+                self.logger.info(f"PDF 비동기 처리 시작: {pdf_path}")
+
+                # 1. 파싱 (블로킹 파서는 스레드에서 실행하고, 저장되는 이미지는 바로 OCR로 넘김)
+                parse_task = asyncio.create_task(self._parse(pdf_path, str(output_subdir), on_figure_saved, image_queue))
+                ocr_task = asyncio.create_task(
+                    self._ocr_stream(client, image_queue, ocr_semaphore, analyze_images)
+                )
+
+                parsed = await parse_task
+                text, image_paths = parsed.text, parsed.image_paths
+                extraction_time = time.time() - start_time
+
+                # 2. 텍스트 요약은 OCR이 끝나기를 기다리지 않고 시작
+                summary_task = None
+                if self.model_handler is not None and text:
+                    summary_task = asyncio.create_task(self._summarize(text, summary_semaphore))
+
+                ocr_results = await ocr_task
+                summary = await summary_task if summary_task else None
+
+            result = {
+                'pdf_path': pdf_path,
+                'text': text,
+                'images': image_paths,
+                'analysis': {},
+                'metadata': {
+                    'extraction_time': extraction_time,
+                    'image_count': len(image_paths)
+                },
+                'elements_path': parsed.elements_path
+            }
+
+            if analyze_images and image_paths:
+                result['metadata']['skipped_images'] = sum(1 for item in ocr_results.values() if 'skipped' in item)
+                # 이미지 순서대로 결과 정리
+                image_analysis = {}
+                for img_path in image_paths:
+                    img_name = Path(img_path).name
+                    image_analysis[img_name] = ocr_results.get(img_path, {
+                        'error': 'OCR 결과 없음',
+                        'success': False,
+                        'text': '',
+                        'confidence': 0.0
+                    })
+                result['analysis'] = image_analysis
+                analysis_text = self._format_analysis_results(image_analysis)
+                result['text_with_analysis'] = f"{text}\n\n## 이미지 분석 결과\n\n{analysis_text}"
+
+            if summary is not None:
+                result['summary'] = summary
+
+            if save_markdown:
+                markdown_path = output_subdir / f"{pdf_name}_analysis.md"
+                await asyncio.to_thread(self._save_as_markdown, result, str(markdown_path))
+                result['markdown_path'] = str(markdown_path)
+
+            elapsed_time = time.time() - start_time
+            result['metadata']['total_time'] = elapsed_time
+            self.logger.info(f"PDF 비동기 처리 완료 (소요 시간: {elapsed_time:.2f}초)")
+            return result
+
+        except Exception as e:
+            self.logger.error(f"PDF 처리 중 오류 발생: {str(e)}", exc_info=True)
+            raise DocumentProcessorError(f"PDF 처리 중 오류 발생: {str(e)}") from e
+
+    async def _parse(self, pdf_path: str, output_dir: str, on_figure_saved, image_queue: asyncio.Queue):
+        """파서를 스레드에서 실행하고, 끝나면 이미지 큐에 종료 신호를 넣습니다."""
+        try:
+            return await asyncio.to_thread(
+                self.document_parser.parse,
+                pdf_path=pdf_path,
+                output_dir=output_dir,
+                on_figure_saved=on_figure_saved
+            )
+        finally:
+            image_queue.put_nowait(_PARSE_DONE)
+
+    async def _ocr_stream(
+        self,
+        client: httpx.AsyncClient,
+        image_queue: asyncio.Queue,
+        semaphore: asyncio.Semaphore,
+        enabled: bool
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        이미지 큐에서 경로가 들어오는 대로 OCR 요청을 시작하고 모든 결과를 모아 반환합니다.
+
+        필터에 걸린 이미지(아이콘, 구분선, 빈 이미지 등)는 요청하지 않고 이유만 기록하며,
+        앞서 들어온 이미지와 같은 이미지(반복되는 로고, 배너 등)는 새로 요청하지 않고 대표 이미지의 결과를 사용합니다.
+        """
+        tasks: Dict[str, asyncio.Task] = {}
+        duplicates: Dict[str, str] = {}
+        skipped: Dict[str, str] = {}
+        deduplicator = ImageDeduplicator()
+        while True:
+            image_path = await image_queue.get()
+            if image_path is _PARSE_DONE:
+                break
+            if not enabled or image_path in tasks or image_path in duplicates or image_path in skipped:
+                continue
+            reason = await asyncio.to_thread(self.image_filter.check, image_path)
+            if reason is not None:
+                skipped[image_path] = reason
+                continue
+            representative = await asyncio.to_thread(deduplicator.add, image_path)
+            if representative != image_path:
+                duplicates[image_path] = representative
+                continue
+            tasks[image_path] = asyncio.create_task(self._ocr_image(client, image_path, semaphore))
+
+        if tasks:
+            self.logger.info(f"이미지 {len(tasks)}개 OCR 결과 대기 중... (중복 이미지 {len(duplicates)}개, 필터 {len(skipped)}개 생략)")
+        results = dict(zip(tasks.keys(), await asyncio.gather(*tasks.values())))
+        for image_path, representative in duplicates.items():
+            results[image_path] = dict(results[representative], duplicate_of=os.path.basename(representative))
+        for image_path, reason in skipped.items():
+            results[image_path] = {'skipped': reason, 'success': False, 'text': '', 'confidence': 0.0}
+        return results
+
+    async def _ocr_image(self, client: httpx.AsyncClient, image_path: str, semaphore: asyncio.Semaphore) -> Dict[str, Any]:
+        """단일 이미지를 OCR 서버로 분석합니다 (ImageAnalyzer.analyze_image와 같은 요청 방식, 결과 형식)."""
+        async with semaphore:
+            try:
+                response = None
+                if self.image_analyzer.is_shared(image_path):
+                    # 같은 호스트의 OCR 서버는 경로로 파일을 직접 읽음 (업로드 생략)
+                    response = await self._post_ocr(client, "/analyze/ocr/from_path", dict(
+                        params=dict(self.image_analyzer.ocr_params(), image_path=os.path.realpath(image_path))
+                    ))
+                    if response.status_code in (403, 404, 405):
+                        # 서버가 경로 기반 요청을 거부하면 업로드 방식으로 전환
+                        self.image_analyzer.disable_shared(response.status_code)
+                        response = None
+                if response is None:
+                    content = await asyncio.to_thread(Path(image_path).read_bytes)
+                    response = await self._post_ocr(client, "/analyze/ocr", dict(
+                        files={'file': (os.path.basename(image_path), content, 'image/jpeg')},
+                        params=self.image_analyzer.ocr_params()
+                    ))
+                response.raise_for_status()
+                self.logger.info(f"이미지 분석 완료: {os.path.basename(image_path)}")
+                return self.image_analyzer.result_from_response(image_path, response.json())
+            except Exception as e:
+                self.logger.error(f"이미지 분석 실패: {os.path.basename(image_path)} ({str(e)})")
+                return {
+                    'error': str(e),
+                    'text': '',
+                    'confidence': 0.0,
+                    'success': False
+                }
+
+    async def _post_ocr(self, client: httpx.AsyncClient, path: str, request: Dict[str, Any]) -> httpx.Response:
+        """처리 중인 요청이 가장 적은 OCR 서버로 요청을 보냅니다 (서버 선택과 재시도는 EndpointAttempt 규칙)."""
+        attempt = EndpointAttempt(self.image_analyzer.client.endpoints)
+        while True:
+            endpoint = attempt.acquire()
+            try:
+                response = await client.post(f"{endpoint.url}{path}", **request)
+            except httpx.HTTPError as e:
+                if not attempt.connection_failed(e):
+                    raise
+                continue
+            delay = attempt.check(response.status_code, response.headers.get("Retry-After"))
+            if delay is None:
+                attempt.finish()
+                return response
+            if delay:
+                await asyncio.sleep(delay)
+
+    async def _summarize(self, text: str, semaphore: asyncio.Semaphore) -> str:
+        """ModelHandler 요약을 스레드에서 실행합니다."""
+        async with semaphore:
+            self.logger.info(f"텍스트 요약 시작 ({self.model_handler.model_type})")
+            summary = await asyncio.to_thread(self.model_handler.generate_summary, text)
+            self.logger.info("텍스트 요약 완료")
+            return summary
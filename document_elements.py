@@ -0,0 +1,208 @@
+import json
+import logging
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# 내부 모듈 임포트
+from html_converter import html_to_markdown
+
+logger = logging.getLogger('document_elements')
+
+# elements.json 형식 버전
+ELEMENTS_FORMAT_VERSION = 1
+ELEMENT_FIELDS = ('id', 'page', 'category', 'bbox', 'start', 'end')
+
+# 본문 텍스트에서 요소 위치를 찾을 때 비교할 앞부분 길이
+_PROBE_LENGTH = 48
+
+
+class DocumentElement:
+    """
+    문서 요소 하나 (제목, 문단, 표, 그림 등)
+
+    텍스트는 따로 보관하지 않고 전체 추출 텍스트에서의 위치(start, end)만 저장합니다.
+    위치를 찾지 못한 요소는 start, end가 -1입니다.
+    """
+
+    __slots__ = ELEMENT_FIELDS
+
+    def __init__(
+        self,
+        id: int,
+        page: int,
+        category: str,
+        bbox: Optional[Tuple[float, float, float, float]] = None,
+        start: int = -1,
+        end: int = -1
+    ):
+        self.id = id
+        self.page = page
+        self.category = category
+        self.bbox = bbox  # (x0, y0, x1, y1), 페이지 크기 기준 0~1 좌표
+        self.start = start
+        self.end = end
+
+    def text(self, document_text: str) -> str:
+        """전체 텍스트에서 이 요소에 해당하는 부분을 반환합니다."""
+        if self.start < 0:
+            return ""
+        return document_text[self.start:self.end]
+
+    def to_row(self) -> List[Any]:
+        return [self.id, self.page, self.category, list(self.bbox) if self.bbox else None, self.start, self.end]
+
+    @classmethod
+    def from_row(cls, row: List[Any]) -> "DocumentElement":
+        element_id, page, category, bbox, start, end = row
+        return cls(element_id, page, category, tuple(bbox) if bbox else None, start, end)
+
+    def __repr__(self) -> str:
+        return f"<DocumentElement #{self.id} p{self.page} {self.category} [{self.start}:{self.end}]>"
+
+
+class DocumentElements:
+    """페이지별, 카테고리별 색인을 갖춘 문서 요소 목록"""
+
+    def __init__(self, elements: List[DocumentElement]):
+        self.elements = elements
+        self._by_page: Dict[int, List[DocumentElement]] = {}
+        self._by_category: Dict[str, List[DocumentElement]] = {}
+        for element in elements:
+            self._by_page.setdefault(element.page, []).append(element)
+            self._by_category.setdefault(element.category, []).append(element)
+
+    def __len__(self) -> int:
+        return len(self.elements)
+
+    def __iter__(self) -> Iterator[DocumentElement]:
+        return iter(self.elements)
+
+    @property
+    def pages(self) -> List[int]:
+        return sorted(self._by_page)
+
+    @property
+    def categories(self) -> List[str]:
+        return sorted(self._by_category)
+
+    def on_page(self, page: int) -> List[DocumentElement]:
+        """해당 페이지의 요소를 문서 순서대로 반환합니다."""
+        return self._by_page.get(page, [])
+
+    def by_category(self, category: str) -> List[DocumentElement]:
+        """해당 카테고리(예: 'table', 'figure', 'heading1')의 요소를 문서 순서대로 반환합니다."""
+        return self._by_category.get(category, [])
+
+    def filter(self, page: Optional[int] = None, category: Optional[str] = None) -> List[DocumentElement]:
+        """
+        페이지와 카테고리로 요소를 고릅니다. 더 작은 색인을 기준으로 훑으므로 전체 요소를 보지 않습니다.
+
+        Args:
+            page: 페이지 번호 (None이면 모든 페이지)
+            category: 카테고리 (None이면 모든 카테고리)
+        """
+        if page is None and category is None:
+            return list(self.elements)
+        if page is None:
+            return list(self.by_category(category))
+        if category is None:
+            return list(self.on_page(page))
+        page_elements = self.on_page(page)
+        category_elements = self.by_category(category)
+        if len(page_elements) <= len(category_elements):
+            return [e for e in page_elements if e.category == category]
+        return [e for e in category_elements if e.page == page]
+
+    def page_text(self, page: int, document_text: str) -> str:
+        """해당 페이지 요소들의 텍스트를 이어 붙여 반환합니다."""
+        return "\n\n".join(t for t in (e.text(document_text) for e in self.on_page(page)) if t)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'version': ELEMENTS_FORMAT_VERSION,
+            'fields': list(ELEMENT_FIELDS),
+            'elements': [element.to_row() for element in self.elements]
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "DocumentElements":
+        if data.get('version') != ELEMENTS_FORMAT_VERSION:
+            raise ValueError(f"지원하지 않는 elements 형식 버전: {data.get('version')}")
+        return cls([DocumentElement.from_row(row) for row in data.get('elements', [])])
+
+    def save(self, path: str) -> None:
+        """요소 목록을 JSON 파일로 저장합니다 (필드 목록 + 행 배열의 간결한 형식)."""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, separators=(',', ':'))
+
+    @classmethod
+    def load(cls, path: str) -> "DocumentElements":
+        """save()로 저장한 JSON 파일을 읽습니다."""
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+    @classmethod
+    def from_upstage(cls, parse_result: Dict[str, Any], document_text: str, text_source: str) -> "DocumentElements":
+        """
+        업스테이지 응답의 elements(또는 merged_elements)로 요소 목록을 만듭니다.
+
+        각 요소의 텍스트를 본문과 같은 형식(text, markdown, html→마크다운)으로 구한 뒤,
+        본문에서 앞에서부터 차례로 찾아 위치를 기록합니다. 찾는 위치는 뒤로만 이동하므로
+        전체 작업은 본문 길이에 비례합니다.
+
+        Args:
+            parse_result: 업스테이지 API 응답
+            document_text: 추출된 전체 텍스트
+            text_source: 본문 텍스트를 가져온 형식 (_extract_text의 반환값)
+        """
+        raw_elements = []
+        if isinstance(parse_result, dict):
+            raw_elements = parse_result.get('elements') or parse_result.get('merged_elements') or []
+        source_key = text_source.rsplit('.', 1)[-1]
+
+        elements = []
+        cursor = 0
+        for index, raw in enumerate(raw_elements):
+            if not isinstance(raw, dict):
+                continue
+            element = DocumentElement(
+                id=raw.get('id', index),
+                page=int(raw.get('page') or 0),
+                category=str(raw.get('category') or 'unknown'),
+                bbox=_bbox(raw.get('coordinates'))
+            )
+            element_text = _element_text(raw, source_key)
+            probe = element_text[:_PROBE_LENGTH]
+            if probe:
+                position = document_text.find(probe, cursor)
+                if position >= 0:
+                    element.start = position
+                    element.end = min(len(document_text), position + len(element_text))
+                    cursor = position + len(probe)
+            elements.append(element)
+
+        located = sum(1 for e in elements if e.start >= 0)
+        logger.info(f"문서 요소 {len(elements)}개 생성 (본문 위치 확인: {located}개)")
+        return cls(elements)
+
+
+def _bbox(coordinates: Any) -> Optional[Tuple[float, float, float, float]]:
+    """꼭짓점 좌표 목록을 (x0, y0, x1, y1)로 변환합니다."""
+    if not isinstance(coordinates, list) or not coordinates:
+        return None
+    try:
+        xs = [float(point['x']) for point in coordinates]
+        ys = [float(point['y']) for point in coordinates]
+    except (KeyError, TypeError, ValueError):
+        return None
+    return (round(min(xs), 4), round(min(ys), 4), round(max(xs), 4), round(max(ys), 4))
+
+
+def _element_text(raw: Dict[str, Any], source_key: str) -> str:
+    """요소 텍스트를 본문과 같은 형식으로 구합니다."""
+    content = raw.get('content')
+    if not isinstance(content, dict):
+        return content.strip() if isinstance(content, str) else ""
+    if source_key == 'html':
+        return html_to_markdown(content.get('html') or "")
+    value = content.get(source_key) or ""
+    return value.strip() if isinstance(value, str) else ""
@@ -5,10 +5,26 @@ import base64
 import logging
 import time
 import re
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from pathlib import Path
-from typing import List, Tuple, Dict, Any, Optional, Union
+from typing import List, Tuple, Dict, Any, Optional, Union, Callable
 from dotenv import load_dotenv
+import fitz  # PyMuPDF
+
+# 내부 모듈 임포트
+from document_elements import DocumentElements
+from html_converter import html_to_markdown
+from http_client import get_session, request_timeout
+from image_dedup import dedupe_images
+from image_analyzer import OCR_MIN_CONF, OCR_TIMEOUT, ImageAnalyzer as OCRClient
+from image_filter import ImageFilter
+from parse_cache import ParseCache
+from rate_limiter import TokenBucketLimiter, get_limiter
+from retry_policy import RetryPolicy, CircuitOpenError, get_circuit_breaker, parse_retry_after
+from streaming_json import load_spilling, SpilledBlob, StreamingJSONError
 
 # 로깅 설정
 logging.basicConfig(
@@ -29,19 +45,84 @@ class DocumentProcessorError(Exception):
 # 환경 변수 로드
 load_dotenv()
 
+# 스트리밍 응답 다운로드 단위 (바이트)
+STREAM_CHUNK_SIZE = 1024 * 1024
+
 class ImageAnalyzer:
     """이미지 분석을 위한 클래스 (Tesseract OCR 기반)"""
     
-    def __init__(self, server_url: str = "http://localhost:5050"):
+    def __init__(
+        self,
+        server_url: Union[str, List[str]] = "http://localhost:5050",
+        session: Optional[requests.Session] = None,
+        preprocess: Optional[str] = None,
+        shared_root: Optional[str] = None,
+        min_conf: Optional[float] = OCR_MIN_CONF,
+        layout: bool = False,
+        timeout: float = OCR_TIMEOUT
+    ):
         """
         이미지 분석기 초기화
         
         Args:
-            server_url: 이미지 분석 서버 URL (기본값: http://localhost:5050)
+            server_url: 이미지 분석 서버 URL (기본값: http://localhost:5050, 여러 서버는 목록 또는 쉼표로 구분한 문자열)
+            session: HTTP 세션 (None인 경우 공유 'ocr' 세션 사용)
+            preprocess: OCR 서버 전처리 단계 (none, auto 또는 scale,deskew,binarize 조합, None인 경우 서버 기본값)
+            shared_root: OCR 서버와 공유하는 디렉토리 (None인 경우 환경변수 OCR_SHARED_ROOT)
+            min_conf: 단어 신뢰도 하한 (0~100, 이보다 낮은 단어는 텍스트에서 제외, None이면 신뢰도를 받지 않음)
+            layout: 결과에 단어 상자, 줄 묶음, 단어별 신뢰도(layout)를 포함할지 여부
+            timeout: OCR 요청의 응답 대기 타임아웃(초, 배치 스트리밍은 결과 줄 사이의 최대 대기 시간)
         """
-        self.server_url = server_url.rstrip('/')
+        # 요청 방식(배치, 공유 경로, 전처리 옵션)은 image_analyzer 클라이언트를 그대로 사용하고 결과 형식만 변환
+        self.client = OCRClient(
+            server_url=server_url,
+            session=session,
+            preprocess=preprocess,
+            shared_root=shared_root,
+            min_conf=min_conf,
+            layout=layout,
+            timeout=timeout
+        )
+        self.server_url = self.client.server_url
+        self.session = self.client.session
         self.logger = logging.getLogger('image_analyzer')
-        self.logger.info(f"이미지 분석기 초기화 완료 (서버: {self.server_url})")
+        self.logger.info(f"이미지 분석기 초기화 완료 (서버: {', '.join(self.client.endpoints.urls)})")
+    
+    def ocr_params(self, lang: Optional[str] = None) -> Dict[str, str]:
+        """OCR 요청 쿼리 파라미터 (언어, 전처리 단계, 단어 신뢰도 하한, 레이아웃)"""
+        return self.client.ocr_params(lang)
+    
+    def is_shared(self, image_path: str) -> bool:
+        """이미지가 OCR 서버와 공유하는 디렉토리 안에 있어 경로만 보내도 되는지 여부"""
+        return self.client.is_shared(image_path)
+    
+    def disable_shared(self, status_code: int) -> None:
+        """서버가 경로 기반 요청을 거부하면 공유 경로 모드를 끄고 업로드 방식으로 전환합니다."""
+        self.client.disable_shared(status_code)
+    
+    def result_from_response(self, image_path: str, item: Dict[str, Any]) -> Dict[str, Any]:
+        """OCR 서버 응답(JSON)을 파이프라인 결과 형식으로 변환합니다 (analyze_image와 같은 형식)."""
+        return self._to_result(self.client.ocr_result(image_path, item, item.get('language', '')))
+    
+    @staticmethod
+    def _to_result(client_result: Dict[str, Any]) -> Dict[str, Any]:
+        """image_analyzer 결과를 파이프라인 결과 형식(text, confidence, success)으로 변환합니다."""
+        if 'error' in client_result:
+            return {
+                'error': client_result['error'],
+                'text': '',
+                'confidence': 0.0,
+                'success': False
+            }
+        result = {
+            'text': client_result.get('ocr_text', ''),
+            'confidence': client_result.get('confidence', 0.0),
+            'success': True
+        }
+        for name in ('dropped_words', 'layout'):
+            if name in client_result:
+                result[name] = client_result[name]
+        return result
     
     def analyze_image(self, image_path: Union[str, Path]) -> Dict[str, Any]:
         """
@@ -53,33 +134,20 @@ class ImageAnalyzer:
         Returns:
             분석 결과 딕셔너리
         """
-        try:
-            if isinstance(image_path, Path):
-                image_path = str(image_path)
-                
-            with open(image_path, 'rb') as img_file:
-                files = {'file': (os.path.basename(image_path), img_file, 'image/jpeg')}
-                response = requests.post(
-                    f"{self.server_url}/analyze/ocr",
-                    files=files,
-                    timeout=30
-                )
-                response.raise_for_status()
-                result = response.json()
-                return {
-                    'text': result.get('text', ''),
-                    'confidence': result.get('confidence', 0.0),
-                    'success': True
-                }
-        except Exception as e:
-            error_msg = f"이미지 분석 실패: {str(e)}"
-            self.logger.error(error_msg, exc_info=True)
-            return {
-                'error': str(e),
-                'text': '',
-                'confidence': 0.0,
-                'success': False
-            }
+        return self._to_result(self.client.analyze_image(str(image_path)))
+    
+    def analyze_batched(self, image_paths: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        이미지 여러 개를 크기 기준 배치 요청으로 분석합니다.
+        
+        Args:
+            image_paths: 이미지 파일 경로 목록
+            
+        Returns:
+            {이미지_경로: 분석_결과} 형식의 딕셔너리
+        """
+        results = self.client.analyze_batched([str(path) for path in image_paths])
+        return {path: self._to_result(result) for path, result in results.items()}
     
     def analyze_directory(self, directory_path: Union[str, Path]) -> Dict[str, Dict[str, Any]]:
         """
@@ -118,18 +186,59 @@ class ImageAnalyzer:
             raise ImageAnalysisError(error_msg) from e
 
 
+class ParseResult:
+    """UpstageDocumentParser.parse()의 결과 (텍스트, 이미지 경로, 요소 목록과 저장 경로)"""
+    
+    __slots__ = ('text', 'image_paths', 'elements', 'elements_path')
+    
+    def __init__(
+        self,
+        text: str,
+        image_paths: List[str],
+        elements: Optional[DocumentElements] = None,
+        elements_path: Optional[str] = None
+    ):
+        self.text = text
+        self.image_paths = image_paths
+        self.elements = elements  # 요소가 없거나 만들지 못했으면 None
+        self.elements_path = elements_path  # 저장하지 못했으면 None
+
+
 class UpstageDocumentParser:
     """업스테이지 Document Parser API를 사용하여 PDF 문서를 파싱하는 클래스"""
     
-    def __init__(self, api_key: str = None, timeout: int = 300, max_retries: int = 2, retry_delay: int = 3):
+    def __init__(
+        self,
+        api_key: str = None,
+        timeout: int = 300,
+        max_retries: int = 2,
+        retry_delay: int = 3,
+        cache: Optional[ParseCache] = None,
+        use_cache: bool = True,
+        shard_pages: Optional[int] = None,
+        shard_workers: int = 4,
+        stream_response: bool = True,
+        session: Optional[requests.Session] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        rate_limiter: Optional[TokenBucketLimiter] = None
+    ):
         """
         초기화 함수
         
         Args:
             api_key: 업스테이지 API 키 (None인 경우 환경변수에서 로드)
             timeout: API 요청 타임아웃(초)
-            max_retries: 실패 시 재시도 횟수
-            retry_delay: 재시도 전 대기 시간(초)
+            max_retries: 최대 시도 횟수 (retry_policy가 없을 때 사용)
+            retry_delay: 첫 재시도의 최대 대기 시간(초), 이후 지수적으로 증가 (retry_policy가 없을 때 사용)
+            cache: 파싱 결과 캐시 (None이고 use_cache가 True이면 기본 캐시 사용)
+            use_cache: 파싱 결과 캐시 사용 여부
+            shard_pages: 샤드당 페이지 수 (이보다 페이지가 많은 문서는 샤드로 나누어 병렬 파싱,
+                         None인 경우 UPSTAGE_SHARD_PAGES 환경변수 또는 30, 0이면 사용 안 함)
+            shard_workers: 샤드 동시 요청 수
+            stream_response: 응답을 스트리밍으로 받아 base64 이미지를 메모리에 올리지 않고 디스크에 바로 디코딩할지 여부
+            session: HTTP 세션 (None인 경우 공유 'upstage' 세션 사용)
+            retry_policy: 재시도 정책 (None인 경우 지터 백오프 + 공유 'upstage_parse' 서킷 브레이커 사용)
+            rate_limiter: 요청 한도 리미터 (None인 경우 프로세스 공유 'upstage_parse' 리미터 사용)
         """
         self.api_key = api_key or os.getenv("UPSTAGE_API_KEY")
         if not self.api_key:
@@ -140,24 +249,80 @@ class UpstageDocumentParser:
             "Authorization": f"Bearer {self.api_key}"
             # Content-Type은 requests가 자동으로 설정함 (multipart/form-data)
         }
+        # API 요청 파라미터 (캐시 키에도 사용됨)
+        self.request_options = {
+            "model": "document-parse",  # 기본 모델 사용
+            "ocr": "true",  # OCR 활성화
+            "chart_recognition": "true",  # 차트 인식 활성화
+            "coordinates": "true",  # 좌표 정보 포함
+            "output_formats": "[\"html\", \"text\", \"markdown\"]",  # 정확한 문자열 형식으로 전달
+            "base64_encoding": "[\"figure\"]",  # 정확한 문자열 형식으로 전달
+        }
         self.timeout = timeout
         self.max_retries = max_retries
         self.retry_delay = retry_delay
+        # 동시에 실패한 샤드/업로드가 같은 시점에 재시도하지 않도록 지터 백오프를 사용하고,
+        # 서킷 브레이커는 프로세스 전체에서 공유하여 API 장애 시 모든 요청을 함께 멈춤
+        self.retry_policy = retry_policy or RetryPolicy(
+            max_attempts=max_retries,
+            base_delay=retry_delay,
+            circuit_breaker=get_circuit_breaker("upstage_parse")
+        )
+        # 여러 업로드 스레드가 동시에 파싱해도 API 한도 안에서 순서대로 요청하도록 프로세스 전체에서 공유
+        self.rate_limiter = rate_limiter or get_limiter("upstage_parse")
+        self.cache = cache if cache is not None else (ParseCache() if use_cache else None)
+        self.shard_pages = shard_pages if shard_pages is not None else int(os.getenv("UPSTAGE_SHARD_PAGES", "30"))
+        self.shard_workers = shard_workers
+        self.stream_response = stream_response
+        # 샤드 동시 요청 수만큼은 연결을 재사용할 수 있도록 공유 세션 사용
+        self.session = session or get_session("upstage")
         self.logger = logging.getLogger('upstage_parser')
         
-        self.logger.info(f"업스테이지 Document Parser 초기화 완료 (timeout: {timeout}초, max_retries: {max_retries})")
+        self.logger.info(f"업스테이지 Document Parser 초기화 완료 (timeout: {timeout}초, max_retries: {max_retries}, shard_pages: {self.shard_pages})")
     
-    def parse_document(self, pdf_path: str, output_dir: str, save_response: bool = True) -> Tuple[str, List[str]]:
-        """PDF 문서를 파싱하여 텍스트와 이미지를 추출합니다.
+    def parse_document(
+        self,
+        pdf_path: str,
+        output_dir: str,
+        save_response: bool = True,
+        on_figure_saved: Optional[Callable[[str], None]] = None
+    ) -> Tuple[str, List[str]]:
+        """PDF 문서를 파싱하여 텍스트와 이미지를 추출합니다 (요소 목록이 필요하면 parse 사용).
         
         Args:
             pdf_path: PDF 파일 경로
             output_dir: 추출된 이미지를 저장할 디렉토리
             save_response: API 응답 내용을 파일로 저장할지 여부
+            on_figure_saved: 이미지가 하나 저장될 때마다 경로와 함께 호출되는 콜백
             
         Returns:
             (추출된_텍스트, 이미지_경로_리스트) 튜플
         """
+        result = self.parse(pdf_path, output_dir, save_response, on_figure_saved)
+        return result.text, result.image_paths
+    
+    def parse(
+        self,
+        pdf_path: str,
+        output_dir: str,
+        save_response: bool = True,
+        on_figure_saved: Optional[Callable[[str], None]] = None
+    ) -> "ParseResult":
+        """PDF 문서를 파싱하여 텍스트, 이미지, 요소 목록을 추출합니다.
+        
+        페이지 수가 shard_pages를 넘는 문서는 페이지 범위별 샤드로 나누어 병렬로 파싱합니다.
+        결과는 호출마다 따로 반환하므로 같은 파서로 여러 문서를 동시에 파싱해도 됩니다.
+        
+        Args:
+            pdf_path: PDF 파일 경로
+            output_dir: 추출된 이미지를 저장할 디렉토리
+            save_response: API 응답 내용을 파일로 저장할지 여부
+            on_figure_saved: 이미지가 하나 저장될 때마다 경로와 함께 호출되는 콜백
+                             (후속 단계가 전체 파싱 완료를 기다리지 않고 시작할 수 있도록 함)
+            
+        Returns:
+            ParseResult (요소별 페이지, 카테고리, 좌표, 텍스트 위치는 output_dir/elements.json에도 저장됨)
+        """
         # 이미지 저장 디렉토리 생성
         images_dir = os.path.join(output_dir, "images")
         os.makedirs(images_dir, exist_ok=True)
@@ -168,7 +333,7 @@ class UpstageDocumentParser:
         
         # 현재 시간을 이용한 파일명 생성
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        log_file = os.path.join(logs_dir, f"upstage_api_{timestamp}.log")
+        spill_dir = None
         
         try:
             logger.info(f"업스테이지 Document Parser API를 사용하여 {os.path.basename(pdf_path)} 파싱 시작")
@@ -178,349 +343,620 @@ class UpstageDocumentParser:
             file_size = os.path.getsize(pdf_path) / (1024 * 1024)  # MB 단위
             logger.info(f"PDF 파일 크기: {file_size:.2f} MB")
             
-            # PDF 파일 업로드
-            with open(pdf_path, "rb") as file:
-                files = {"document": file}
-                # API 요청 파라미터 설정
-                data = {
-                    "model": "document-parse",  # 기본 모델 사용
-                    "ocr": "true",  # OCR 활성화
-                    "chart_recognition": "true",  # 차트 인식 활성화
-                    "coordinates": "true",  # 좌표 정보 포함
-                    "output_formats": "[\"html\", \"text\", \"markdown\"]",  # 정확한 문자열 형식으로 전달
-                    "base64_encoding": "[\"figure\"]",  # 정확한 문자열 형식으로 전달
-                }
-                
-                # 디버깅을 위해 요청 데이터 출력
-                logger.debug(f"API 요청 데이터: {data}")
-                print(f"API 요청 데이터: {data}")
+            # 캐시 확인 (같은 내용의 파일을 같은 옵션으로 파싱한 적이 있으면 API 호출 생략)
+            cache_key = None
+            if self.cache is not None:
+                try:
+                    cache_key = ParseCache.make_key(ParseCache.hash_file(pdf_path), self.request_options)
+                    cached = self.cache.get(cache_key)
+                    if cached is not None:
+                        image_paths = self.cache.restore_figures(cached, images_dir)
+                        if on_figure_saved:
+                            for image_path in image_paths:
+                                on_figure_saved(image_path)
+                        elements_data = cached.get('metadata', {}).get('elements')
+                        elements = DocumentElements.from_dict(elements_data) if elements_data else None
+                        elements_path = self._save_elements(elements, output_dir) if elements else None
+                        logger.info(f"파싱 캐시 적중: {cache_key[:12]} (텍스트 {len(cached['text'])} 자, 이미지 {len(image_paths)}개)")
+                        print("파싱 캐시 적중: 업스테이지 API 호출을 생략합니다.")
+                        return ParseResult(cached['text'], image_paths, elements, elements_path)
+                except Exception as e:
+                    logger.warning(f"파싱 캐시 조회 실패: {str(e)}")
+            
+            # 스트리밍 파싱 시 base64 이미지를 디코딩해 둘 임시 디렉토리 (이미지 디렉토리와 같은 파일시스템)
+            if self.stream_response:
+                spill_dir = tempfile.mkdtemp(prefix=".spill_", dir=images_dir)
+            
+            # 페이지 수에 따라 단일 요청 또는 샤드 병렬 요청 선택
+            page_count = self._count_pages(pdf_path)
+            if self.shard_pages and page_count > self.shard_pages:
+                parse_result = self._parse_sharded(pdf_path, page_count, output_dir, logs_dir, timestamp, spill_dir, save_response)
+            else:
+                parse_result = self._request_parse(pdf_path, logs_dir, timestamp, spill_dir=spill_dir, save_response=save_response)
+            
+            logger.info("문서 파싱 성공")
+            print("문서 파싱 성공.")
+            
+            # API 응답 저장 (선택사항, 스트리밍 모드에서는 원본 응답이 이미 저장됨)
+            if save_response and not self.stream_response:
+                response_file = os.path.join(logs_dir, f"response_{timestamp}.json")
+                try:
+                    with open(response_file, 'w', encoding='utf-8') as f:
+                        json.dump(parse_result, f, ensure_ascii=False, indent=2)
+                    logger.info(f"API 응답 저장 완료: {response_file}")
+                except Exception as e:
+                    logger.warning(f"API 응답 저장 실패: {str(e)}")
+            
+            # 응답 내용 로깅
+            logger.info(f"API 응답 내용: {list(parse_result.keys())}")
+            print(f"API 응답 내용: {parse_result.keys()}")
+            
+            # 디버깅: 응답 내용 출력
+            for key, value in parse_result.items():
+                if isinstance(value, str) and len(value) > 100:
+                    logger.debug(f"  - {key}: {value[:100]}... (길이: {len(value)})")
+                    print(f"  - {key}: {value[:100]}... (길이: {len(value)})")
+                elif isinstance(value, list):
+                    logger.debug(f"  - {key}: [리스트, 길이: {len(value)}]")
+                    print(f"  - {key}: [리스트, 길이: {len(value)}]")
+                else:
+                    logger.debug(f"  - {key}: {value}")
+                    print(f"  - {key}: {value}")
+            
+            # 텍스트 추출 (여러 출력 형식 중 선택)
+            text, text_source = self._extract_text(parse_result)
+            
+            # 요소 목록 생성 (페이지, 카테고리, 좌표, 본문 내 위치)
+            elements = None
+            elements_path = None
+            try:
+                elements = DocumentElements.from_upstage(parse_result, text, text_source)
+                if elements:
+                    elements_path = self._save_elements(elements, output_dir)
+            except Exception as e:
+                logger.warning(f"문서 요소 생성 실패: {str(e)}")
+            elements_count = len(elements) if elements else 0
+            if elements_count:
+                logger.info(f"추출된 요소 수: {elements_count}개")
+                print(f"추출된 요소 수: {elements_count}개")
+            
+            logger.info(f"추출된 텍스트 길이: {len(text)} 자 (소스: {text_source})")
+            print(f"추출된 텍스트 길이: {len(text)} 자")
+            
+            # 텍스트 저장 (디버깅용)
+            if text and save_response:
+                text_file = os.path.join(logs_dir, f"extracted_text_{timestamp}.txt")
+                try:
+                    with open(text_file, 'w', encoding='utf-8') as f:
+                        f.write(text)
+                    logger.info(f"추출된 텍스트 저장 완료: {text_file}")
+                except Exception as e:
+                    logger.warning(f"텍스트 저장 실패: {str(e)}")
+            
+            # 이미지 추출 및 저장
+            image_paths, figures_count = self._save_figures(parse_result, images_dir, on_figure_saved)
+            
+            # 처리 결과 요약
+            logger.info(f"업스테이지 API 처리 결과: 텍스트 {len(text)} 자, 이미지 {len(image_paths)}/{figures_count} 개 추출")
+            
+            # 파싱 결과 캐시 저장
+            if cache_key and text and text_source != "raw_response":
+                try:
+                    self.cache.put(cache_key, text, image_paths, {
+                        'source_file': os.path.basename(pdf_path),
+                        'text_source': text_source,
+                        'elements_count': elements_count,
+                        'elements': elements.to_dict() if elements_count else None
+                    })
+                except Exception as e:
+                    logger.warning(f"파싱 캐시 저장 실패: {str(e)}")
+            
+            return ParseResult(text, image_paths, elements, elements_path)
                 
-                logger.info(f"문서 업로드 및 파싱 요청 중: {self.base_url}")
-                print(f"문서 업로드 및 파싱 요청 중: {self.base_url}")
+        except Exception as e:
+            error_msg = f"업스테이지 Document Parser API 요청 중 오류 발생: {str(e)}"
+            logger.error(error_msg)
+            print(error_msg)
+            
+            # 오류 로그 저장
+            try:
+                error_log_file = os.path.join(logs_dir, f"error_{timestamp}.log")
+                with open(error_log_file, 'w', encoding='utf-8') as f:
+                    f.write(f"Error: {str(e)}\n")
+                    f.write(f"Timestamp: {datetime.now().isoformat()}\n")
+                    f.write(f"PDF file: {pdf_path}\n")
+                logger.info(f"오류 로그 저장 완료: {error_log_file}")
+            except Exception as log_error:
+                logger.warning(f"오류 로그 저장 실패: {str(log_error)}")
+            
+            return ParseResult("", [])
+        finally:
+            # 이미지로 옮겨지지 않은 디코딩 파일 정리
+            if spill_dir:
+                shutil.rmtree(spill_dir, ignore_errors=True)
+    
+    def _save_elements(self, elements: DocumentElements, output_dir: str) -> Optional[str]:
+        """요소 목록을 output_dir/elements.json에 저장하고 경로를 반환합니다 (실패하면 None)."""
+        elements_path = os.path.join(output_dir, "elements.json")
+        try:
+            elements.save(elements_path)
+            logger.info(f"문서 요소 저장 완료: {elements_path}")
+            return elements_path
+        except OSError as e:
+            logger.warning(f"문서 요소 저장 실패: {str(e)}")
+            return None
+    
+    def _count_pages(self, pdf_path: str) -> int:
+        """PDF 페이지 수를 반환합니다 (확인할 수 없으면 0)."""
+        try:
+            with fitz.open(pdf_path) as doc:
+                return doc.page_count
+        except Exception as e:
+            logger.warning(f"PDF 페이지 수 확인 실패: {str(e)}")
+            return 0
+    
+    def _request_parse(
+        self,
+        pdf_path: str,
+        logs_dir: str,
+        timestamp: str,
+        label: str = "",
+        spill_dir: Optional[str] = None,
+        save_response: bool = True
+    ) -> Dict[str, Any]:
+        """
+        PDF 파일 하나를 업로드하여 파싱 결과(JSON)를 받아옵니다.
+        
+        Args:
+            pdf_path: 업로드할 PDF 파일 경로
+            logs_dir: 오류 로그를 저장할 디렉토리
+            timestamp: 로그 파일명에 사용할 타임스탬프
+            label: 로그 구분용 접두어 (샤드 번호 등)
+            spill_dir: 스트리밍 파싱 시 base64 이미지를 디코딩해 둘 디렉토리
+            save_response: 원본 API 응답을 response_*.json으로 남길지 여부
+            
+        Returns:
+            API 응답 딕셔너리
+        """
+        prefix = f"[{label}] " if label else ""
+        log_tag = f"{timestamp}_{label.replace(' ', '_').replace('/', 'of')}" if label else timestamp
+        
+        # PDF 파일 업로드
+        with open(pdf_path, "rb") as file:
+            # API 요청 파라미터 설정
+            data = dict(self.request_options)
+            
+            # 디버깅을 위해 요청 데이터 출력
+            logger.debug(f"API 요청 데이터: {data}")
+            print(f"{prefix}API 요청 데이터: {data}")
+            
+            logger.info(f"{prefix}문서 업로드 및 파싱 요청 중: {self.base_url}")
+            print(f"{prefix}문서 업로드 및 파싱 요청 중: {self.base_url}")
+            
+            def send(attempt: int) -> requests.Response:
+                logger.info(f"{prefix}API 요청 시도 {attempt}/{self.retry_policy.max_attempts}")
+                # 이전 시도에서 파일 끝까지 읽었으므로 매 시도마다 처음부터 다시 업로드
+                file.seek(0)
+                with self.rate_limiter:
+                    start_time = time.time()
+                    response = self.session.post(
+                        self.base_url,
+                        headers=self.headers,
+                        files={"document": file},
+                        data=data,
+                        timeout=request_timeout(self.timeout),
+                        stream=self.stream_response
+                    )
+                elapsed_time = time.time() - start_time
+                logger.info(f"{prefix}API 응답 상태 코드: {response.status_code} (소요 시간: {elapsed_time:.2f}초)")
+                print(f"{prefix}API 응답 상태 코드: {response.status_code}")
+                return response
+            
+            def on_failure(attempt: int, response: Optional[requests.Response], error: Optional[Exception]) -> None:
+                if response is None:
+                    logger.error(f"{prefix}API 요청 실패 (시도 {attempt}/{self.retry_policy.max_attempts}): {str(error)}")
+                    print(f"{prefix}API 요청 실패: {str(error)}")
+                    return
+                if response.status_code == 429:
+                    # 한도 초과 시 다른 호출자도 함께 기다리도록 리미터를 멈춤
+                    self.rate_limiter.pause(parse_retry_after(response.headers.get("Retry-After")) or self.retry_policy.base_delay)
+                error_msg = f"{prefix}API 오류 응답 (HTTP {response.status_code}): {response.text}"
+                logger.error(error_msg)
+                print(f"{prefix}API 오류 응답: {response.text}")
                 
-                # 재시도 로직 추가
-                for attempt in range(1, self.max_retries + 1):
+                # 오류 로그 저장
+                with open(os.path.join(logs_dir, f"error_{log_tag}_{attempt}.log"), 'w', encoding='utf-8') as f:
+                    f.write(f"Status Code: {response.status_code}\n")
+                    f.write(f"Retry-After: {response.headers.get('Retry-After', '')}\n")
+                    f.write(f"Response: {response.text}\n")
+            
+            try:
+                response = self.retry_policy.execute(send, on_failure=on_failure)
+            except (requests.exceptions.RequestException, CircuitOpenError):
+                logger.error(f"{prefix}모든 재시도 실패 (재시도 통계: {self.retry_policy.metrics.snapshot()})")
+                raise
+            
+            # 파싱 결과 확인
+            if not self.stream_response:
+                return response.json()
+            return self._load_streamed_response(response, logs_dir, log_tag, spill_dir, save_response)
+    
+    def _load_streamed_response(
+        self,
+        response: requests.Response,
+        logs_dir: str,
+        log_tag: str,
+        spill_dir: str,
+        keep_file: bool
+    ) -> Dict[str, Any]:
+        """
+        응답 본문을 파일로 내려받은 뒤 청크 단위로 파싱합니다.
+        
+        base64 이미지는 메모리에 올리지 않고 spill_dir에 바로 디코딩되어 SpilledBlob으로
+        대체되며, 원본 응답 파일은 keep_file이 True이면 response_*.json으로 남습니다.
+        """
+        response_file = os.path.join(logs_dir, f"response_{log_tag}.json")
+        try:
+            with open(response_file, 'wb') as f:
+                for chunk in response.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+                    f.write(chunk)
+        finally:
+            response.close()
+        
+        try:
+            try:
+                with open(response_file, 'r', encoding='utf-8') as f:
+                    return load_spilling(f, spill_dir)
+            except StreamingJSONError as e:
+                logger.warning(f"스트리밍 파싱 실패, 일반 JSON 파싱으로 재시도: {str(e)}")
+                with open(response_file, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        finally:
+            if keep_file:
+                logger.info(f"API 응답 저장 완료: {response_file}")
+            else:
+                os.remove(response_file)
+    
+    def _parse_sharded(
+        self,
+        pdf_path: str,
+        page_count: int,
+        output_dir: str,
+        logs_dir: str,
+        timestamp: str,
+        spill_dir: Optional[str] = None,
+        save_response: bool = True
+    ) -> Dict[str, Any]:
+        """
+        PDF를 페이지 범위별 샤드로 나누어 병렬로 파싱하고 결과를 페이지 순서대로 합칩니다.
+        
+        샤드별로 재시도하므로 실패한 샤드만 다시 업로드됩니다.
+        
+        Args:
+            pdf_path: PDF 파일 경로
+            page_count: 전체 페이지 수
+            output_dir: 샤드 임시 파일을 만들 디렉토리
+            logs_dir: 오류 로그를 저장할 디렉토리
+            timestamp: 로그 파일명에 사용할 타임스탬프
+            spill_dir: 스트리밍 파싱 시 base64 이미지를 디코딩해 둘 디렉토리
+            save_response: 샤드별 원본 API 응답을 저장할지 여부
+            
+        Returns:
+            병합된 API 응답 딕셔너리
+        """
+        shard_dir = tempfile.mkdtemp(prefix="shards_", dir=output_dir)
+        try:
+            shards = self._split_pdf(pdf_path, page_count, shard_dir)
+            workers = max(1, min(self.shard_workers, len(shards)))
+            logger.info(f"샤드 모드: {page_count}페이지를 {len(shards)}개 샤드로 분할 (샤드당 {self.shard_pages}페이지, 동시 요청 {workers}개)")
+            print(f"샤드 모드: {page_count}페이지 → {len(shards)}개 샤드 병렬 파싱 (동시 요청 {workers}개)")
+            
+            results: List[Optional[Dict[str, Any]]] = [None] * len(shards)
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = {
+                    executor.submit(
+                        self._request_parse, shard_path, logs_dir, timestamp,
+                        f"shard {index + 1}/{len(shards)}", spill_dir, save_response
+                    ): index
+                    for index, (_, _, shard_path) in enumerate(shards)
+                }
+                errors = []
+                for future in as_completed(futures):
+                    index = futures[future]
+                    first_page, last_page, _ = shards[index]
                     try:
-                        start_time = time.time()
-                        logger.info(f"API 요청 시도 {attempt}/{self.max_retries}")
-                        
-                        response = requests.post(
-                            self.base_url,
-                            headers=self.headers,
-                            files=files,
-                            data=data,
-                            timeout=self.timeout
-                        )
-                        
-                        elapsed_time = time.time() - start_time
-                        
-                        # 응답 상태 코드 확인
-                        logger.info(f"API 응답 상태 코드: {response.status_code} (소요 시간: {elapsed_time:.2f}초)")
-                        print(f"API 응답 상태 코드: {response.status_code}")
-                        
-                        # 오류 발생 시 응답 내용 출력
-                        if response.status_code != 200:
-                            error_msg = f"API 오류 응답 (HTTP {response.status_code}): {response.text}"
-                            logger.error(error_msg)
-                            print(f"API 오류 응답: {response.text}")
-                            
-                            # 오류 로그 저장
-                            with open(os.path.join(logs_dir, f"error_{timestamp}_{attempt}.log"), 'w', encoding='utf-8') as f:
-                                f.write(f"Status Code: {response.status_code}\n")
-                                f.write(f"Response: {response.text}\n")
-                            
-                            # 재시도 가능한 오류인지 확인
-                            if response.status_code in [429, 500, 502, 503, 504] and attempt < self.max_retries:
-                                retry_time = self.retry_delay * attempt  # 점진적 대기 시간 증가
-                                logger.info(f"{retry_time}초 후 재시도 예정...")
-                                print(f"{retry_time}초 후 재시도 예정...")
-                                time.sleep(retry_time)
-                                continue
-                        
-                        response.raise_for_status()
-                        break  # 성공적인 응답을 받았으므로 루프 종료
-                        
-                    except requests.exceptions.Timeout:
-                        logger.error(f"타임아웃 발생 (시도 {attempt}/{self.max_retries})")
-                        print(f"API 요청 타임아웃 (시도 {attempt}/{self.max_retries})")
-                        
-                        if attempt < self.max_retries:
-                            retry_time = self.retry_delay * attempt
-                            logger.info(f"{retry_time}초 후 재시도 예정...")
-                            print(f"{retry_time}초 후 재시도 예정...")
-                            time.sleep(retry_time)
+                        results[index] = future.result()
+                        logger.info(f"샤드 {index + 1}/{len(shards)} 완료 (페이지 {first_page + 1}-{last_page + 1})")
+                    except Exception as e:
+                        errors.append(f"샤드 {index + 1} (페이지 {first_page + 1}-{last_page + 1}): {str(e)}")
+            
+            if errors:
+                raise DocumentProcessorError(f"샤드 파싱 실패 {len(errors)}/{len(shards)}개 - " + "; ".join(errors))
+            
+            return self._merge_shard_results(
+                [(first_page, result) for (first_page, _, _), result in zip(shards, results)]
+            )
+        finally:
+            shutil.rmtree(shard_dir, ignore_errors=True)
+    
+    def _split_pdf(self, pdf_path: str, page_count: int, shard_dir: str) -> List[Tuple[int, int, str]]:
+        """
+        PDF를 shard_pages 단위의 페이지 범위 파일로 분할합니다.
+        
+        Returns:
+            (첫_페이지, 마지막_페이지, 샤드_파일_경로) 리스트 (페이지는 0부터 시작)
+        """
+        shards = []
+        with fitz.open(pdf_path) as src:
+            for first_page in range(0, page_count, self.shard_pages):
+                last_page = min(first_page + self.shard_pages, page_count) - 1
+                shard_path = os.path.join(shard_dir, f"shard_{first_page + 1:05d}_{last_page + 1:05d}.pdf")
+                with fitz.open() as shard:
+                    shard.insert_pdf(src, from_page=first_page, to_page=last_page)
+                    shard.save(shard_path, garbage=3, deflate=True)
+                shards.append((first_page, last_page, shard_path))
+        return shards
+    
+    @staticmethod
+    def _merge_shard_results(shard_results: List[Tuple[int, Dict[str, Any]]]) -> Dict[str, Any]:
+        """
+        샤드별 API 응답을 하나의 응답 형식으로 합칩니다.
+        
+        텍스트 형식(text/markdown/html)은 순서대로 이어 붙이고, 요소 목록(elements,
+        merged_elements, figures)은 페이지 번호와 id를 원본 문서 기준으로 보정하여 합칩니다.
+        
+        Args:
+            shard_results: (첫_페이지, API_응답) 리스트 (페이지 순서)
+            
+        Returns:
+            병합된 API 응답 딕셔너리
+        """
+        text_keys = ('text', 'markdown', 'html')
+        merged: Dict[str, Any] = {}
+        text_parts: Dict[str, List[str]] = {}
+        content_parts: Dict[str, List[str]] = {}
+        element_offset = 0
+        
+        for first_page, result in shard_results:
+            max_id = -1
+            for key, value in result.items():
+                if key in text_keys and isinstance(value, str):
+                    text_parts.setdefault(key, []).append(value)
+                elif key == 'content' and isinstance(value, dict):
+                    for content_key, content_value in value.items():
+                        if isinstance(content_value, str):
+                            content_parts.setdefault(content_key, []).append(content_value)
                         else:
-                            logger.error("모든 재시도 실패")
-                            raise
-                            
-                    except requests.exceptions.RequestException as e:
-                        error_msg = f"API 요청 실패 (시도 {attempt}/{self.max_retries}): {str(e)}"
-                        logger.error(error_msg)
-                        print(f"API 요청 실패: {str(e)}")
-                        
-                        if hasattr(e, 'response') and e.response is not None:
-                            logger.error(f"응답 내용: {e.response.text[:500]}")
-                            print(f"응답 내용: {e.response.text}")
-                            
-                            # 오류 로그 저장
-                            with open(os.path.join(logs_dir, f"error_{timestamp}_{attempt}.log"), 'w', encoding='utf-8') as f:
-                                f.write(f"Error: {str(e)}\n")
-                                f.write(f"Response: {e.response.text}\n")
-                        
-                        if attempt < self.max_retries:
-                            retry_time = self.retry_delay * attempt
-                            logger.info(f"{retry_time}초 후 재시도 예정...")
-                            print(f"{retry_time}초 후 재시도 예정...")
-                            time.sleep(retry_time)
+                            merged.setdefault('content', {}).setdefault(content_key, content_value)
+                elif isinstance(value, list):
+                    items = merged.setdefault(key, [])
+                    for item in value:
+                        if isinstance(item, dict):
+                            item = dict(item)
+                            if isinstance(item.get('page'), int):
+                                item['page'] += first_page
+                            if isinstance(item.get('id'), int):
+                                max_id = max(max_id, item['id'])
+                                item['id'] += element_offset
+                        items.append(item)
+                elif key == 'usage' and isinstance(value, dict):
+                    usage = merged.setdefault('usage', {})
+                    for usage_key, usage_value in value.items():
+                        if isinstance(usage_value, (int, float)):
+                            usage[usage_key] = usage.get(usage_key, 0) + usage_value
                         else:
-                            logger.error("모든 재시도 실패")
-                            raise
-                
-                # 파싱 결과 확인
-                parse_result = response.json()
-                logger.info("문서 파싱 성공")
-                print("문서 파싱 성공.")
-                
-                # API 응답 저장 (선택사항)
-                if save_response:
-                    response_file = os.path.join(logs_dir, f"response_{timestamp}.json")
-                    try:
-                        with open(response_file, 'w', encoding='utf-8') as f:
-                            json.dump(parse_result, f, ensure_ascii=False, indent=2)
-                        logger.info(f"API 응답 저장 완료: {response_file}")
-                    except Exception as e:
-                        logger.warning(f"API 응답 저장 실패: {str(e)}")
-                
-                # 응답 내용 로깅
-                logger.info(f"API 응답 내용: {list(parse_result.keys())}")
-                print(f"API 응답 내용: {parse_result.keys()}")
-                
-                # 디버깅: 응답 내용 출력
-                for key, value in parse_result.items():
-                    if isinstance(value, str) and len(value) > 100:
-                        logger.debug(f"  - {key}: {value[:100]}... (길이: {len(value)})")
-                        print(f"  - {key}: {value[:100]}... (길이: {len(value)})")
-                    elif isinstance(value, list):
-                        logger.debug(f"  - {key}: [리스트, 길이: {len(value)}]")
-                        print(f"  - {key}: [리스트, 길이: {len(value)}]")
-                    else:
-                        logger.debug(f"  - {key}: {value}")
-                        print(f"  - {key}: {value}")
-                
-                # 텍스트 추출 (여러 출력 형식 중 선택)
-                text = ""
-                text_source = ""
-                
-                # 응답 구조에 따라 텍스트 추출
-                content = parse_result.get('content', {}) if isinstance(parse_result, dict) else {}
+                            usage.setdefault(usage_key, usage_value)
+                else:
+                    merged.setdefault(key, value)
+            element_offset += max_id + 1
+        
+        for key, parts in text_parts.items():
+            merged[key] = "\n".join(parts)
+        if content_parts:
+            content = merged.setdefault('content', {})
+            for key, parts in content_parts.items():
+                content[key] = "\n".join(parts)
+        merged['shards'] = len(shard_results)
+        return merged
+    
+    def _extract_text(self, parse_result: Dict[str, Any]) -> Tuple[str, str]:
+        """
+        API 응답에서 텍스트를 추출합니다 (여러 출력 형식 중 선택).
+        
+        Returns:
+            (추출된_텍스트, 텍스트_소스) 튜플
+        """
+        text = ""
+        text_source = ""
+        
+        # 응답 구조에 따라 텍스트 추출
+        content = parse_result.get('content', {}) if isinstance(parse_result, dict) else {}
+        
+        # 1. content 내부에 있는 경우
+        if isinstance(content, dict):
+            for key in ['text', 'markdown', 'html']:
+                if key in content and content[key]:
+                    text = content[key]
+                    text_source = key
+                    logger.info(f"content.{key}에서 내용 추출 성공")
+                    print(f"content.{key}에서 내용 추출 성공")
+                    break
+        
+        # 2. content가 없거나 비어있는 경우 루트 레벨에서 직접 검색
+        if not text and isinstance(parse_result, dict):
+            for key in ['text', 'markdown', 'html']:
+                if key in parse_result and parse_result[key]:
+                    text = parse_result[key]
+                    text_source = f"root.{key}"
+                    logger.info(f"root.{key}에서 내용 추출 성공")
+                    print(f"root.{key}에서 내용 추출 성공")
+                    break
+        
+        # 3. 여전히 텍스트가 없으면 전체 응답을 문자열로 변환
+        if not text:
+            text = str(parse_result)
+            text_source = "raw_response"
+            logger.warning("지원되는 텍스트 형식을 찾을 수 없어 전체 응답을 사용합니다.")
+            print("주의: 지원되는 텍스트 형식을 찾을 수 없어 전체 응답을 사용합니다.")
+        
+        # HTML 응답은 한 번의 파싱으로 마크다운으로 변환 (표, 목록, 엔티티 처리)
+        if text_source in ['html', 'root.html', 'content.html']:
+            text = html_to_markdown(text)
+        
+        return text, text_source
+    
+    def _save_figures(
+        self,
+        parse_result: Dict[str, Any],
+        images_dir: str,
+        on_figure_saved: Optional[Callable[[str], None]] = None
+    ) -> Tuple[List[str], int]:
+        """
+        API 응답에 포함된 base64 이미지를 디코딩하여 저장합니다.
+        
+        Returns:
+            (저장된_이미지_경로_리스트, 일반_figures_수) 튜플
+        """
+        image_paths = []
+        content = parse_result.get('content', {}) if isinstance(parse_result, dict) else {}
+        
+        # 1. figures 배열에서 이미지 추출
+        figures = []
+        if 'figures' in parse_result and isinstance(parse_result['figures'], list):
+            figures = parse_result['figures']
+        # content 내부에 figures가 있는 경우
+        elif isinstance(content, dict) and 'figures' in content and isinstance(content['figures'], list):
+            figures = content['figures']
+        
+        # 2. merged_elements에서 category가 'figure'인 요소 찾기
+        merged_figures = []
+        if 'merged_elements' in parse_result and isinstance(parse_result['merged_elements'], list):
+            for elem in parse_result['merged_elements']:
+                if isinstance(elem, dict) and elem.get('category') == 'figure':
+                    merged_figures.append(elem)
+        
+        logger.info(f"일반 figures에서 추출된 이미지 수: {len(figures)}개")
+        logger.info(f"merged_elements에서 추출된 이미지 수: {len(merged_figures)}개")
+        print(f"추출된 이미지 수: {len(figures) + len(merged_figures)}개 (일반: {len(figures)}, merged: {len(merged_figures)})")
+        
+        # 두 리스트 합치기
+        all_figures = figures + merged_figures
+        
+        for i, figure_data in enumerate(all_figures):
+            try:
+                # base64로 인코딩된 이미지 데이터 추출 (다양한 키 이름 지원)
+                image_base64 = ""
                 
-                # 1. content 내부에 있는 경우
-                if isinstance(content, dict):
-                    for key in ['text', 'markdown', 'html']:
-                        if key in content and content[key]:
-                            text = content[key]
-                            text_source = key
-                            logger.info(f"content.{key}에서 내용 추출 성공")
-                            print(f"content.{key}에서 내용 추출 성공")
+                # 1. content 내부에 이미지 데이터가 있는 경우
+                if 'content' in figure_data and isinstance(figure_data['content'], dict):
+                    for key in ['base64_data', 'data', 'image']:
+                        if key in figure_data['content'] and figure_data['content'][key]:
+                            image_base64 = figure_data['content'][key]
                             break
                 
-                # 2. content가 없거나 비어있는 경우 루트 레벨에서 직접 검색
-                if not text and isinstance(parse_result, dict):
-                    for key in ['text', 'markdown', 'html']:
-                        if key in parse_result and parse_result[key]:
-                            text = parse_result[key]
-                            text_source = f"root.{key}"
-                            logger.info(f"root.{key}에서 내용 추출 성공")
-                            print(f"root.{key}에서 내용 추출 성공")
+                # 2. 직접 키에 이미지 데이터가 있는 경우 (스트리밍 파싱 시 디스크에 디코딩된 SpilledBlob 포함)
+                if not image_base64:
+                    for key in ['base64_data', 'data', 'image', 'content']:
+                        if key in figure_data and figure_data[key] and isinstance(figure_data[key], (str, SpilledBlob)):
+                            image_base64 = figure_data[key]
                             break
                 
-                # 3. 여전히 텍스트가 없으면 전체 응답을 문자열로 변환
-                if not text:
-                    text = str(parse_result)
-                    text_source = "raw_response"
-                    logger.warning("지원되는 텍스트 형식을 찾을 수 없어 전체 응답을 사용합니다.")
-                    print("주의: 지원되는 텍스트 형식을 찾을 수 없어 전체 응답을 사용합니다.")
-                
-                # HTML 태그가 있는 경우 간단히 정리
-                if text_source in ['html', 'root.html', 'content.html']:
-                    text = text.replace("<br>", "\n")
-                    text = text.replace("<p>", "").replace("</p>", "\n")
-                    text = text.replace("<h1>", "\n# ").replace("</h1>", "\n")
-                    text = text.replace("<h2>", "\n## ").replace("</h2>", "\n")
-                    text = text.replace("<h3>", "\n### ").replace("</h3>", "\n")
-                    text = text.replace("<table>", "\n표:\n").replace("</table>", "\n")
-                    text = text.replace("<tr>", "").replace("</tr>", "\n")
-                    text = text.replace("<td>", "").replace("</td>", "\t")
-                    text = text.replace("<th>", "").replace("</th>", "\t")
-                
-                # 추출된 요소 확인
-                elements_count = 0
-                if "merged_elements" in parse_result:
-                    elements_count = len(parse_result.get("merged_elements", []))
-                    logger.info(f"추출된 요소 수: {elements_count}개")
-                    print(f"추출된 요소 수: {elements_count}개")
-                
-                logger.info(f"추출된 텍스트 길이: {len(text)} 자 (소스: {text_source})")
-                print(f"추출된 텍스트 길이: {len(text)} 자")
-                
-                # 텍스트 저장 (디버깅용)
-                if text and save_response:
-                    text_file = os.path.join(logs_dir, f"extracted_text_{timestamp}.txt")
-                    try:
-                        with open(text_file, 'w', encoding='utf-8') as f:
-                            f.write(text)
-                        logger.info(f"추출된 텍스트 저장 완료: {text_file}")
-                    except Exception as e:
-                        logger.warning(f"텍스트 저장 실패: {str(e)}")
-                
-                # 이미지 추출 및 저장
-                image_paths = []
+                if not image_base64:
+                    logger.warning(f"이미지 {i+1}: base64 데이터를 찾을 수 없습니다. 사용 가능한 키: {list(figure_data.keys())}")
+                    if 'content' in figure_data and isinstance(figure_data['content'], dict):
+                        logger.warning(f"content 내부 키: {list(figure_data['content'].keys())}")
+                    continue
+                    
+                logger.info(f"이미지 {i+1} 처리 중... (출처: {'merged_elements' if i >= len(figures) else 'figures'})")
+                print(f"이미지 {i+1} 처리 중... (출처: {'merged_elements' if i >= len(figures) else 'figures'})")
                 
-                # 1. figures 배열에서 이미지 추출
-                figures = []
-                if 'figures' in parse_result and isinstance(parse_result['figures'], list):
-                    figures = parse_result['figures']
-                # content 내부에 figures가 있는 경우
-                elif isinstance(content, dict) and 'figures' in content and isinstance(content['figures'], list):
-                    figures = content['figures']
+                # base64 디코딩 (이미 base64 디코딩된 경우를 대비해 예외 처리)
+                image_data = None
+                try:
+                    if isinstance(image_base64, SpilledBlob):
+                        # 스트리밍 파싱 중 이미 파일로 디코딩됨 (메모리에 올리지 않음)
+                        pass
+                    elif isinstance(image_base64, str):
+                        # base64 문자열에서 data:image/...;base64, 접두사 제거 (있는 경우)
+                        if ';base64,' in image_base64:
+                            image_base64 = image_base64.split(';base64,', 1)[1]
+                        image_data = base64.b64decode(image_base64)
+                    else:
+                        # 이미 바이너리 데이터인 경우
+                        image_data = image_base64
+                except Exception as e:
+                    logger.error(f"이미지 {i+1} base64 디코딩 실패: {str(e)}")
+                    continue
                 
-                # 2. merged_elements에서 category가 'figure'인 요소 찾기
-                merged_figures = []
-                if 'merged_elements' in parse_result and isinstance(parse_result['merged_elements'], list):
-                    for elem in parse_result['merged_elements']:
-                        if isinstance(elem, dict) and elem.get('category') == 'figure':
-                            merged_figures.append(elem)
+                # 이미지 형식 확인
+                image_format = None
                 
-                logger.info(f"일반 figures에서 추출된 이미지 수: {len(figures)}개")
-                logger.info(f"merged_elements에서 추출된 이미지 수: {len(merged_figures)}개")
-                print(f"추출된 이미지 수: {len(figures) + len(merged_figures)}개 (일반: {len(figures)}, merged: {len(merged_figures)})")
+                # 1. figure_data에서 직접 format 정보 가져오기
+                if 'format' in figure_data and figure_data['format']:
+                    image_format = figure_data['format'].lower()
+                # 2. content 내부에 format 정보가 있는 경우
+                elif 'content' in figure_data and isinstance(figure_data['content'], dict) and 'format' in figure_data['content']:
+                    image_format = figure_data['content']['format'].lower()
                 
-                # 두 리스트 합치기
-                all_figures = figures + merged_figures
+                # 3. MIME 타입에서 추출 (data:image/png;base64,... 형태인 경우)
+                if not image_format and isinstance(image_base64, SpilledBlob) and image_base64.mime:
+                    mime_type = image_base64.mime.split('/')[-1]
+                    if mime_type in ['jpeg', 'jpg', 'png', 'gif', 'bmp', 'tiff', 'webp']:
+                        image_format = mime_type
+                if not image_format and 'content' in figure_data and isinstance(figure_data['content'], str):
+                    if figure_data['content'].startswith('data:image/'):
+                        mime_type = figure_data['content'].split(';')[0].split('/')[-1]
+                        if mime_type in ['jpeg', 'jpg', 'png', 'gif', 'bmp', 'tiff', 'webp']:
+                            image_format = mime_type
                 
-                for i, figure_data in enumerate(all_figures):
-                    try:
-                        # base64로 인코딩된 이미지 데이터 추출 (다양한 키 이름 지원)
-                        image_base64 = ""
-                        
-                        # 1. content 내부에 이미지 데이터가 있는 경우
-                        if 'content' in figure_data and isinstance(figure_data['content'], dict):
-                            for key in ['base64_data', 'data', 'image']:
-                                if key in figure_data['content'] and figure_data['content'][key]:
-                                    image_base64 = figure_data['content'][key]
-                                    break
-                        
-                        # 2. 직접 키에 이미지 데이터가 있는 경우
-                        if not image_base64:
-                            for key in ['base64_data', 'data', 'image', 'content']:
-                                if key in figure_data and figure_data[key] and isinstance(figure_data[key], str):
-                                    image_base64 = figure_data[key]
-                                    break
-                        
-                        if not image_base64:
-                            logger.warning(f"이미지 {i+1}: base64 데이터를 찾을 수 없습니다. 사용 가능한 키: {list(figure_data.keys())}")
-                            if 'content' in figure_data and isinstance(figure_data['content'], dict):
-                                logger.warning(f"content 내부 키: {list(figure_data['content'].keys())}")
-                            continue
-                            
-                        logger.info(f"이미지 {i+1} 처리 중... (출처: {'merged_elements' if i >= len(figures) else 'figures'})")
-                        print(f"이미지 {i+1} 처리 중... (출처: {'merged_elements' if i >= len(figures) else 'figures'})")
-                        
-                        # base64 디코딩 (이미 base64 디코딩된 경우를 대비해 예외 처리)
-                        try:
-                            if isinstance(image_base64, str):
-                                # base64 문자열에서 data:image/...;base64, 접두사 제거 (있는 경우)
-                                if ';base64,' in image_base64:
-                                    image_base64 = image_base64.split(';base64,', 1)[1]
-                                image_data = base64.b64decode(image_base64)
-                            else:
-                                # 이미 바이너리 데이터인 경우
-                                image_data = image_base64
-                        except Exception as e:
-                            logger.error(f"이미지 {i+1} base64 디코딩 실패: {str(e)}")
-                            continue
-                        
-                        # 이미지 형식 확인
-                        image_format = None
-                        
-                        # 1. figure_data에서 직접 format 정보 가져오기
-                        if 'format' in figure_data and figure_data['format']:
-                            image_format = figure_data['format'].lower()
-                        # 2. content 내부에 format 정보가 있는 경우
-                        elif 'content' in figure_data and isinstance(figure_data['content'], dict) and 'format' in figure_data['content']:
-                            image_format = figure_data['content']['format'].lower()
-                        
-                        # 3. MIME 타입에서 추출 (data:image/png;base64,... 형태인 경우)
-                        if not image_format and 'content' in figure_data and isinstance(figure_data['content'], str):
-                            if figure_data['content'].startswith('data:image/'):
-                                mime_type = figure_data['content'].split(';')[0].split('/')[-1]
-                                if mime_type in ['jpeg', 'jpg', 'png', 'gif', 'bmp', 'tiff', 'webp']:
-                                    image_format = mime_type
-                        
-                        # 4. 기본값 설정
-                        if not image_format or image_format == 'unknown':
-                            image_format = 'jpg'
-                        
-                        # 5. 올바른 확장자로 변환
-                        format_mapping = {
-                            'jpeg': 'jpg',  # jpeg -> jpg로 통일
-                            'tiff': 'tif',   # tiff -> tif로 통일
-                        }
-                        image_ext = format_mapping.get(image_format, image_format)
-                        
-                        # 6. 이미지 저장
-                        image_filename = f"image_{i+1}_{int(time.time())}.{image_ext}"  # 타임스탬프 추가로 고유성 보장
-                        image_path = os.path.join(images_dir, image_filename)
-                        
-                        try:
-                            with open(image_path, "wb") as img_file:
-                                img_file.write(image_data)
-                            
-                            # 이미지 크기 확인
-                            image_size = os.path.getsize(image_path) / 1024  # KB 단위
-                            
-                            # 이미지가 유효한지 확인 (0바이트 파일 방지)
-                            if os.path.getsize(image_path) == 0:
-                                logger.error(f"이미지 {i+1} 저장 실패: 0바이트 파일이 생성되었습니다.")
-                                os.remove(image_path)  # 잘못된 파일 삭제
-                                continue
-                            
-                            # 이미지 메타데이터 로깅
-                            logger.info(f"이미지 {i+1} 저장 완료: {image_path} ({image_size:.1f} KB, 형식: {image_format})")
-                            print(f"이미지 {i+1} 저장 완료: {image_path} ({image_size:.1f} KB)")
-                            
-                            # 이미지 경로 저장
-                            image_paths.append(image_path)
-                            
-                        except Exception as e:
-                            logger.error(f"이미지 {i+1} 저장 실패: {str(e)}")
-                            # 저장에 실패한 경우, 이미지 데이터의 처음 100바이트를 로깅하여 디버깅에 도움
-                            logger.debug(f"이미지 데이터 샘플: {image_data[:100] if image_data else '없음'}")
-                    except Exception as e:
-                        logger.error(f"이미지 {i+1} 처리 중 오류 발생: {str(e)}")
+                # 4. 기본값 설정
+                if not image_format or image_format == 'unknown':
+                    image_format = 'jpg'
                 
-                # 처리 결과 요약
-                logger.info(f"업스테이지 API 처리 결과: 텍스트 {len(text)} 자, 이미지 {len(image_paths)}/{len(figures)} 개 추출")
+                # 5. 올바른 확장자로 변환
+                format_mapping = {
+                    'jpeg': 'jpg',  # jpeg -> jpg로 통일
+                    'tiff': 'tif',   # tiff -> tif로 통일
+                }
+                image_ext = format_mapping.get(image_format, image_format)
                 
-                return text, image_paths
+                # 6. 이미지 저장
+                image_filename = f"image_{i+1}_{int(time.time())}.{image_ext}"  # 타임스탬프 추가로 고유성 보장
+                image_path = os.path.join(images_dir, image_filename)
                 
-        except Exception as e:
-            error_msg = f"업스테이지 Document Parser API 요청 중 오류 발생: {str(e)}"
-            logger.error(error_msg)
-            print(error_msg)
-            
-            # 오류 로그 저장
-            try:
-                error_log_file = os.path.join(logs_dir, f"error_{timestamp}.log")
-                with open(error_log_file, 'w', encoding='utf-8') as f:
-                    f.write(f"Error: {str(e)}\n")
-                    f.write(f"Timestamp: {datetime.now().isoformat()}\n")
-                    f.write(f"PDF file: {pdf_path}\n")
-                logger.info(f"오류 로그 저장 완료: {error_log_file}")
-            except Exception as log_error:
-                logger.warning(f"오류 로그 저장 실패: {str(log_error)}")
-            
-            return "", []
+                try:
+                    if isinstance(image_base64, SpilledBlob):
+                        shutil.move(image_base64.path, image_path)
+                    else:
+                        with open(image_path, "wb") as img_file:
+                            img_file.write(image_data)
+                    
+                    # 이미지 크기 확인
+                    image_size = os.path.getsize(image_path) / 1024  # KB 단위
+                    
+                    # 이미지가 유효한지 확인 (0바이트 파일 방지)
+                    if os.path.getsize(image_path) == 0:
+                        logger.error(f"이미지 {i+1} 저장 실패: 0바이트 파일이 생성되었습니다.")
+                        os.remove(image_path)  # 잘못된 파일 삭제
+                        continue
+                    
+                    # 이미지 메타데이터 로깅
+                    logger.info(f"이미지 {i+1} 저장 완료: {image_path} ({image_size:.1f} KB, 형식: {image_format})")
+                    print(f"이미지 {i+1} 저장 완료: {image_path} ({image_size:.1f} KB)")
+                    
+                    # 이미지 경로 저장
+                    image_paths.append(image_path)
+                    if on_figure_saved:
+                        on_figure_saved(image_path)
+                    
+                except Exception as e:
+                    logger.error(f"이미지 {i+1} 저장 실패: {str(e)}")
+                    # 저장에 실패한 경우, 이미지 데이터의 처음 100바이트를 로깅하여 디버깅에 도움
+                    logger.debug(f"이미지 데이터 샘플: {image_data[:100] if image_data else '없음'}")
+            except Exception as e:
+                logger.error(f"이미지 {i+1} 처리 중 오류 발생: {str(e)}")
+        
+        return image_paths, len(figures)
 
 
 # 사용 예시
@@ -546,16 +982,26 @@ class DocumentProcessor:
         upstage_api_key: Optional[str] = None,
         image_server_url: str = "http://localhost:5050",
         output_dir: str = "output",
-        log_level: int = logging.INFO
+        log_level: int = logging.INFO,
+        image_filter: Optional[ImageFilter] = None,
+        ocr_preprocess: Optional[str] = None,
+        ocr_min_conf: Optional[float] = OCR_MIN_CONF,
+        ocr_layout: bool = False,
+        ocr_timeout: float = OCR_TIMEOUT
     ):
         """
         문서 처리기 초기화
         
         Args:
             upstage_api_key: 업스테이지 API 키 (None인 경우 환경변수에서 로드)
-            image_server_url: 이미지 분석 서버 URL
+            image_server_url: 이미지 분석 서버 URL (여러 서버는 쉼표로 구분, 처리 중인 요청이 가장 적은 서버로 분산)
             output_dir: 출력 디렉토리
             log_level: 로깅 레벨
+            image_filter: OCR 전 이미지 필터 (None인 경우 기본 규칙 사용)
+            ocr_preprocess: OCR 서버 전처리 단계 (none, auto 또는 scale,deskew,binarize 조합, None인 경우 서버 기본값)
+            ocr_min_conf: OCR 단어 신뢰도 하한 (0~100, 이보다 낮은 단어는 제외, None이면 신뢰도를 받지 않음)
+            ocr_layout: OCR 결과에 단어 상자, 줄 묶음, 단어별 신뢰도(layout)를 포함할지 여부
+            ocr_timeout: OCR 요청 응답 대기 타임아웃(초, 기본값: 환경변수 OCR_TIMEOUT 또는 120)
         """
         # 로깅 설정
         self.logger = logging.getLogger('document_processor')
@@ -566,7 +1012,14 @@ class DocumentProcessor:
         self.output_dir.mkdir(exist_ok=True, parents=True)
         
         # 이미지 분석기 초기화
-        self.image_analyzer = ImageAnalyzer(server_url=image_server_url)
+        self.image_analyzer = ImageAnalyzer(
+            server_url=image_server_url,
+            preprocess=ocr_preprocess,
+            min_conf=ocr_min_conf,
+            layout=ocr_layout,
+            timeout=ocr_timeout
+        )
+        self.image_filter = image_filter or ImageFilter()
         
         # 문서 파서 초기화
         self.document_parser = UpstageDocumentParser(api_key=upstage_api_key)
@@ -608,10 +1061,11 @@ class DocumentProcessor:
             
             # 1. PDF에서 텍스트와 이미지 추출
             self.logger.info("PDF에서 텍스트와 이미지 추출 중...")
-            text, image_paths = self.document_parser.parse_document(
+            parsed = self.document_parser.parse(
                 pdf_path=pdf_path,
                 output_dir=str(output_subdir)
             )
+            text, image_paths = parsed.text, parsed.image_paths
             
             result = {
                 'pdf_path': pdf_path,
@@ -621,30 +1075,51 @@ class DocumentProcessor:
                 'metadata': {
                     'extraction_time': time.time() - start_time,
                     'image_count': len(image_paths)
-                }
+                },
+                'elements_path': parsed.elements_path
             }
             
             # 2. 이미지 분석 (필요한 경우)
             if analyze_images and image_paths:
                 self.logger.info(f"이미지 {len(image_paths)}개 분석 시작...")
-                image_analysis = {}
                 
-                for i, img_path in enumerate(image_paths):
+                # 아이콘, 구분선, 빈 이미지 등은 OCR하지 않고 이유만 기록
+                ocr_paths, skipped = self.image_filter.split(image_paths)
+                results_by_path = {
+                    img_path: {
+                        'skipped': reason,
+                        'success': False,
+                        'text': '',
+                        'confidence': 0.0
+                    }
+                    for img_path, reason in skipped.items()
+                }
+                result['metadata']['skipped_images'] = len(skipped)
+                
+                # 반복되는 이미지(로고, 배너 등)는 대표 이미지 하나만 분석
+                groups = dedupe_images(ocr_paths)
+                
+                # 대표 이미지는 크기 기준 배치로 묶어 요청 (이미지마다 HTTP 요청을 보내지 않음)
+                self.logger.info(f"대표 이미지 {len(groups)}개 배치 분석 중...")
+                try:
+                    analyzed = self.image_analyzer.analyze_batched(list(groups))
+                except Exception as e:
+                    self.logger.error(f"이미지 분석 중 오류 발생: {str(e)}")
+                    analyzed = {}
+                
+                for img_path, members in groups.items():
                     img_name = Path(img_path).name
-                    self.logger.info(f"이미지 {i+1}/{len(image_paths)} 분석 중: {img_name}")
-                    
-                    try:
-                        analysis_result = self.image_analyzer.analyze_image(img_path)
-                        image_analysis[img_name] = analysis_result
-                    except Exception as e:
-                        self.logger.error(f"이미지 분석 중 오류 발생: {str(e)}")
-                        image_analysis[img_name] = {
-                            'error': str(e),
-                            'success': False,
-                            'text': '',
-                            'confidence': 0.0
-                        }
+                    analysis_result = analyzed.get(img_path) or {
+                        'error': '분석 결과 없음',
+                        'success': False,
+                        'text': '',
+                        'confidence': 0.0
+                    }
+                    for member in members:
+                        results_by_path[member] = analysis_result if member == img_path else dict(analysis_result, duplicate_of=img_name)
                 
+                # 이미지 순서대로 결과 정리
+                image_analysis = {Path(img_path).name: results_by_path[img_path] for img_path in image_paths}
                 result['analysis'] = image_analysis
                 
                 # 이미지 분석 결과를 텍스트에 통합
@@ -677,7 +1152,9 @@ class DocumentProcessor:
         for img_name, result in analysis_results.items():
             markdown.append(f"### 이미지: {img_name}\n")
             
-            if 'error' in result and result.get('success', True) == False:
+            if 'skipped' in result:
+                markdown.append(f"**건너뜀**: {result['skipped']}\n")
+            elif 'error' in result and result.get('success', True) == False:
                 markdown.append(f"**오류**: {result['error']}\n")
             else:
                 extracted_text = result.get('text', '')
@@ -686,10 +1163,12 @@ class DocumentProcessor:
                 else:
                     markdown.append("**인식된 텍스트**: (없음)\n")
                     
-                if 'confidence' in result:
+                # 서버가 단어 단위 신뢰도를 보내지 않은 경우(0.0)는 표시하지 않음
+                if result.get('confidence'):
                     confidence = result['confidence']
                     confidence_str = f"{confidence:.2f}" if isinstance(confidence, float) else str(confidence)
-                    markdown.append(f"**신뢰도**: {confidence_str}\n")
+                    dropped = f" (낮은 신뢰도 단어 {result['dropped_words']}개 제외)" if result.get('dropped_words') else ""
+                    markdown.append(f"**신뢰도**: {confidence_str}/100{dropped}\n")
             
             markdown.append("---\n")
         
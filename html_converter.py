@@ -0,0 +1,305 @@
+import re
+from html.parser import HTMLParser
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+# 블록 단위로 앞뒤 줄바꿈을 넣을 태그
+_BLOCK_TAGS = {
+    'p', 'div', 'section', 'article', 'header', 'footer', 'main', 'aside', 'nav',
+    'blockquote', 'figure', 'figcaption', 'caption', 'address', 'dl', 'dt', 'dd'
+}
+_HEADING_TAGS = {'h1': 1, 'h2': 2, 'h3': 3, 'h4': 4, 'h5': 5, 'h6': 6}
+_SKIP_TAGS = {'script', 'style', 'head', 'title', 'noscript'}
+_CELL_TAGS = {'td', 'th'}
+_ROW_GROUP_TAGS = {'thead', 'tbody', 'tfoot'}
+
+_WHITESPACE = re.compile(r'\s+')
+_LEADING_DIGITS = re.compile(r'\s*(\d+)')
+
+# 한 번에 파서에 넘길 글자 수
+DEFAULT_CHUNK_SIZE = 64 * 1024
+# colspan/rowspan 최대값 (rowspan="0"은 행 그룹 끝까지로 보고 이 값을 사용)
+_MAX_SPAN = 1000
+
+
+def _span(value: Optional[str], zero: int = 1) -> int:
+    """
+    colspan/rowspan 속성 값을 정수로 변환합니다.
+
+    브라우저처럼 앞쪽 숫자만 읽고("2px" -> 2), 숫자가 없으면 1, 0이면 zero를 사용합니다.
+    """
+    match = _LEADING_DIGITS.match(value or "")
+    if not match:
+        return 1
+    span = int(match.group(1))
+    return min(span, _MAX_SPAN) if span else zero
+
+
+class _Table:
+    """변환 중인 표 하나의 상태 (행/셀 버퍼와 rowspan으로 채워야 할 열)"""
+
+    __slots__ = ('rows', 'row', 'cell', 'colspan', 'rowspans', 'active_spans')
+
+    def __init__(self):
+        self.rows: List[List[str]] = []
+        self.row: Optional[List[str]] = None
+        self.cell: Optional[List[str]] = None
+        self.colspan = 1
+        self.rowspans: Dict[int, int] = {}  # 열 번호 -> 아래로 더 채워야 할 행 수
+        self.active_spans: set = set()  # 현재 행에서 위 셀이 차지하는 열
+
+    def start_row(self) -> None:
+        self.end_row()
+        self.row = []
+        self.active_spans = {col for col, remaining in self.rowspans.items() if remaining > 0}
+        for col in self.active_spans:
+            self.rowspans[col] -= 1
+
+    def _fill_spanned(self) -> None:
+        while len(self.row) in self.active_spans:
+            self.row.append("")
+
+    def start_cell(self, colspan: int, rowspan: int) -> None:
+        self.end_cell()
+        if self.row is None:
+            self.start_row()
+        self._fill_spanned()
+        start = len(self.row)
+        if rowspan > 1:
+            for col in range(start, start + colspan):
+                self.rowspans[col] = max(self.rowspans.get(col, 0), rowspan - 1)
+        self.cell = []
+        self.colspan = colspan
+
+    def end_cell(self) -> None:
+        if self.cell is None:
+            return
+        text = _WHITESPACE.sub(' ', "".join(self.cell)).strip()
+        self.row.append(text.replace('|', '\\|'))
+        self.row.extend([""] * (self.colspan - 1))
+        self.cell = None
+
+    def end_row(self) -> None:
+        self.end_cell()
+        if self.row is None:
+            return
+        self._fill_spanned()
+        if self.row:
+            self.rows.append(self.row)
+        self.row = None
+
+    def end_group(self) -> None:
+        """thead/tbody/tfoot 경계에서 호출 (rowspan은 행 그룹을 넘어가지 않음)"""
+        self.end_row()
+        self.rowspans.clear()
+
+    def render(self) -> str:
+        """마크다운 표 문자열로 변환합니다 (첫 행을 머리글로 사용)."""
+        self.end_row()
+        if not self.rows:
+            return ""
+        width = max(len(row) for row in self.rows)
+        lines = []
+        for index, row in enumerate(self.rows):
+            cells = row + [""] * (width - len(row))
+            lines.append("| " + " | ".join(cells) + " |")
+            if index == 0:
+                lines.append("|" + "|".join([" --- "] * width) + "|")
+        return "\n".join(lines)
+
+    def render_inline(self) -> str:
+        """표 안의 표처럼 셀 하나에 넣어야 할 때 사용하는 한 줄 표현"""
+        self.end_row()
+        return " / ".join(" ; ".join(cell for cell in row if cell) for row in self.rows)
+
+
+class _MarkdownConverter(HTMLParser):
+    """HTML을 한 번 훑으면서 마크다운 조각을 출력 리스트에 바로 추가하는 파서"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.out: List[str] = []
+        self._newlines = 2  # 출력 끝에 이어진 줄바꿈 수 (문서 시작에서는 빈 줄을 넣지 않음)
+        self._skip = 0
+        self._pre = 0
+        self._lists: List[List] = []  # [순서 목록 여부, 현재 번호]
+        self._tables: List[_Table] = []
+
+    # 출력 도우미
+    def _write(self, text: str) -> None:
+        if not text:
+            return
+        if self._tables and self._tables[-1].cell is not None:
+            self._tables[-1].cell.append(text)
+            return
+        if self._tables:
+            # 셀 밖(표 태그 사이)의 텍스트는 버림
+            return
+        self.out.append(text)
+        stripped = text.rstrip('\n')
+        if stripped:
+            self._newlines = len(text) - len(stripped)
+        else:
+            self._newlines += len(text)
+
+    def _break(self, count: int) -> None:
+        """출력 끝의 줄바꿈이 count개가 되도록 맞춥니다 (표 셀 안에서는 공백 하나)."""
+        if self._tables:
+            self._write(" ")
+            return
+        if self._newlines < count:
+            self._write("\n" * (count - self._newlines))
+
+    def _list_indent(self) -> str:
+        return "  " * max(0, len(self._lists) - 1)
+
+    # HTMLParser 콜백
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        if tag in _SKIP_TAGS:
+            self._skip += 1
+            return
+        if self._skip:
+            return
+
+        if tag in _HEADING_TAGS:
+            self._break(2)
+            if not self._tables:
+                self._write("#" * _HEADING_TAGS[tag] + " ")
+        elif tag in _BLOCK_TAGS:
+            self._break(2)
+        elif tag == 'br':
+            if self._tables:
+                self._write(" ")
+            else:
+                self._write("\n")
+        elif tag == 'hr':
+            self._break(2)
+            self._write("---")
+            self._break(2)
+        elif tag in ('ul', 'ol'):
+            self._break(1 if self._lists else 2)
+            start = _span(dict(attrs).get('start')) if tag == 'ol' else 1
+            self._lists.append([tag == 'ol', start - 1])
+        elif tag == 'li':
+            self._break(1)
+            if self._lists:
+                current = self._lists[-1]
+                current[1] += 1
+                marker = f"{current[1]}. " if current[0] else "- "
+            else:
+                marker = "- "
+            self._write(self._list_indent() + marker)
+        elif tag == 'table':
+            if not self._tables:
+                self._break(2)
+            self._tables.append(_Table())
+        elif tag == 'tr':
+            if self._tables:
+                self._tables[-1].start_row()
+        elif tag in _CELL_TAGS:
+            if self._tables:
+                attr_map = dict(attrs)
+                self._tables[-1].start_cell(_span(attr_map.get('colspan')), _span(attr_map.get('rowspan'), _MAX_SPAN))
+        elif tag in _ROW_GROUP_TAGS:
+            if self._tables:
+                self._tables[-1].end_group()
+        elif tag == 'pre':
+            self._break(2)
+            self._write("```\n")
+            self._pre += 1
+        elif tag == 'img':
+            # 업스테이지 응답은 차트/그림 설명을 alt에 담으므로 텍스트로 남김
+            alt = (dict(attrs).get('alt') or "").strip()
+            if alt:
+                self._break(1)
+                self._write(_WHITESPACE.sub(' ', alt))
+                self._break(1)
+
+    def handle_startendtag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        # <br/>, <img/> 등 자체 종료 태그는 여는 태그만 처리
+        self.handle_starttag(tag, attrs)
+        if tag in _SKIP_TAGS:
+            self._skip -= 1
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in _SKIP_TAGS:
+            self._skip = max(0, self._skip - 1)
+            return
+        if self._skip:
+            return
+
+        if tag in _HEADING_TAGS or tag in _BLOCK_TAGS:
+            self._break(2)
+        elif tag in ('ul', 'ol'):
+            if self._lists:
+                self._lists.pop()
+            self._break(1 if self._lists else 2)
+        elif tag == 'li':
+            self._break(1)
+        elif tag == 'table':
+            if not self._tables:
+                return
+            table = self._tables.pop()
+            if self._tables:
+                self._write(table.render_inline())
+            else:
+                self._write(table.render())
+                self._break(2)
+        elif tag == 'tr':
+            if self._tables:
+                self._tables[-1].end_row()
+        elif tag in _ROW_GROUP_TAGS:
+            if self._tables:
+                self._tables[-1].end_group()
+        elif tag in _CELL_TAGS:
+            if self._tables:
+                self._tables[-1].end_cell()
+        elif tag == 'pre':
+            self._pre = max(0, self._pre - 1)
+            self._break(1)
+            self._write("```")
+            self._break(2)
+
+    def handle_data(self, data: str) -> None:
+        if self._skip or not data:
+            return
+        if self._pre:
+            self._write(data)
+            return
+        text = _WHITESPACE.sub(' ', data)
+        if self._newlines and not self._tables:
+            # 줄 시작의 공백은 버림
+            text = text.lstrip()
+        self._write(text)
+
+    def result(self) -> str:
+        self.close()
+        while self._tables:
+            self.handle_endtag('table')
+        text = "".join(self.out)
+        # 블록 경계 앞에 남은 공백 정리 (줄 단위로 한 번만 처리)
+        return "\n".join(line.rstrip() for line in text.split("\n")).strip()
+
+
+def html_to_markdown(source: Union[str, Iterable[str]], chunk_size: int = DEFAULT_CHUNK_SIZE) -> str:
+    """
+    HTML을 마크다운 텍스트로 변환합니다.
+
+    html.parser로 문서를 한 번만 훑으며 제목, 문단, 중첩 목록, 표(colspan/rowspan 포함)를
+    마크다운으로 옮기고, 엔티티(&amp;, &#8361; 등)는 문자로 바꿉니다. 알 수 없는 태그와 속성은 버리고
+    안의 텍스트만 남깁니다. 입력은 chunk_size 단위로 파서에 넘기므로 큰 문서도 추가 복사 없이 처리됩니다.
+
+    Args:
+        source: HTML 문자열 또는 HTML 조각을 차례로 내놓는 이터러블 (파일 객체 등)
+        chunk_size: 문자열 입력을 파서에 넘길 단위(글자 수)
+
+    Returns:
+        마크다운 텍스트
+    """
+    converter = _MarkdownConverter()
+    if isinstance(source, str):
+        for start in range(0, len(source), chunk_size):
+            converter.feed(source[start:start + chunk_size])
+    else:
+        for chunk in source:
+            converter.feed(chunk)
+    return converter.result()
@@ -0,0 +1,117 @@
+import os
+import logging
+import threading
+from typing import Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger('http_client')
+
+# 연결 풀 기본 설정 (환경 변수로 조정 가능)
+DEFAULT_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "10"))  # 캐시할 호스트별 풀 수
+DEFAULT_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "16"))  # 호스트당 최대 연결 수
+DEFAULT_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "10"))  # 연결 타임아웃(초)
+DEFAULT_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "60"))  # 응답 대기 타임아웃(초)
+
+_sessions: Dict[str, requests.Session] = {}
+_session_options: Dict[str, Dict[str, int]] = {}
+_lock = threading.Lock()
+
+
+def build_session(
+    pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+    pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+    pool_block: bool = True
+) -> requests.Session:
+    """
+    keep-alive 연결 풀을 사용하는 Session을 생성합니다.
+
+    Args:
+        pool_connections: 캐시할 호스트별 연결 풀 수
+        pool_maxsize: 호스트당 최대 동시 연결 수
+        pool_block: 풀이 가득 찼을 때 새 연결을 만들지 않고 대기할지 여부
+
+    Returns:
+        설정된 requests.Session
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        pool_block=pool_block
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({"Connection": "keep-alive"})
+    return session
+
+
+def configure_session(name: str, pool_connections: Optional[int] = None, pool_maxsize: Optional[int] = None) -> None:
+    """
+    이름별 공유 Session의 풀 설정을 지정합니다. 이미 생성된 Session은 닫고 새 설정으로 다시 만듭니다.
+
+    Args:
+        name: Session 이름 (예: 'upstage', 'ocr', 'ollama')
+        pool_connections: 캐시할 호스트별 연결 풀 수
+        pool_maxsize: 호스트당 최대 동시 연결 수
+    """
+    with _lock:
+        options = {}
+        if pool_connections is not None:
+            options['pool_connections'] = pool_connections
+        if pool_maxsize is not None:
+            options['pool_maxsize'] = pool_maxsize
+        _session_options[name] = options
+        session = _sessions.pop(name, None)
+    if session is not None:
+        session.close()
+
+
+def get_session(name: str = "default") -> requests.Session:
+    """
+    이름별로 프로세스 전체에서 공유되는 Session을 반환합니다.
+
+    같은 이름을 쓰는 클라이언트는 연결 풀을 공유하므로 요청마다 TCP/TLS 핸드셰이크를 반복하지 않습니다.
+    Session의 연결 풀은 스레드 간에 공유해도 안전합니다.
+
+    Args:
+        name: Session 이름 (예: 'upstage', 'ocr', 'ollama')
+
+    Returns:
+        공유 requests.Session
+    """
+    session = _sessions.get(name)
+    if session is not None:
+        return session
+    with _lock:
+        session = _sessions.get(name)
+        if session is None:
+            options = _session_options.get(name, {})
+            session = build_session(**options)
+            _sessions[name] = session
+            logger.info(f"HTTP 세션 생성: {name} (호스트당 최대 연결: {options.get('pool_maxsize', DEFAULT_POOL_MAXSIZE)})")
+        return session
+
+
+def request_timeout(read: Optional[float] = None, connect: Optional[float] = None) -> Tuple[float, float]:
+    """
+    (연결, 응답 대기) 타임아웃 튜플을 반환합니다.
+
+    Args:
+        read: 응답 대기 타임아웃(초), None이면 기본값
+        connect: 연결 타임아웃(초), None이면 기본값
+    """
+    return (
+        connect if connect is not None else DEFAULT_CONNECT_TIMEOUT,
+        read if read is not None else DEFAULT_READ_TIMEOUT
+    )
+
+
+def close_all_sessions() -> None:
+    """모든 공유 Session을 닫습니다."""
+    with _lock:
+        sessions = list(_sessions.values())
+        _sessions.clear()
+    for session in sessions:
+        session.close()
@@ -1,7 +1,17 @@
 import os
+import json
+import time
 import requests
 import logging
-from typing import List, Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Dict, Any, Optional, Union
+
+# 내부 모듈 임포트
+from http_client import get_session, request_timeout
+from image_dedup import dedupe_images
+from image_filter import ImageFilter
+from ocr_endpoints import EndpointAttempt, OCREndpoints
 
 # 로깅 설정
 logging.basicConfig(
@@ -11,37 +21,182 @@ logging.basicConfig(
 )
 logger = logging.getLogger('image_analyzer')
 
+# 배치 OCR 요청 설정 (환경 변수로 조정 가능)
+OCR_BATCH_MAX_BYTES = int(os.getenv("OCR_BATCH_MAX_BYTES", str(8 * 1024 * 1024)))  # 배치 요청 하나에 담을 이미지 크기 합
+OCR_BATCH_MAX_IMAGES = int(os.getenv("OCR_BATCH_MAX_IMAGES", "32"))  # 배치 요청 하나에 담을 최대 이미지 수
+OCR_BATCH_PIPELINE = int(os.getenv("OCR_BATCH_PIPELINE", "2"))  # 서버당 동시에 보낼 배치 요청 수 (업로드와 서버 OCR을 겹침)
+# OCR 요청의 응답 대기 타임아웃(초, 배치 스트리밍은 다음 결과 줄까지의 대기 시간으로
+# 서버 대기열과 바쁜 작업자 풀에서 첫 이미지가 끝날 때까지 기다릴 수 있어야 함)
+OCR_TIMEOUT = float(os.getenv("OCR_TIMEOUT", "120"))
+# 단어 신뢰도 하한 (0~100, 이보다 낮은 단어는 서버가 텍스트에서 제외, 0이면 제외하지 않고 평균 신뢰도만 받음)
+# 설정하지 않으면 보내지 않음 (단어 단위 인식은 더 느리고 텍스트 재구성 방식도 달라지므로 필요할 때만 사용)
+OCR_MIN_CONF = float(os.environ["OCR_MIN_CONF"]) if os.getenv("OCR_MIN_CONF", "").strip() else None
+
+
+def plan_batches(
+    image_paths: List[str],
+    max_bytes: int = OCR_BATCH_MAX_BYTES,
+    max_images: int = OCR_BATCH_MAX_IMAGES
+) -> List[List[str]]:
+    """
+    이미지를 입력 순서대로 크기 합이 max_bytes, 개수가 max_images를 넘지 않는 배치로 나눕니다.
+    
+    max_bytes보다 큰 이미지는 단독 배치가 됩니다.
+    """
+    batches: List[List[str]] = []
+    current: List[str] = []
+    current_bytes = 0
+    for path in image_paths:
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            size = 0
+        if current and (current_bytes + size > max_bytes or len(current) >= max_images):
+            batches.append(current)
+            current, current_bytes = [], 0
+        current.append(path)
+        current_bytes += size
+    if current:
+        batches.append(current)
+    return batches
+
 class ImageAnalyzer:
     """PDF에서 추출된 이미지를 분석하는 클래스"""
     
-    def __init__(self, server_url: str = "http://localhost:5050"):
+    def __init__(
+        self,
+        server_url: Union[str, List[str]] = "http://localhost:5050",
+        session: Optional[requests.Session] = None,
+        preprocess: Optional[str] = None,
+        shared_root: Optional[str] = None,
+        min_conf: Optional[float] = OCR_MIN_CONF,
+        layout: bool = False,
+        timeout: float = OCR_TIMEOUT
+    ):
         """
         초기화 함수
         
         Args:
-            server_url: 이미지 분석 서버 URL
+            server_url: 이미지 분석 서버 URL (여러 서버는 목록 또는 쉼표로 구분한 문자열,
+                처리 중인 요청이 가장 적은 정상 서버로 요청을 나누어 보냄)
+            session: HTTP 세션 (None인 경우 공유 'ocr' 세션 사용)
+            preprocess: OCR 서버 전처리 단계 (none, auto 또는 scale,deskew,binarize 조합, None이면 서버 기본값)
+            shared_root: OCR 서버와 같은 경로로 공유하는 디렉토리 (os.pathsep으로 여러 개 지정 가능,
+                None인 경우 환경변수 OCR_SHARED_ROOT). 이 안의 이미지는 업로드하지 않고 경로만 보냄
+            min_conf: 단어 신뢰도 하한 (0~100, 이보다 낮은 단어는 텍스트에서 제외하고 결과에 평균 신뢰도 포함,
+                None이면 텍스트만 받음)
+            layout: 결과에 단어 상자, 줄 묶음, 단어별 신뢰도(layout)를 포함할지 여부
+            timeout: OCR 요청의 응답 대기 타임아웃(초, 배치 스트리밍은 결과 줄 사이의 최대 대기 시간)
         """
-        self.server_url = server_url.rstrip('/')
-        logger.info(f"이미지 분석기 초기화 완료 (서버 URL: {self.server_url})")
+        self.endpoints = OCREndpoints(server_url)
+        self.server_url = self.endpoints.urls[0]
+        self.session = session or get_session("ocr")
+        self.preprocess = preprocess
+        self.min_conf = min_conf
+        self.layout = layout
+        self.timeout = timeout
+        self._batch_supported = True
+        shared_root = shared_root if shared_root is not None else os.getenv("OCR_SHARED_ROOT", "")
+        self.shared_roots = [os.path.realpath(root) for root in shared_root.split(os.pathsep) if root.strip()]
+        mode = f", 공유 경로: {', '.join(self.shared_roots)}" if self.shared_roots else ""
+        logger.info(f"이미지 분석기 초기화 완료 (서버 URL: {', '.join(self.endpoints.urls)}{mode})")
     
     def check_server_health(self) -> bool:
         """
-        이미지 분석 서버 상태를 확인합니다.
+        이미지 분석 서버 상태를 확인합니다 (여러 서버인 경우 모든 서버를 확인하고 서버별 상태를 갱신).
         
         Returns:
-            서버가 정상 작동 중이면 True, 그렇지 않으면 False
+            정상 작동 중인 서버가 하나라도 있으면 True, 그렇지 않으면 False
         """
-        try:
-            response = requests.get(f"{self.server_url}/health", timeout=5)
-            if response.status_code == 200:
-                logger.info("이미지 분석 서버 연결 성공")
-                return True
-            else:
-                logger.warning(f"이미지 분석 서버 응답 오류: {response.status_code}")
-                return False
-        except Exception as e:
-            logger.error(f"이미지 분석 서버 연결 실패: {str(e)}")
+        healthy = self.endpoints.check_health(self.session, timeout=request_timeout(5))
+        if healthy == 0:
+            logger.error("이미지 분석 서버 연결 실패")
             return False
+        logger.info(f"이미지 분석 서버 연결 성공 ({healthy}/{len(self.endpoints)}개 정상)")
+        return True
+    
+    def ocr_params(self, lang: Optional[str] = None) -> Dict[str, str]:
+        """OCR 요청 쿼리 파라미터 (언어, 전처리 단계, 단어 신뢰도 하한, 레이아웃)"""
+        params = {}
+        if lang is not None:
+            params['lang'] = lang
+        if self.preprocess is not None:
+            params['preprocess'] = self.preprocess
+        if self.min_conf is not None:
+            params['min_conf'] = str(self.min_conf)
+        if self.layout:
+            params['layout'] = 'true'
+        return params
+    
+    @staticmethod
+    def ocr_result(image_path: str, item: Dict[str, Any], lang: str) -> Dict[str, Any]:
+        """서버의 OCR 결과(단일 요청 응답 또는 배치 항목)를 분석 결과 딕셔너리로 변환합니다."""
+        result = {
+            "path": image_path,
+            "filename": os.path.basename(image_path),
+            "ocr_text": item.get("text", ""),
+            "language": item.get("language", lang),
+            "process_time": item.get("process_time_seconds", 0)
+        }
+        # 단어 단위 인식을 요청한 경우의 평균 단어 신뢰도(0~100), 제외된 단어 수, 레이아웃
+        for name in ("confidence", "dropped_words", "layout"):
+            if name in item:
+                result[name] = item[name]
+        return result
+    
+    def is_shared(self, image_path: str) -> bool:
+        """이미지가 OCR 서버와 공유하는 디렉토리 안에 있어 경로만 보내도 되는지 여부"""
+        if not self.shared_roots:
+            return False
+        real_path = os.path.realpath(image_path)
+        return any(os.path.commonpath([root, real_path]) == root for root in self.shared_roots)
+    
+    def disable_shared(self, status_code: int) -> None:
+        """서버가 경로 기반 요청을 거부하면 공유 경로 모드를 끄고 업로드 방식으로 전환합니다."""
+        if self.shared_roots:
+            logger.warning(f"이미지 분석 서버가 경로 기반 요청을 거부하여({status_code}) 업로드 방식으로 전환합니다. "
+                           f"서버의 OCR_SHARED_ROOT 설정을 확인하세요.")
+            self.shared_roots = []
+    
+    @contextmanager
+    def _request(self, send: Callable[[str], requests.Response]) -> Iterator[requests.Response]:
+        """
+        처리 중인 요청이 가장 적은 서버로 요청을 보내고, 응답을 다 읽을 때까지 그 서버의 처리 중 요청으로 셉니다.
+        
+        서버 선택과 재시도(연결 실패, 503)는 EndpointAttempt 규칙을 따릅니다.
+        send는 서버 URL을 받아 시도마다 호출되므로 업로드 파일은 매번 처음부터 읽도록 구현해야 합니다.
+        """
+        attempt = EndpointAttempt(self.endpoints)
+        while True:
+            endpoint = attempt.acquire()
+            try:
+                response = send(endpoint.url)
+            except requests.exceptions.RequestException as e:
+                if not attempt.connection_failed(e):
+                    raise
+                continue
+            delay = attempt.check(response.status_code, response.headers.get("Retry-After"))
+            if delay is None:
+                break
+            response.close()
+            if delay:
+                time.sleep(delay)
+        
+        failed = False
+        try:
+            yield response
+        except requests.exceptions.RequestException:
+            # 스트리밍 응답을 읽다가 연결이 끊긴 경우
+            failed = True
+            raise
+        finally:
+            response.close()
+            attempt.finish(failed)
+    
+    def _post(self, send: Callable[[str], requests.Response]) -> requests.Response:
+        """응답 본문을 한 번에 받는 요청을 보냅니다 (서버 선택과 재시도는 _request와 같음)."""
+        with self._request(send) as response:
+            return response
     
     def analyze_image(self, image_path: str, lang: str = "kor+eng") -> Dict[str, Any]:
         """
@@ -59,25 +214,32 @@ class ImageAnalyzer:
             return {"path": image_path, "error": "파일을 찾을 수 없음", "ocr_text": ""}
         
         try:
-            with open(image_path, 'rb') as f:
-                files = {'file': (os.path.basename(image_path), f, 'image/jpeg')}
-                response = requests.post(
-                    f"{self.server_url}/analyze/ocr",
-                    files=files,
-                    params={'lang': lang},
-                    timeout=30
-                )
+            if self.is_shared(image_path):
+                # 같은 호스트의 서버는 경로로 파일을 직접 읽음 (업로드 생략)
+                response = self._post(lambda url: self.session.post(
+                    f"{url}/analyze/ocr/from_path",
+                    params=dict(self.ocr_params(lang), image_path=os.path.realpath(image_path)),
+                    timeout=request_timeout(self.timeout)
+                ))
+                if response.status_code in (403, 404, 405):
+                    self.disable_shared(response.status_code)
+                    return self.analyze_image(image_path, lang)
+            else:
+                with open(image_path, 'rb') as f:
+                    def send(url: str) -> requests.Response:
+                        f.seek(0)
+                        return self.session.post(
+                            f"{url}/analyze/ocr",
+                            files={'file': (os.path.basename(image_path), f, 'image/jpeg')},
+                            params=self.ocr_params(lang),
+                            timeout=request_timeout(self.timeout)
+                        )
+                    response = self._post(send)
             
             if response.status_code == 200:
                 result = response.json()
                 logger.info(f"이미지 분석 성공: {os.path.basename(image_path)}")
-                return {
-                    "path": image_path,
-                    "filename": os.path.basename(image_path),
-                    "ocr_text": result.get("text", ""),
-                    "language": result.get("language", lang),
-                    "process_time": result.get("process_time_seconds", 0)
-                }
+                return self.ocr_result(image_path, result, lang)
             else:
                 logger.error(f"이미지 분석 API 오류: {response.status_code}")
                 return {
@@ -95,16 +257,178 @@ class ImageAnalyzer:
                 "ocr_text": ""
             }
     
-    def analyze_images(self, image_paths: List[str], lang: str = "kor+eng") -> List[Dict[str, Any]]:
+    def _batch_item_result(self, image_path: str, item: Dict[str, Any], lang: str) -> Dict[str, Any]:
+        """배치 응답의 항목을 analyze_image와 같은 결과 형식으로 변환합니다."""
+        if "error" in item:
+            return {
+                "path": image_path,
+                "filename": os.path.basename(image_path),
+                "error": item["error"],
+                "ocr_text": ""
+            }
+        return self.ocr_result(image_path, item, lang)
+    
+    def _post_batch(
+        self,
+        endpoint: str,
+        image_paths: List[str],
+        lang: str,
+        results: Dict[str, Dict[str, Any]],
+        **request_kwargs: Any
+    ) -> Optional[int]:
+        """
+        배치 요청을 보내고 받은 항목을 results에 채웁니다 (끝난 이미지부터 NDJSON으로 받음).
+        
+        Returns:
+            응답 상태 코드 (연결 실패 등으로 응답이 없으면 None)
+        """
+        def send(url: str) -> requests.Response:
+            # 재시도할 때 업로드 파일을 처음부터 다시 보냄
+            for _, file_tuple in request_kwargs.get('files', []):
+                file_tuple[1].seek(0)
+            return self.session.post(
+                f"{url}{endpoint}",
+                params=dict(self.ocr_params(lang), stream='true'),
+                timeout=request_timeout(self.timeout),
+                stream=True,
+                **request_kwargs
+            )
+        
+        try:
+            with self._request(send) as response:
+                if response.status_code != 200:
+                    if response.status_code not in (403, 404, 405):
+                        logger.error(f"배치 이미지 분석 API 오류: {response.status_code}")
+                    return response.status_code
+                if response.headers.get('content-type', '').startswith('application/json'):
+                    # 스트리밍을 지원하지 않는 서버는 입력 순서대로 전체 결과를 한 번에 반환
+                    items = [dict(item, index=item.get("index", i)) for i, item in enumerate(response.json().get("results", []))]
+                else:
+                    items = (json.loads(line) for line in response.iter_lines() if line)
+                for item in items:
+                    index = item.get("index")
+                    if index is not None and 0 <= index < len(image_paths):
+                        results[image_paths[index]] = self._batch_item_result(image_paths[index], item, lang)
+                return response.status_code
+        except Exception as e:
+            logger.error(f"배치 이미지 분석 중 오류 발생: {str(e)}")
+            return None
+    
+    def analyze_batch(self, image_paths: List[str], lang: str = "kor+eng") -> Dict[str, Dict[str, Any]]:
+        """
+        이미지 여러 개를 배치 요청 하나로 분석합니다.
+        
+        서버가 끝난 이미지부터 결과를 보내도록(NDJSON 스트리밍) 요청하므로, 도중에 연결이 끊겨도
+        이미 받은 결과는 유지되고 받지 못한 이미지만 개별 요청으로 다시 분석합니다.
+        서버와 공유하는 디렉토리 안의 이미지는 업로드하지 않고 경로만 보냅니다.
+        
+        Args:
+            image_paths: 이미지 파일 경로 목록
+            lang: OCR 언어 (기본값: kor+eng)
+            
+        Returns:
+            이미지 경로 -> 분석 결과 딕셔너리
+        """
+        results: Dict[str, Dict[str, Any]] = {}
+        sendable = []
+        for path in image_paths:
+            if os.path.exists(path):
+                sendable.append(path)
+            else:
+                logger.warning(f"이미지 파일을 찾을 수 없음: {path}")
+                results[path] = {"path": path, "filename": os.path.basename(path), "error": "파일을 찾을 수 없음", "ocr_text": ""}
+        
+        if sendable and self._batch_supported:
+            shared = [path for path in sendable if self.is_shared(path)]
+            uploads = [path for path in sendable if path not in shared] if shared else sendable
+            if shared:
+                # 공유 경로의 이미지는 경로 목록만 보냄
+                status = self._post_batch(
+                    "/analyze/ocr/batch/from_paths", shared, lang, results,
+                    json={'paths': [os.path.realpath(path) for path in shared]}
+                )
+                if status in (403, 404, 405):
+                    self.disable_shared(status)
+                    uploads = sendable
+            if uploads:
+                files = [('files', (os.path.basename(path), open(path, 'rb'), 'image/jpeg')) for path in uploads]
+                try:
+                    status = self._post_batch("/analyze/ocr/batch", uploads, lang, results, files=files)
+                finally:
+                    for _, file_tuple in files:
+                        file_tuple[1].close()
+                if status in (404, 405):
+                    # 배치 엔드포인트가 없는 서버는 이후 개별 요청만 사용
+                    logger.warning("이미지 분석 서버가 배치 요청을 지원하지 않아 이미지별로 요청합니다.")
+                    self._batch_supported = False
+        
+        # 결과를 받지 못한 이미지는 개별 요청으로 다시 분석
+        missing = [path for path in sendable if path not in results]
+        if missing and self._batch_supported and len(missing) < len(sendable):
+            logger.warning(f"배치 결과를 받지 못한 이미지 {len(missing)}개를 개별 요청으로 다시 분석합니다.")
+        for path in missing:
+            results[path] = self.analyze_image(path, lang)
+        
+        succeeded = sum(1 for path in sendable if "error" not in results[path])
+        logger.info(f"배치 이미지 분석 완료: {succeeded}/{len(sendable)}개 성공")
+        return results
+    
+    def analyze_batched(
+        self,
+        image_paths: List[str],
+        lang: str = "kor+eng",
+        pipeline: int = OCR_BATCH_PIPELINE
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        이미지를 크기 기준 배치로 나누어 분석합니다.
+        
+        작은 그림이 많은 문서에서 이미지마다 HTTP 요청을 보내는 비용을 줄이고, 여러 배치 요청을 동시에 보내
+        다음 배치 업로드와 이전 배치의 서버 OCR이 겹치도록 합니다. 서버가 여러 대이면 서버 수만큼 더 동시에 보냅니다.
+        
+        Args:
+            image_paths: 이미지 파일 경로 목록
+            lang: OCR 언어 (기본값: kor+eng)
+            pipeline: 서버당 동시에 보낼 배치 요청 수
+            
+        Returns:
+            이미지 경로 -> 분석 결과 딕셔너리
+        """
+        batches = plan_batches(image_paths)
+        pipeline *= len(self.endpoints)
+        if len(batches) <= 1 or pipeline <= 1:
+            results: Dict[str, Dict[str, Any]] = {}
+            for batch in batches:
+                results.update(self.analyze_batch(batch, lang))
+            return results
+        
+        logger.info(f"이미지 {len(image_paths)}개를 배치 {len(batches)}개로 나누어 분석합니다 (동시 요청 {pipeline}개)")
+        results = {}
+        with ThreadPoolExecutor(max_workers=min(pipeline, len(batches))) as executor:
+            for batch_results in executor.map(lambda batch: self.analyze_batch(batch, lang), batches):
+                results.update(batch_results)
+        return results
+    
+    def analyze_images(
+        self,
+        image_paths: List[str],
+        lang: str = "kor+eng",
+        dedup: bool = True,
+        image_filter: Optional[ImageFilter] = None,
+        batch: bool = True
+    ) -> List[Dict[str, Any]]:
         """
         여러 이미지를 분석합니다.
         
         Args:
             image_paths: 이미지 파일 경로 목록
             lang: OCR 언어 (기본값: kor+eng)
+            dedup: 같은 이미지(반복되는 로고, 배너 등)는 한 번만 OCR하고 결과를 나누어 줄지 여부
+            image_filter: OCR 전 이미지 필터 (None이면 모든 이미지를 OCR)
+            batch: 이미지를 배치 요청으로 묶어 보낼지 여부 (False이면 이미지마다 요청)
             
         Returns:
-            이미지 분석 결과 목록
+            이미지 분석 결과 목록 (입력 순서, 중복 이미지 결과에는 'duplicate_of',
+            필터에 걸린 이미지 결과에는 'skipped' 포함)
         """
         if not image_paths:
             logger.warning("분석할 이미지가 없습니다.")
@@ -115,13 +439,32 @@ class ImageAnalyzer:
             logger.error("이미지 분석 서버가 응답하지 않습니다.")
             return [{"path": path, "filename": os.path.basename(path), "error": "서버 연결 실패", "ocr_text": ""} for path in image_paths]
         
-        # 개별 이미지 분석
-        results = []
-        for image_path in image_paths:
-            result = self.analyze_image(image_path, lang)
-            results.append(result)
+        # 아이콘, 구분선, 빈 이미지 등은 OCR하지 않고 이유만 기록
+        results_by_path = {}
+        ocr_paths = image_paths
+        if image_filter is not None:
+            ocr_paths, skipped = image_filter.split(image_paths)
+            for path, reason in skipped.items():
+                results_by_path[path] = {"path": path, "filename": os.path.basename(path), "ocr_text": "", "skipped": reason}
+        
+        # 중복 이미지는 대표 이미지 하나만 분석
+        groups = dedupe_images(ocr_paths) if dedup else {path: [path] for path in ocr_paths}
+        
+        # 대표 이미지 분석 후 같은 그룹의 이미지에 결과 복사
+        if batch:
+            representative_results = self.analyze_batched(list(groups), lang)
+        else:
+            representative_results = {path: self.analyze_image(path, lang) for path in groups}
+        for representative, members in groups.items():
+            result = representative_results[representative]
+            for path in members:
+                if path == representative:
+                    results_by_path[path] = result
+                else:
+                    results_by_path[path] = dict(result, path=path, filename=os.path.basename(path), duplicate_of=representative)
         
-        logger.info(f"총 {len(results)}개 이미지 분석 완료")
+        results = [results_by_path[path] for path in image_paths]
+        logger.info(f"총 {len(results)}개 이미지 분석 완료 (OCR 대상 {len(groups)}개)")
         return results
     
     def extract_page_info(self, filename: str) -> Dict[str, Any]:
@@ -198,7 +541,9 @@ class ImageAnalyzer:
                 filename = result.get("filename", "알 수 없음")
                 ocr_text = result.get("ocr_text", "").strip()
                 
-                if "error" in result:
+                if "skipped" in result:
+                    markdown += f"- **{filename}**: 건너뜀 ({result['skipped']})\n\n"
+                elif "error" in result:
                     markdown += f"- **{filename}**: 분석 오류 - {result['error']}\n\n"
                 elif not ocr_text:
                     markdown += f"- **{filename}**: 텍스트 없음\n\n"
@@ -220,5 +565,5 @@ def analyze_pdf_images(image_paths: List[str], lang: str = "kor+eng") -> str:
         마크다운 형식의 분석 결과
     """
     analyzer = ImageAnalyzer()
-    results = analyzer.analyze_images(image_paths, lang)
+    results = analyzer.analyze_images(image_paths, lang, image_filter=ImageFilter())
     return analyzer.format_results_markdown(results)
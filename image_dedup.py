@@ -0,0 +1,169 @@
+import os
+import hashlib
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+logger = logging.getLogger('image_dedup')
+
+# 같은 이미지로 볼 dHash 해밍 거리 (0이면 해시가 완전히 같을 때만)
+DEDUP_MAX_DISTANCE = int(os.getenv("IMAGE_DEDUP_MAX_DISTANCE", "3"))
+# 같은 이미지로 볼 가로세로 비율 차이 (해상도만 다른 같은 로고는 허용하되 모양이 다른 이미지는 구분)
+DEDUP_ASPECT_TOLERANCE = 0.1
+# 지각 해시가 가까운 후보를 픽셀 단위로 확인할 때의 기준
+# (작은 쪽 해상도로 맞춘 뒤 밝기 차이가 이보다 큰 픽셀이 하나라도 있으면 다른 이미지로 판단)
+VERIFY_PIXEL_DIFF = 96
+VERIFY_MAX_SIDE = 512
+
+
+def dhash(image: Image.Image, hash_size: int = 8) -> int:
+    """
+    차이 해시(dHash)를 계산합니다. 이미지를 (hash_size+1)×hash_size 흑백으로 줄인 뒤
+    가로로 이웃한 픽셀의 밝기 비교 결과를 비트로 모읍니다.
+    """
+    small = image.convert('L').resize((hash_size + 1, hash_size), Image.BILINEAR)
+    pixels = list(small.getdata())
+    value = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+
+def same_pixels(path_a: str, path_b: str) -> bool:
+    """
+    두 이미지를 작은 쪽 해상도(최대 VERIFY_MAX_SIDE)로 맞춘 뒤 크게 다른 픽셀이 없는지 확인합니다.
+
+    dHash는 축소된 이미지를 비교하므로 글자 몇 개만 다른 이미지(페이지 번호만 다른 표 등)를
+    같은 이미지로 볼 수 있어, 후보를 찾은 뒤 이 함수로 한 번 더 확인합니다.
+    """
+    with Image.open(path_a) as a, Image.open(path_b) as b:
+        width = min(a.width, b.width)
+        height = min(a.height, b.height)
+        scale = min(1.0, VERIFY_MAX_SIDE / max(width, height, 1))
+        size = (max(1, int(width * scale)), max(1, int(height * scale)))
+        pixels_a = np.asarray(a.convert('L').resize(size, Image.LANCZOS), dtype=np.int16)
+        pixels_b = np.asarray(b.convert('L').resize(size, Image.LANCZOS), dtype=np.int16)
+    return not np.any(np.abs(pixels_a - pixels_b) > VERIFY_PIXEL_DIFF)
+
+
+class ImageDeduplicator:
+    """
+    추출된 이미지 중 같은 이미지를 찾아 대표 이미지 하나로 묶는 클래스
+
+    1. 같은 파일(하드 링크 포함, PDF xref가 같아 추출기가 링크로 저장한 경우)
+    2. 바이트가 같은 파일
+    3. 지각 해시(dHash)가 가깝고 가로세로 비율이 비슷하며 픽셀 비교로도 같은 이미지 (해상도, 압축만 다른 경우)
+    순서로 비교하며, 앞 단계에서 찾으면 뒤 단계(이미지 디코딩)는 생략합니다.
+    """
+
+    def __init__(self, max_distance: int = DEDUP_MAX_DISTANCE):
+        """
+        Args:
+            max_distance: 같은 이미지로 볼 dHash 해밍 거리
+        """
+        self.max_distance = max_distance
+        self._lock = threading.Lock()
+        self._by_inode: Dict[Tuple[int, int], str] = {}
+        self._by_digest: Dict[str, str] = {}
+        self._perceptual: List[Tuple[int, float, str]] = []  # (dHash, 가로세로 비율, 대표 경로)
+        self.representative: Dict[str, str] = {}  # 이미지 경로 -> 대표 이미지 경로
+
+    def add(self, image_path: str) -> str:
+        """
+        이미지를 등록하고 대표 이미지 경로를 반환합니다 (처음 보는 이미지면 자기 자신).
+
+        Args:
+            image_path: 이미지 파일 경로
+        """
+        with self._lock:
+            if image_path in self.representative:
+                return self.representative[image_path]
+            representative = self._find(image_path) or image_path
+            self.representative[image_path] = representative
+            return representative
+
+    def _find(self, image_path: str) -> Optional[str]:
+        try:
+            stat = os.stat(image_path)
+        except OSError:
+            return None
+
+        inode = (stat.st_dev, stat.st_ino)
+        if inode in self._by_inode:
+            return self._by_inode[inode]
+        self._by_inode[inode] = image_path
+
+        with open(image_path, 'rb') as f:
+            digest = hashlib.sha1(f.read()).hexdigest()
+        if digest in self._by_digest:
+            return self._by_digest[digest]
+        self._by_digest[digest] = image_path
+
+        try:
+            with Image.open(image_path) as image:
+                width, height = image.size
+                image_hash = dhash(image)
+        except Exception as e:
+            logger.debug(f"이미지 해시 계산 실패: {image_path} ({str(e)})")
+            return None
+        aspect = width / height if height else 0.0
+
+        match = None
+        for other_hash, other_aspect, other_path in self._perceptual:
+            if (hamming_distance(image_hash, other_hash) <= self.max_distance
+                    and abs(aspect - other_aspect) <= DEDUP_ASPECT_TOLERANCE * max(aspect, other_aspect)
+                    and self._verify(image_path, other_path)):
+                match = other_path
+                break
+        if match is not None:
+            self._by_digest[digest] = match
+            self._by_inode[inode] = match
+            return match
+
+        self._perceptual.append((image_hash, aspect, image_path))
+        return None
+
+    @staticmethod
+    def _verify(path_a: str, path_b: str) -> bool:
+        try:
+            return same_pixels(path_a, path_b)
+        except Exception as e:
+            logger.debug(f"이미지 픽셀 비교 실패: {path_a}, {path_b} ({str(e)})")
+            return False
+
+    def group(self, image_paths: List[str]) -> Dict[str, List[str]]:
+        """
+        이미지 목록을 대표 이미지별로 묶습니다.
+
+        Returns:
+            대표 이미지 경로 -> 해당 이미지로 대체되는 경로 리스트 (대표 포함, 입력 순서 유지)
+        """
+        groups: Dict[str, List[str]] = {}
+        for path in image_paths:
+            groups.setdefault(self.add(path), []).append(path)
+        if groups and len(groups) < len(image_paths):
+            logger.info(f"중복 이미지 제거: {len(image_paths)}개 중 고유 이미지 {len(groups)}개 ({len(image_paths) - len(groups)}개 생략)")
+        return groups
+
+
+def dedupe_images(image_paths: List[str], max_distance: int = DEDUP_MAX_DISTANCE) -> Dict[str, List[str]]:
+    """
+    이미지 목록을 대표 이미지별로 묶습니다.
+
+    Args:
+        image_paths: 이미지 파일 경로 목록
+        max_distance: 같은 이미지로 볼 dHash 해밍 거리
+
+    Returns:
+        대표 이미지 경로 -> 해당 이미지로 대체되는 경로 리스트 (대표 포함)
+    """
+    return ImageDeduplicator(max_distance).group(image_paths)
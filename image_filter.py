@@ -0,0 +1,123 @@
+import os
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+logger = logging.getLogger('image_filter')
+
+# OCR 전 필터 기본값 (환경 변수로 조정 가능)
+FILTER_MIN_AREA = int(os.getenv("IMAGE_FILTER_MIN_AREA", "4096"))  # 최소 픽셀 면적 (예: 64×64)
+FILTER_MIN_SIDE = int(os.getenv("IMAGE_FILTER_MIN_SIDE", "24"))  # 가로/세로 최소 픽셀 (글자 한 줄 높이보다 작은 이미지 제외)
+FILTER_MAX_ASPECT = float(os.getenv("IMAGE_FILTER_MAX_ASPECT", "15"))  # 최대 가로세로 비율 (구분선, 띠 이미지 제외)
+FILTER_MIN_STDDEV = float(os.getenv("IMAGE_FILTER_MIN_STDDEV", "4"))  # 밝기 표준편차가 이보다 작으면 빈 이미지로 판단
+
+# 빈 이미지 판단에 사용할 축소 크기 (전체 픽셀을 보지 않아도 단색 여부는 충분히 판단 가능)
+_BLANK_CHECK_SIZE = 128
+# 알파 채널이 있는 이미지 모드 (팔레트/흑백 이미지의 투명색은 info['transparency']로 확인)
+_ALPHA_MODES = {'RGBA', 'RGBa', 'LA', 'La', 'PA'}
+
+
+class ImageFilter:
+    """
+    OCR할 필요가 없는 이미지(아이콘, 구분선, 빈 사각형 등)를 걸러내는 필터
+
+    크기와 비율 규칙은 이미지 헤더만 읽어서 판단하고, 이를 통과한 이미지만 디코딩하여
+    흑백 축소본의 밝기 분산으로 빈 이미지 여부를 확인합니다 (투명 이미지는 흰 배경에 합성한 뒤 확인).
+    """
+
+    def __init__(
+        self,
+        min_area: int = FILTER_MIN_AREA,
+        min_side: int = FILTER_MIN_SIDE,
+        max_aspect: float = FILTER_MAX_ASPECT,
+        min_stddev: float = FILTER_MIN_STDDEV
+    ):
+        """
+        Args:
+            min_area: 최소 픽셀 면적 (0이면 검사 안 함)
+            min_side: 가로/세로 최소 픽셀 (0이면 검사 안 함)
+            max_aspect: 최대 가로세로 비율 (0이면 검사 안 함)
+            min_stddev: 빈 이미지로 볼 밝기 표준편차 기준 (0이면 검사 안 함)
+        """
+        self.min_area = min_area
+        self.min_side = min_side
+        self.max_aspect = max_aspect
+        self.min_stddev = min_stddev
+        self._lock = threading.Lock()
+        self.skip_counts: Dict[str, int] = {}
+
+    def check(self, image_path: str) -> Optional[str]:
+        """
+        이미지를 OCR할지 판단합니다.
+
+        Args:
+            image_path: 이미지 파일 경로
+
+        Returns:
+            건너뛸 이유 (OCR 대상이면 None)
+        """
+        reason = self._check(image_path)
+        if reason is not None:
+            rule = reason.split(':', 1)[0]
+            with self._lock:
+                self.skip_counts[rule] = self.skip_counts.get(rule, 0) + 1
+        return reason
+
+    def _check(self, image_path: str) -> Optional[str]:
+        try:
+            with Image.open(image_path) as image:
+                width, height = image.size
+                if self.min_side and min(width, height) < self.min_side:
+                    return f"min_side: {width}x{height} (최소 {self.min_side}px)"
+                if self.min_area and width * height < self.min_area:
+                    return f"min_area: {width}x{height} (최소 {self.min_area}px²)"
+                if self.max_aspect:
+                    aspect = max(width, height) / max(1, min(width, height))
+                    if aspect > self.max_aspect:
+                        return f"aspect: {aspect:.1f}:1 (최대 {self.max_aspect:g}:1)"
+                if self.min_stddev:
+                    if image.mode in _ALPHA_MODES or 'transparency' in image.info:
+                        # 투명 영역은 흰 배경에 합성해서 판단 (투명 영역 아래의 색은 보이지 않으므로 무시)
+                        rgba = image.convert('RGBA')
+                        gray = Image.alpha_composite(Image.new('RGBA', rgba.size, (255, 255, 255, 255)), rgba).convert('L')
+                    else:
+                        # 축소본만 디코딩 (JPEG은 draft 모드로 디코딩 단계에서 바로 축소)
+                        image.draft('L', (_BLANK_CHECK_SIZE, _BLANK_CHECK_SIZE))
+                        gray = image.convert('L')
+                    gray.thumbnail((_BLANK_CHECK_SIZE, _BLANK_CHECK_SIZE))
+                    stddev = float(np.asarray(gray, dtype=np.float32).std())
+                    if stddev < self.min_stddev:
+                        return f"blank: 밝기 표준편차 {stddev:.1f} (최소 {self.min_stddev:g})"
+        except Exception as e:
+            # 열 수 없는 이미지는 OCR 서버에서 오류로 기록되도록 그대로 통과
+            logger.debug(f"이미지 필터 검사 실패: {image_path} ({str(e)})")
+        return None
+
+    def split(self, image_paths: List[str]) -> Tuple[List[str], Dict[str, str]]:
+        """
+        이미지 목록을 OCR 대상과 건너뛸 이미지로 나눕니다.
+
+        Args:
+            image_paths: 이미지 파일 경로 목록
+
+        Returns:
+            (OCR할_이미지_경로_리스트, {건너뛴_이미지_경로: 이유}) 튜플
+        """
+        kept = []
+        skipped = {}
+        for path in image_paths:
+            reason = self.check(path)
+            if reason is None:
+                kept.append(path)
+            else:
+                skipped[path] = reason
+        if skipped:
+            counts: Dict[str, int] = {}
+            for reason in skipped.values():
+                rule = reason.split(':', 1)[0]
+                counts[rule] = counts.get(rule, 0) + 1
+            logger.info(f"OCR 전 필터: {len(image_paths)}개 중 {len(skipped)}개 건너뜀 {counts}")
+        return kept, skipped
@@ -0,0 +1,201 @@
+import os
+import json
+import time
+import asyncio
+import logging
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger('admission')
+
+# 동시에 처리할 OCR 요청 수 (0이면 OCR 작업자 수 × 2)
+OCR_MAX_INFLIGHT = int(os.getenv("OCR_MAX_INFLIGHT", "0"))
+# 처리 자리를 기다릴 수 있는 요청 수 (넘으면 바로 503)
+OCR_MAX_QUEUED = int(os.getenv("OCR_MAX_QUEUED", "32"))
+# 처리 자리를 기다리는 최대 시간(초, 넘으면 503)
+OCR_QUEUE_TIMEOUT = float(os.getenv("OCR_QUEUE_TIMEOUT", "10"))
+# 요청 하나의 최대 본문 크기 (MB, 업로드 이미지 전체 합)
+OCR_MAX_REQUEST_MB = float(os.getenv("OCR_MAX_REQUEST_MB", "64"))
+
+
+class AdmissionRejected(Exception):
+    """처리 자리가 없어 요청을 받지 않은 경우"""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.retry_after = retry_after
+
+
+class RequestTooLarge(Exception):
+    """요청 본문이 크기 한도를 넘은 경우"""
+    pass
+
+
+class AdmissionController:
+    """
+    OCR 요청 수와 요청 본문 크기를 제한하는 승인 제어기
+
+    동시에 처리하는 요청은 max_inflight개, 자리를 기다리는 요청은 max_queued개까지만 받고,
+    넘치거나 queue_timeout 안에 자리가 나지 않으면 바로 503과 Retry-After로 거절합니다.
+    기다리는 요청은 본문을 아직 읽지 않은 상태이므로 서버 메모리에는 처리 중인 요청의 업로드만 올라갑니다.
+    """
+
+    def __init__(
+        self,
+        max_inflight: int,
+        max_queued: int = OCR_MAX_QUEUED,
+        queue_timeout: float = OCR_QUEUE_TIMEOUT,
+        max_request_bytes: int = int(OCR_MAX_REQUEST_MB * 1024 * 1024)
+    ):
+        """
+        Args:
+            max_inflight: 동시에 처리할 요청 수
+            max_queued: 처리 자리를 기다릴 수 있는 요청 수
+            queue_timeout: 처리 자리를 기다리는 최대 시간(초)
+            max_request_bytes: 요청 하나의 최대 본문 크기(바이트)
+        """
+        self.max_inflight = max(1, max_inflight)
+        self.max_queued = max(0, max_queued)
+        self.queue_timeout = queue_timeout
+        self.max_request_bytes = max_request_bytes
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.inflight = 0
+        self.queued = 0
+        self.admitted = 0
+        self.rejected_busy = 0
+        self.rejected_timeout = 0
+        self.rejected_too_large = 0
+        # 요청 처리 시간의 지수 이동 평균 (Retry-After 계산용)
+        self.avg_service_seconds = 1.0
+
+    def retry_after(self) -> int:
+        """대기열이 빠질 때까지 걸릴 것으로 예상되는 시간(초, 1~60)"""
+        backlog = (self.queued + self.inflight) / self.max_inflight
+        return int(min(60, max(1, round(backlog * self.avg_service_seconds))))
+
+    async def acquire(self) -> None:
+        """
+        처리 자리를 얻을 때까지 기다립니다.
+
+        Raises:
+            AdmissionRejected: 대기열이 가득 찼거나 queue_timeout 안에 자리가 나지 않은 경우
+        """
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_inflight)
+        if self._slots.locked():
+            if self.queued >= self.max_queued:
+                self.rejected_busy += 1
+                raise AdmissionRejected("OCR 서버가 처리할 수 있는 요청 수를 넘었습니다", self.retry_after())
+            self.queued += 1
+            try:
+                await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.rejected_timeout += 1
+                raise AdmissionRejected("OCR 서버 대기 시간을 넘었습니다", self.retry_after())
+            finally:
+                self.queued -= 1
+        else:
+            await self._slots.acquire()
+        self.inflight += 1
+        self.admitted += 1
+
+    def release(self, service_seconds: float) -> None:
+        """처리 자리를 반환하고 처리 시간을 평균에 반영합니다."""
+        self.inflight -= 1
+        self._slots.release()
+        self.avg_service_seconds = 0.8 * self.avg_service_seconds + 0.2 * service_seconds
+
+    def stats(self) -> Dict[str, Any]:
+        """승인 제어 상태 (처리 중, 대기 중 요청 수와 거절 횟수)"""
+        return {
+            "inflight": self.inflight,
+            "queued": self.queued,
+            "max_inflight": self.max_inflight,
+            "max_queued": self.max_queued,
+            "max_request_bytes": self.max_request_bytes,
+            "admitted": self.admitted,
+            "rejected_busy": self.rejected_busy,
+            "rejected_timeout": self.rejected_timeout,
+            "rejected_too_large": self.rejected_too_large,
+            "avg_service_seconds": round(self.avg_service_seconds, 3)
+        }
+
+
+class AdmissionMiddleware:
+    """
+    path_prefix로 시작하는 요청에 승인 제어를 적용하는 ASGI 미들웨어
+
+    본문을 읽기 전에 Content-Length로 크기를 확인하고(413), 처리 자리를 얻은 뒤에만 본문을 받습니다.
+    Content-Length가 없거나 실제 본문이 더 큰 경우도 받은 바이트 수를 세어 한도를 넘는 즉시 중단합니다.
+    """
+
+    def __init__(self, app, controller: AdmissionController, path_prefix: str = "/analyze/"):
+        self.app = app
+        self.controller = controller
+        self.path_prefix = path_prefix
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.path_prefix):
+            await self.app(scope, receive, send)
+            return
+
+        controller = self.controller
+        limit = controller.max_request_bytes
+        content_length = dict(scope.get("headers", [])).get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > limit:
+            controller.rejected_too_large += 1
+            await _send_error(send, 413, f"요청 본문이 너무 큽니다 (최대 {limit} 바이트)")
+            return
+
+        try:
+            await controller.acquire()
+        except AdmissionRejected as e:
+            logger.warning(f"OCR 요청 거절: {str(e)} (처리 중 {controller.inflight}, 대기 {controller.queued})")
+            await _send_error(send, 503, str(e), {"Retry-After": str(e.retry_after)})
+            return
+
+        received = 0
+        too_large = False
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received, too_large
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    too_large = True
+                    raise RequestTooLarge(f"요청 본문이 너무 큽니다 (최대 {limit} 바이트)")
+            return message
+
+        async def tracked_send(message):
+            nonlocal response_started
+            if too_large:
+                # 본문 파싱 중 중단된 요청은 앱이 만든 오류 응답(400 등) 대신 413으로 응답
+                if not response_started:
+                    response_started = True
+                    await _send_error(send, 413, f"요청 본문이 너무 큽니다 (최대 {limit} 바이트)")
+                return
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        start_time = time.time()
+        try:
+            await self.app(scope, limited_receive, tracked_send)
+        except RequestTooLarge:
+            if response_started:
+                raise
+            await _send_error(send, 413, f"요청 본문이 너무 큽니다 (최대 {limit} 바이트)")
+        finally:
+            if too_large:
+                controller.rejected_too_large += 1
+            controller.release(time.time() - start_time)
+
+
+async def _send_error(send, status: int, detail: str, headers: Optional[Dict[str, str]] = None) -> None:
+    """FastAPI HTTPException과 같은 형식({"detail": ...})의 JSON 오류 응답을 보냅니다."""
+    body = json.dumps({"detail": detail}, ensure_ascii=False).encode("utf-8")
+    raw_headers = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+    raw_headers += [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()]
+    await send({"type": "http.response.start", "status": status, "headers": raw_headers})
+    await send({"type": "http.response.body", "body": body})
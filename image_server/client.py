@@ -1,35 +1,82 @@
 import requests
+from requests.adapters import HTTPAdapter
 import os
 import json
 import argparse
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Optional
 import time
 
+try:
+    # 파이프라인과 같은 프로세스에서 사용할 때는 공유 연결 풀 사용
+    from http_client import get_session, request_timeout
+except ImportError:
+    get_session = None
+
+    def request_timeout(read: Optional[float] = None, connect: Optional[float] = None):
+        return (connect or 10, read or 60)
+
+
+def _default_session() -> requests.Session:
+    """keep-alive 연결 풀을 사용하는 세션 생성"""
+    if get_session is not None:
+        return get_session("ocr")
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, pool_block=True)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def _ocr_params(lang: str, preprocess: Optional[str]) -> Dict[str, Any]:
+    """OCR 요청 쿼리 파라미터 (전처리를 지정하지 않으면 서버 기본값 사용)"""
+    params = {'lang': lang}
+    if preprocess is not None:
+        params['preprocess'] = preprocess
+    return params
+
 class ImageAnalysisClient:
     """PDF에서 추출된 이미지를 분석하기 위한 클라이언트"""
     
-    def __init__(self, server_url: str = "http://localhost:5050"):
+    def __init__(self, server_url: str = "http://localhost:5050", session: Optional[requests.Session] = None,
+                 timeout: float = 120, layout: bool = False, min_conf: Optional[float] = None):
         """
         클라이언트 초기화
         
         Args:
             server_url: 이미지 분석 서버 URL
+            session: HTTP 세션 (None인 경우 keep-alive 연결 풀 세션 사용)
+            timeout: 응답 대기 타임아웃(초)
+            layout: 결과에 단어 상자, 줄 묶음, 단어별 신뢰도를 포함할지 여부
+            min_conf: 이 신뢰도(0~100) 미만의 단어를 텍스트에서 제외 (None이면 제외하지 않음)
         """
         self.server_url = server_url.rstrip('/')
+        self.session = session or _default_session()
+        self.timeout = request_timeout(timeout)
+        self.layout = layout
+        self.min_conf = min_conf
+    
+    def _ocr_params(self, lang: str, preprocess: Optional[str]) -> Dict[str, Any]:
+        """OCR 요청 쿼리 파라미터 (레이아웃, 단어 신뢰도 하한 포함)"""
+        params = _ocr_params(lang, preprocess)
+        if self.layout:
+            params['layout'] = 'true'
+        if self.min_conf is not None:
+            params['min_conf'] = self.min_conf
+        return params
         
     def check_server_health(self) -> Dict[str, Any]:
         """서버 상태 확인"""
-        response = requests.get(f"{self.server_url}/health")
+        response = self.session.get(f"{self.server_url}/health", timeout=self.timeout)
         response.raise_for_status()
         return response.json()
     
-    def analyze_image(self, image_path: str, lang: str = "eng") -> Dict[str, Any]:
+    def analyze_image(self, image_path: str, lang: str = "eng", preprocess: Optional[str] = None) -> Dict[str, Any]:
         """
         단일 이미지 분석
         
         Args:
             image_path: 이미지 파일 경로
             lang: OCR 언어 (기본값: eng, 한국어: kor, 한국어+영어: kor+eng)
+            preprocess: 서버 전처리 단계 (none, auto 또는 scale,deskew,binarize 조합, None이면 서버 기본값)
             
         Returns:
             분석 결과 딕셔너리
@@ -39,21 +86,23 @@ class ImageAnalysisClient:
         
         with open(image_path, 'rb') as f:
             files = {'file': (os.path.basename(image_path), f, 'image/jpeg')}
-            response = requests.post(
+            response = self.session.post(
                 f"{self.server_url}/analyze/ocr",
                 files=files,
-                params={'lang': lang}
+                params=self._ocr_params(lang, preprocess),
+                timeout=self.timeout
             )
             response.raise_for_status()
             return response.json()
     
-    def analyze_images_batch(self, image_paths: List[str], lang: str = "eng") -> Dict[str, Any]:
+    def analyze_images_batch(self, image_paths: List[str], lang: str = "eng", preprocess: Optional[str] = None) -> Dict[str, Any]:
         """
         여러 이미지 일괄 분석
         
         Args:
             image_paths: 이미지 파일 경로 목록
             lang: OCR 언어 (기본값: eng, 한국어: kor, 한국어+영어: kor+eng)
+            preprocess: 서버 전처리 단계 (none, auto 또는 scale,deskew,binarize 조합, None이면 서버 기본값)
             
         Returns:
             분석 결과 딕셔너리 목록
@@ -70,10 +119,11 @@ class ImageAnalysisClient:
         if not files:
             raise ValueError("분석할 유효한 이미지 파일이 없습니다")
         
-        response = requests.post(
+        response = self.session.post(
             f"{self.server_url}/analyze/ocr/batch",
             files=files,
-            params={'lang': lang}
+            params=self._ocr_params(lang, preprocess),
+            timeout=self.timeout
         )
         
         # 파일 핸들 닫기
@@ -83,26 +133,92 @@ class ImageAnalysisClient:
         response.raise_for_status()
         return response.json()
     
-    def analyze_from_path(self, image_path: str, lang: str = "eng") -> Dict[str, Any]:
+    def analyze_images_stream(self, image_paths: List[str], lang: str = "eng",
+                              preprocess: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        여러 이미지를 일괄 분석하되 끝난 이미지부터 결과를 하나씩 받음 (NDJSON 스트리밍)
+        
+        Args:
+            image_paths: 이미지 파일 경로 목록
+            lang: OCR 언어 (기본값: eng, 한국어: kor, 한국어+영어: kor+eng)
+            preprocess: 서버 전처리 단계 (none, auto 또는 scale,deskew,binarize 조합, None이면 서버 기본값)
+            
+        Yields:
+            완료 순서대로 분석 결과 딕셔너리 ('index'는 전송한 이미지 순번, 마지막은 {"done": True, ...} 요약)
+        """
+        files = []
+        
+        for path in image_paths:
+            if not os.path.exists(path):
+                print(f"경고: 이미지 파일을 찾을 수 없습니다: {path}")
+                continue
+                
+            files.append(('files', (os.path.basename(path), open(path, 'rb'), 'image/jpeg')))
+        
+        if not files:
+            raise ValueError("분석할 유효한 이미지 파일이 없습니다")
+        
+        try:
+            with self.session.post(
+                f"{self.server_url}/analyze/ocr/batch",
+                files=files,
+                params=dict(self._ocr_params(lang, preprocess), stream='true'),
+                timeout=self.timeout,
+                stream=True
+            ) as response:
+                response.raise_for_status()
+                for line in response.iter_lines():
+                    if line:
+                        yield json.loads(line)
+        finally:
+            # 파일 핸들 닫기
+            for _, file_tuple in files:
+                file_tuple[1].close()
+    
+    def analyze_from_path(self, image_path: str, lang: str = "eng", preprocess: Optional[str] = None) -> Dict[str, Any]:
         """
         서버에 있는 이미지 경로로 분석 (서버와 클라이언트가 같은 파일 시스템을 공유할 때 유용)
         
         Args:
             image_path: 서버에 있는 이미지 파일 경로
             lang: OCR 언어 (기본값: eng, 한국어: kor, 한국어+영어: kor+eng)
+            preprocess: 서버 전처리 단계 (none, auto 또는 scale,deskew,binarize 조합, None이면 서버 기본값)
             
         Returns:
             분석 결과 딕셔너리
         """
-        response = requests.post(
+        response = self.session.post(
             f"{self.server_url}/analyze/ocr/from_path",
-            params={'image_path': image_path, 'lang': lang}
+            params=dict(self._ocr_params(lang, preprocess), image_path=image_path),
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        return response.json()
+    
+    def analyze_paths_batch(self, image_paths: List[str], lang: str = "eng", preprocess: Optional[str] = None) -> Dict[str, Any]:
+        """
+        서버와 공유하는 디렉토리(서버의 OCR_SHARED_ROOT)에 있는 여러 이미지를 업로드 없이 경로로 일괄 분석
+        
+        Args:
+            image_paths: 서버에서 접근할 수 있는 이미지 파일 경로 목록
+            lang: OCR 언어 (기본값: eng, 한국어: kor, 한국어+영어: kor+eng)
+            preprocess: 서버 전처리 단계 (none, auto 또는 scale,deskew,binarize 조합, None이면 서버 기본값)
+            
+        Returns:
+            분석 결과 딕셔너리 (입력 순서, 공유 루트 밖의 경로는 항목별 오류)
+        """
+        response = self.session.post(
+            f"{self.server_url}/analyze/ocr/batch/from_paths",
+            json={'paths': [os.path.abspath(path) for path in image_paths]},
+            params=self._ocr_params(lang, preprocess),
+            timeout=self.timeout
         )
         response.raise_for_status()
         return response.json()
     
     def analyze_directory(self, directory_path: str, lang: str = "eng", 
-                          extensions: List[str] = ["jpg", "jpeg", "png", "tiff", "bmp"]) -> Dict[str, Any]:
+                          extensions: List[str] = ["jpg", "jpeg", "png", "tiff", "bmp"],
+                          preprocess: Optional[str] = None) -> Dict[str, Any]:
         """
         디렉토리에 있는 모든 이미지 분석
         
@@ -110,20 +226,148 @@ class ImageAnalysisClient:
             directory_path: 서버에 있는 이미지 디렉토리 경로
             lang: OCR 언어 (기본값: eng, 한국어: kor, 한국어+영어: kor+eng)
             extensions: 처리할 이미지 파일 확장자 목록
+            preprocess: 서버 전처리 단계 (none, auto 또는 scale,deskew,binarize 조합, None이면 서버 기본값)
             
         Returns:
             분석 결과 딕셔너리 목록
         """
-        response = requests.post(
+        response = self.session.post(
             f"{self.server_url}/analyze/ocr/directory",
-            params={
-                'directory_path': directory_path, 
-                'lang': lang,
-                'extensions': extensions
-            }
+            params=dict(
+                self._ocr_params(lang, preprocess),
+                directory_path=directory_path,
+                extensions=extensions
+            ),
+            timeout=self.timeout
         )
         response.raise_for_status()
         return response.json()
+    
+    def submit_directory_job(self, directory_path: str, lang: str = "eng",
+                             extensions: List[str] = ["jpg", "jpeg", "png", "tiff", "bmp"],
+                             preprocess: Optional[str] = None, restart: bool = False) -> Dict[str, Any]:
+        """
+        디렉토리 OCR 작업을 시작합니다 (같은 디렉토리와 옵션으로 다시 제출하면 중단된 작업을 이어서 실행)
+        
+        Args:
+            directory_path: 서버에 있는 이미지 디렉토리 경로
+            lang: OCR 언어 (기본값: eng, 한국어: kor, 한국어+영어: kor+eng)
+            extensions: 처리할 이미지 파일 확장자 목록
+            preprocess: 서버 전처리 단계 (none, auto 또는 scale,deskew,binarize 조합, None이면 서버 기본값)
+            restart: True이면 끝난 작업도 처음부터 다시 실행
+            
+        Returns:
+            작업 상태 딕셔너리 ('job_id', 'status', 'total', 'done' 등)
+        """
+        params = dict(self._ocr_params(lang, preprocess), directory_path=directory_path, extensions=extensions)
+        if restart:
+            params['restart'] = 'true'
+        response = self.session.post(f"{self.server_url}/jobs/ocr/directory", params=params, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+    
+    def job_status(self, job_id: Optional[str] = None) -> Dict[str, Any]:
+        """작업 상태와 진행률 (job_id가 None이면 모든 작업)"""
+        url = f"{self.server_url}/jobs/{job_id}" if job_id else f"{self.server_url}/jobs"
+        response = self.session.get(url, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+    
+    def job_results(self, job_id: str, offset: int = 0, limit: Optional[int] = None) -> Dict[str, Any]:
+        """지금까지 기록된 작업 결과 ('next_offset'을 다음 호출의 offset으로 넘기면 새 결과만 받음)"""
+        params: Dict[str, Any] = {'offset': offset}
+        if limit is not None:
+            params['limit'] = limit
+        response = self.session.get(f"{self.server_url}/jobs/{job_id}/results", params=params, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+    
+    def follow_job(self, job_id: str, offset: int = 0, reconnects: int = 3) -> Iterator[Dict[str, Any]]:
+        """
+        작업 결과를 끝나는 대로 하나씩 받음 (NDJSON 스트리밍, 연결이 끊기면 받은 위치부터 다시 연결)
+        
+        Args:
+            job_id: 작업 ID
+            offset: 건너뛸 결과 수
+            reconnects: 연결이 끊겼을 때 다시 연결할 횟수
+            
+        Yields:
+            끝난 순서대로 결과 딕셔너리 ('index'는 이미지 순번, 마지막은 {"done": True, ...} 요약)
+        """
+        while True:
+            try:
+                with self.session.get(
+                    f"{self.server_url}/jobs/{job_id}/results",
+                    params={'offset': offset, 'stream': 'true'},
+                    timeout=self.timeout,
+                    stream=True
+                ) as response:
+                    response.raise_for_status()
+                    for line in response.iter_lines():
+                        if not line:
+                            continue
+                        item = json.loads(line)
+                        if not item.get("done"):
+                            offset += 1
+                        yield item
+                        if item.get("done"):
+                            return
+            except (requests.exceptions.ConnectionError, requests.exceptions.ChunkedEncodingError):
+                if reconnects <= 0:
+                    raise
+                reconnects -= 1
+                print(f"경고: 작업 결과 연결이 끊겨 {offset}번째 결과부터 다시 받습니다.")
+                time.sleep(1)
+    
+    def cancel_job(self, job_id: str) -> Dict[str, Any]:
+        """작업을 취소합니다 (기록된 결과는 유지되어 다시 제출하면 이어서 실행)"""
+        response = self.session.delete(f"{self.server_url}/jobs/{job_id}", timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+    
+    def analyze_directory_job(self, directory_path: str, lang: str = "eng",
+                              extensions: List[str] = ["jpg", "jpeg", "png", "tiff", "bmp"],
+                              preprocess: Optional[str] = None, restart: bool = False,
+                              progress: bool = False) -> Dict[str, Any]:
+        """
+        디렉토리 OCR 작업을 시작하고 끝날 때까지 결과를 받음 (analyze_directory와 같은 결과 형식)
+        
+        요청 하나로 디렉토리 전체를 기다리지 않으므로 이미지가 많아도 타임아웃되지 않고,
+        중단된 작업은 다시 호출하면 끝난 이미지를 건너뛰고 이어서 실행됩니다.
+        
+        Args:
+            directory_path: 서버에 있는 이미지 디렉토리 경로
+            lang: OCR 언어 (기본값: eng, 한국어: kor, 한국어+영어: kor+eng)
+            extensions: 처리할 이미지 파일 확장자 목록
+            preprocess: 서버 전처리 단계 (none, auto 또는 scale,deskew,binarize 조합, None이면 서버 기본값)
+            restart: True이면 끝난 작업도 처음부터 다시 실행
+            progress: True이면 이미지가 끝날 때마다 진행 상황 출력
+            
+        Returns:
+            분석 결과 딕셔너리 ('results'는 이미지 순번 순서, 'job_id', 'status' 포함)
+        """
+        job = self.submit_directory_job(directory_path, lang, extensions, preprocess, restart)
+        if progress and job.get("resumed"):
+            print(f"작업 {job['job_id']} 이어서 실행: {job['done']}/{job['total']}개 완료")
+        
+        results: Dict[int, Dict[str, Any]] = {}
+        summary: Dict[str, Any] = {}
+        for item in self.follow_job(job['job_id']):
+            if item.get("done"):
+                summary = item
+                break
+            results[item["index"]] = item
+            if progress:
+                status = "오류" if "error" in item else "완료"
+                print(f"[{len(results)}/{job['total']}] {item.get('filename')} {status}")
+        
+        return {
+            "directory": directory_path,
+            "job_id": job['job_id'],
+            "status": summary.get("status"),
+            "results": [results[index] for index in sorted(results)],
+            "file_count": len(results)
+        }
 
 def save_results(results: Dict[str, Any], output_file: str):
     """분석 결과를 JSON 파일로 저장"""
@@ -134,6 +378,8 @@ def save_results(results: Dict[str, Any], output_file: str):
 def main():
     parser = argparse.ArgumentParser(description='PDF 이미지 분석 클라이언트')
     parser.add_argument('--server', default='http://localhost:5000', help='이미지 분석 서버 URL')
+    parser.add_argument('--layout', action='store_true', help='단어 상자, 줄 묶음, 단어별 신뢰도를 함께 받기')
+    parser.add_argument('--min-conf', type=float, help='이 신뢰도(0~100) 미만의 단어를 텍스트에서 제외')
     
     subparsers = parser.add_subparsers(dest='command', help='명령')
     
@@ -141,62 +387,122 @@ def main():
     single_parser = subparsers.add_parser('analyze', help='단일 이미지 분석')
     single_parser.add_argument('image_path', help='이미지 파일 경로')
     single_parser.add_argument('--lang', default='eng', help='OCR 언어 (기본값: eng, 한국어: kor)')
+    single_parser.add_argument('--preprocess', help='서버 전처리 단계 (none, auto 또는 scale,deskew,binarize 조합)')
     single_parser.add_argument('--output', help='결과를 저장할 JSON 파일 경로')
     
     # 여러 이미지 일괄 분석
     batch_parser = subparsers.add_parser('batch', help='여러 이미지 일괄 분석')
     batch_parser.add_argument('image_paths', nargs='+', help='이미지 파일 경로 목록')
     batch_parser.add_argument('--lang', default='eng', help='OCR 언어 (기본값: eng, 한국어: kor)')
+    batch_parser.add_argument('--preprocess', help='서버 전처리 단계 (none, auto 또는 scale,deskew,binarize 조합)')
+    batch_parser.add_argument('--stream', action='store_true', help='끝난 이미지부터 결과를 한 줄씩 출력')
     batch_parser.add_argument('--output', help='결과를 저장할 JSON 파일 경로')
     
     # 서버 경로로 분석
     path_parser = subparsers.add_parser('from_path', help='서버에 있는 이미지 경로로 분석')
     path_parser.add_argument('server_image_path', help='서버에 있는 이미지 파일 경로')
     path_parser.add_argument('--lang', default='eng', help='OCR 언어 (기본값: eng, 한국어: kor)')
+    path_parser.add_argument('--preprocess', help='서버 전처리 단계 (none, auto 또는 scale,deskew,binarize 조합)')
     path_parser.add_argument('--output', help='결과를 저장할 JSON 파일 경로')
     
+    # 서버 경로로 일괄 분석
+    paths_parser = subparsers.add_parser('batch_paths', help='서버와 공유하는 경로의 이미지 일괄 분석 (업로드 없음)')
+    paths_parser.add_argument('server_image_paths', nargs='+', help='서버에서 접근할 수 있는 이미지 파일 경로 목록')
+    paths_parser.add_argument('--lang', default='eng', help='OCR 언어 (기본값: eng, 한국어: kor)')
+    paths_parser.add_argument('--preprocess', help='서버 전처리 단계 (none, auto 또는 scale,deskew,binarize 조합)')
+    paths_parser.add_argument('--output', help='결과를 저장할 JSON 파일 경로')
+    
     # 디렉토리 분석
     dir_parser = subparsers.add_parser('directory', help='디렉토리에 있는 모든 이미지 분석')
     dir_parser.add_argument('directory_path', help='서버에 있는 이미지 디렉토리 경로')
     dir_parser.add_argument('--lang', default='eng', help='OCR 언어 (기본값: eng, 한국어: kor)')
+    dir_parser.add_argument('--preprocess', help='서버 전처리 단계 (none, auto 또는 scale,deskew,binarize 조합)')
+    dir_parser.add_argument('--restart', action='store_true', help='끝난 작업도 처음부터 다시 실행')
+    dir_parser.add_argument('--sync', action='store_true', help='작업 대신 요청 하나로 분석 (이미지가 적은 경우)')
     dir_parser.add_argument('--output', help='결과를 저장할 JSON 파일 경로')
     
+    # 디렉토리 OCR 작업 관리
+    job_parser = subparsers.add_parser('job', help='디렉토리 OCR 작업 상태 확인, 결과 받기, 취소')
+    job_parser.add_argument('action', choices=['list', 'status', 'results', 'follow', 'cancel'], help='작업 명령')
+    job_parser.add_argument('job_id', nargs='?', help='작업 ID (list 제외)')
+    job_parser.add_argument('--offset', type=int, default=0, help='건너뛸 결과 수')
+    job_parser.add_argument('--output', help='결과를 저장할 JSON 파일 경로')
+    
     # 서버 상태 확인
     subparsers.add_parser('health', help='서버 상태 확인')
     
     args = parser.parse_args()
     
-    client = ImageAnalysisClient(server_url=args.server)
+    client = ImageAnalysisClient(server_url=args.server, layout=args.layout, min_conf=args.min_conf)
     
     try:
         if args.command == 'analyze':
-            results = client.analyze_image(args.image_path, args.lang)
+            results = client.analyze_image(args.image_path, args.lang, args.preprocess)
             if args.output:
                 save_results(results, args.output)
             else:
                 print(json.dumps(results, ensure_ascii=False, indent=2))
                 
+        elif args.command == 'batch' and args.stream:
+            results = []
+            for item in client.analyze_images_stream(args.image_paths, args.lang, args.preprocess):
+                print(json.dumps(item, ensure_ascii=False))
+                results.append(item)
+            if args.output:
+                save_results({"results": results}, args.output)
+                
         elif args.command == 'batch':
-            results = client.analyze_images_batch(args.image_paths, args.lang)
+            results = client.analyze_images_batch(args.image_paths, args.lang, args.preprocess)
             if args.output:
                 save_results(results, args.output)
             else:
                 print(json.dumps(results, ensure_ascii=False, indent=2))
                 
         elif args.command == 'from_path':
-            results = client.analyze_from_path(args.server_image_path, args.lang)
+            results = client.analyze_from_path(args.server_image_path, args.lang, args.preprocess)
+            if args.output:
+                save_results(results, args.output)
+            else:
+                print(json.dumps(results, ensure_ascii=False, indent=2))
+                
+        elif args.command == 'batch_paths':
+            results = client.analyze_paths_batch(args.server_image_paths, args.lang, args.preprocess)
             if args.output:
                 save_results(results, args.output)
             else:
                 print(json.dumps(results, ensure_ascii=False, indent=2))
                 
         elif args.command == 'directory':
-            results = client.analyze_directory(args.directory_path, args.lang)
+            if args.sync:
+                results = client.analyze_directory(args.directory_path, args.lang, preprocess=args.preprocess)
+            else:
+                results = client.analyze_directory_job(args.directory_path, args.lang, preprocess=args.preprocess,
+                                                       restart=args.restart, progress=True)
             if args.output:
                 save_results(results, args.output)
             else:
                 print(json.dumps(results, ensure_ascii=False, indent=2))
                 
+        elif args.command == 'job':
+            if args.action != 'list' and not args.job_id:
+                parser.error(f"job {args.action}에는 작업 ID가 필요합니다")
+            if args.action == 'follow':
+                results = []
+                for item in client.follow_job(args.job_id, args.offset):
+                    print(json.dumps(item, ensure_ascii=False))
+                    results.append(item)
+                results = {"results": results}
+            elif args.action == 'results':
+                results = client.job_results(args.job_id, args.offset)
+            elif args.action == 'cancel':
+                results = client.cancel_job(args.job_id)
+            else:
+                results = client.job_status(args.job_id if args.action == 'status' else None)
+            if args.output:
+                save_results(results, args.output)
+            elif args.action != 'follow':
+                print(json.dumps(results, ensure_ascii=False, indent=2))
+                
         elif args.command == 'health' or args.command is None:
             results = client.check_server_health()
             print(f"서버 상태: {results}")
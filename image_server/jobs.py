@@ -0,0 +1,423 @@
+import os
+import re
+import json
+import time
+import fcntl
+import asyncio
+import hashlib
+import logging
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set
+
+logger = logging.getLogger('jobs')
+
+# 디렉토리 OCR 작업의 설정과 결과 매니페스트를 저장할 디렉토리
+OCR_JOBS_DIR = os.getenv("OCR_JOBS_DIR", ".ocr_jobs")
+# 작업 하나가 동시에 OCR할 이미지 수 (0이면 OCR 작업자 프로세스 수, 나머지 대기열 자리는 일반 요청에 남겨 둠)
+OCR_JOB_CONCURRENCY = int(os.getenv("OCR_JOB_CONCURRENCY", "0"))
+# 서버 시작 시 중단된 작업을 이어서 실행할지 여부
+OCR_JOBS_RESUME = os.getenv("OCR_JOBS_RESUME", "1") != "0"
+
+# 작업 상태
+RUNNING = "running"
+COMPLETED = "completed"
+CANCELLED = "cancelled"
+FAILED = "failed"
+INTERRUPTED = "interrupted"  # 실행 중으로 저장되었지만 실행하는 프로세스가 없는 작업 (다시 제출하거나 서버를 재시작하면 이어서 실행)
+
+# 취소 요청(job.json)을 확인하는 간격(초)
+_CANCEL_CHECK_SECONDS = 1.0
+# 결과를 따라 읽을 때 새 결과를 확인하는 간격(초)
+_FOLLOW_POLL_SECONDS = 0.5
+# 새 결과가 없을 때 연결 유지 신호를 보내는 간격(초, 클라이언트 읽기 타임아웃보다 짧아야 함)
+OCR_JOB_KEEPALIVE = float(os.getenv("OCR_JOB_KEEPALIVE", "15"))
+
+_JOB_ID = re.compile(r'[0-9a-f]{16}')
+
+# 작업의 이미지 하나를 OCR하는 함수 (index, path, options) -> 결과 항목 (오류도 결과로 반환)
+OCRFile = Callable[[int, str, Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+
+def make_job_id(directory: str, options: Dict[str, Any], extensions: List[str]) -> str:
+    """
+    디렉토리와 OCR 옵션으로 작업 ID를 만듭니다.
+
+    같은 디렉토리를 같은 옵션으로 다시 제출하면 같은 작업이 되므로, 중단된 작업은 끝난 이미지를 건너뛰고 이어서 실행됩니다.
+    """
+    payload = json.dumps({"directory": directory, "options": options, "extensions": sorted(extensions)}, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def _parse_line(line: bytes) -> Optional[Dict[str, Any]]:
+    """매니페스트 한 줄을 결과 항목으로 읽습니다 (중단된 쓰기로 깨진 줄이면 None)."""
+    if not line.strip():
+        return None
+    try:
+        item = json.loads(line)
+    except ValueError:
+        return None
+    if isinstance(item, dict) and isinstance(item.get("index"), int):
+        return item
+    return None
+
+
+def _append_line(out, item: Dict[str, Any]) -> None:
+    """
+    결과 한 줄을 매니페스트 끝에 추가합니다.
+
+    쓰기가 실패하면 쓰다 만 부분을 잘라 내어, 다음 줄이 깨진 줄 뒤에 이어 붙지 않도록 합니다.
+    out은 버퍼 없이 연 추가 모드 파일이어야 합니다.
+    """
+    line = (json.dumps(item, ensure_ascii=False) + "\n").encode('utf-8')
+    pos = os.fstat(out.fileno()).st_size
+    try:
+        out.write(line)
+    except OSError:
+        os.ftruncate(out.fileno(), pos)
+        raise
+
+
+class _Manifest:
+    """
+    작업 결과 매니페스트(이미지 하나당 한 줄의 JSON Lines)를 이어 읽는 색인
+
+    파일 끝까지 한 번 읽은 뒤에는 새로 추가된 부분만 읽으며, 줄마다 시작 위치를 기억해 offset부터 바로 읽을 수 있습니다.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.offsets: List[int] = []  # 결과 줄마다 파일 안의 시작 위치(바이트)
+        self.done: Set[int] = set()  # 결과가 기록된 이미지 순번
+        self.errors = 0
+        self._pos = 0  # 마지막으로 읽은 완전한 줄의 끝 위치
+
+    def scan(self) -> None:
+        """파일에 새로 추가된 완전한 줄을 읽어 색인을 갱신합니다 (쓰는 중인 마지막 줄은 다음에 읽음)."""
+        try:
+            with open(self.path, 'rb') as f:
+                f.seek(self._pos)
+                data = f.read()
+        except FileNotFoundError:
+            return
+        start = 0
+        while True:
+            end = data.find(b'\n', start)
+            if end < 0:
+                break
+            # 중단된 쓰기로 깨진 줄은 결과가 없는 것으로 보고 건너뜀
+            item = _parse_line(data[start:end])
+            if item is not None:
+                self.offsets.append(self._pos + start)
+                self.done.add(item["index"])
+                self.errors += "error" in item
+            start = end + 1
+        self._pos += start
+
+    def truncate_partial(self) -> None:
+        """이전 실행이 쓰다 만 마지막 줄을 잘라 냅니다 (이어 쓰기 전에 호출)."""
+        self.scan()
+        if os.path.exists(self.path) and os.path.getsize(self.path) > self._pos:
+            os.truncate(self.path, self._pos)
+
+    def read(self, offset: int, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """offset번째 결과 줄부터 limit개를 읽습니다 (사이에 있는 깨진 줄은 scan과 같이 건너뜀)."""
+        offsets = self.offsets[offset:] if limit is None else self.offsets[offset:offset + limit]
+        if not offsets:
+            return []
+        end = self.offsets[offset + len(offsets)] if offset + len(offsets) < len(self.offsets) else self._pos
+        with open(self.path, 'rb') as f:
+            f.seek(offsets[0])
+            data = f.read(end - offsets[0])
+        items = [_parse_line(line) for line in data.split(b'\n')]
+        return [item for item in items if item is not None]
+
+
+class JobManager:
+    """
+    공유 디렉토리의 이미지를 백그라운드에서 OCR하는 작업 관리자
+
+    작업마다 설정(job.json)과 결과 매니페스트(results.jsonl)를 디스크에 저장하고, 이미지가 끝날 때마다 결과를 한 줄씩 추가합니다.
+    서버가 재시작되거나 작업이 취소되어도 같은 작업을 다시 실행하면 매니페스트에 기록된 이미지는 건너뜁니다.
+    실행 중인 작업은 잠금 파일(lockf)로 표시하므로 여러 uvicorn 작업자 프로세스가 같은 작업 디렉토리를 공유해도
+    작업은 한 프로세스에서만 실행되고, 상태와 결과는 어느 프로세스에서나 조회할 수 있습니다.
+    """
+
+    def __init__(self, ocr_file: OCRFile, jobs_dir: str = OCR_JOBS_DIR, concurrency: int = 1):
+        """
+        Args:
+            ocr_file: 이미지 하나를 OCR하는 코루틴 함수 (index, path, options) -> 결과 항목
+            jobs_dir: 작업 디렉토리
+            concurrency: 작업 하나가 동시에 OCR할 이미지 수
+        """
+        self.ocr_file = ocr_file
+        self.jobs_dir = jobs_dir
+        self.concurrency = max(1, concurrency)
+        os.makedirs(self.jobs_dir, exist_ok=True)
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._manifests: Dict[str, _Manifest] = {}
+
+    def _path(self, job_id: str, name: str) -> str:
+        return os.path.join(self.jobs_dir, job_id, name)
+
+    def _manifest(self, job_id: str) -> _Manifest:
+        manifest = self._manifests.get(job_id)
+        if manifest is None:
+            manifest = self._manifests[job_id] = _Manifest(self._path(job_id, "results.jsonl"))
+        manifest.scan()
+        return manifest
+
+    def _load(self, job_id: str) -> Optional[Dict[str, Any]]:
+        if not _JOB_ID.fullmatch(job_id):
+            return None
+        try:
+            with open(self._path(job_id, "job.json"), encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _save(self, job: Dict[str, Any]) -> None:
+        job["updated"] = time.time()
+        path = self._path(job["job_id"], "job.json")
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(job, f, ensure_ascii=False)
+        os.replace(temp_path, path)
+
+    def _try_lock(self, job_id: str) -> Optional[int]:
+        """작업 실행 잠금을 얻습니다 (다른 곳에서 실행 중이면 None, 프로세스가 끝나면 잠금도 풀림)."""
+        fd = os.open(self._path(job_id, "lock"), os.O_CREAT | os.O_RDWR, 0o644)
+        try:
+            # flock과 달리 lockf 잠금은 나중에 fork되는 OCR 작업자 프로세스에 상속되지 않음
+            fcntl.lockf(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return None
+        return fd
+
+    def _is_running(self, job_id: str) -> bool:
+        # lockf 잠금은 같은 프로세스에서는 충돌하지 않고 파일을 닫으면 풀리므로, 이 프로세스의 작업은 잠금을 확인하지 않음
+        if job_id in self._tasks:
+            return True
+        fd = self._try_lock(job_id)
+        if fd is None:
+            return True
+        os.close(fd)
+        return False
+
+    def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        작업 상태와 진행률을 반환합니다.
+
+        Returns:
+            {"job_id", "directory", "status", "total", "done", "errors", "options", "created", "finished"}
+            (작업이 없으면 None)
+        """
+        job = self._load(job_id)
+        if job is None:
+            return None
+        return self._status(job)
+
+    def _status(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        status = job["status"]
+        if status == RUNNING and not self._is_running(job["job_id"]):
+            status = INTERRUPTED
+        manifest = self._manifest(job["job_id"])
+        result = {
+            "job_id": job["job_id"],
+            "directory": job["directory"],
+            "status": status,
+            "total": len(job["files"]),
+            "done": len(manifest.done),
+            "errors": manifest.errors,
+            "options": job["options"],
+            "created": job["created"],
+            "finished": job.get("finished")
+        }
+        if job.get("error"):
+            result["error"] = job["error"]
+        return result
+
+    def list_jobs(self) -> List[Dict[str, Any]]:
+        """모든 작업의 상태 (최근에 만든 작업부터)"""
+        jobs = [self._load(job_id) for job_id in os.listdir(self.jobs_dir)]
+        return [self._status(job) for job in sorted(filter(None, jobs), key=lambda job: job["created"], reverse=True)]
+
+    def submit(
+        self,
+        job_id: str,
+        directory: str,
+        files: List[str],
+        options: Dict[str, Any],
+        extensions: List[str],
+        restart: bool = False
+    ) -> Dict[str, Any]:
+        """
+        작업을 시작하거나 중단된 작업을 이어서 실행합니다.
+
+        이미 실행 중인 작업은 상태만 반환하고, 끝난 작업은 restart가 아니면 다시 실행하지 않습니다.
+        이어서 실행하는 작업은 처음 제출할 때의 이미지 목록을 그대로 사용합니다.
+
+        Args:
+            job_id: 작업 ID (make_job_id)
+            directory: 요청된 디렉토리 경로
+            files: OCR할 이미지 경로 목록
+            options: ocr_file에 넘길 OCR 옵션
+            extensions: 처리할 이미지 확장자 (기록용)
+            restart: True이면 이전 결과를 지우고 처음부터 다시 실행
+
+        Returns:
+            작업 상태 (이전 결과를 이어서 실행하는 경우 "resumed": True)
+        """
+        os.makedirs(os.path.join(self.jobs_dir, job_id), exist_ok=True)
+        if self._is_running(job_id):
+            return self.status(job_id)
+
+        job = self._load(job_id)
+        if job is not None and job["status"] == COMPLETED and not restart:
+            return self.status(job_id)
+
+        fd = self._try_lock(job_id)
+        if fd is None:
+            # 다른 프로세스가 방금 같은 작업을 시작한 경우
+            return self.status(job_id)
+
+        manifest = self._manifest(job_id)
+        if job is None or restart:
+            job = {
+                "job_id": job_id,
+                "directory": directory,
+                "files": files,
+                "options": options,
+                "extensions": extensions,
+                "created": time.time()
+            }
+            if os.path.exists(manifest.path):
+                os.remove(manifest.path)
+            manifest = self._manifests[job_id] = _Manifest(manifest.path)
+        resumed = bool(manifest.done)
+        job.update(status=RUNNING, finished=None, error=None)
+        self._save(job)
+
+        task = asyncio.create_task(self._run(job, fd))
+        self._tasks[job_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job_id, None))
+        if resumed:
+            logger.info(f"OCR 작업 {job_id} 이어서 실행: {directory} ({len(manifest.done)}/{len(job['files'])}개 완료)")
+        else:
+            logger.info(f"OCR 작업 {job_id} 시작: {directory} (이미지 {len(job['files'])}개)")
+        return dict(self.status(job_id), resumed=resumed)
+
+    async def _run(self, job: Dict[str, Any], fd: int) -> None:
+        """매니페스트에 없는 이미지를 concurrency개씩 동시에 OCR하고 끝나는 대로 결과를 기록합니다."""
+        job_id = job["job_id"]
+        files = job["files"]
+        cancelled = False
+        start_time = time.time()
+        try:
+            manifest = self._manifests[job_id]
+            # 이어 쓰기 전에 이전 실행이 쓰다 만 마지막 줄을 잘라 냄 (manifest._pos까지)
+            manifest.truncate_partial()
+            pending = iter([index for index in range(len(files)) if index not in manifest.done])
+            last_check = time.time()
+
+            with open(manifest.path, 'ab', buffering=0) as out:
+                async def worker() -> None:
+                    nonlocal cancelled, last_check
+                    # 모든 worker가 같은 반복자에서 다음 이미지를 가져감
+                    for index in pending:
+                        if cancelled:
+                            return
+                        if time.time() - last_check >= _CANCEL_CHECK_SECONDS:
+                            # 취소 요청은 어느 프로세스에서 받았든 job.json으로 전달됨
+                            last_check = time.time()
+                            saved = self._load(job_id)
+                            if saved is not None and saved["status"] == CANCELLED:
+                                cancelled = True
+                                return
+                        item = await self.ocr_file(index, files[index], job["options"])
+                        _append_line(out, item)
+
+                await asyncio.gather(*[worker() for _ in range(self.concurrency)])
+
+            if cancelled:
+                logger.info(f"OCR 작업 {job_id} 취소됨")
+                return
+            manifest.scan()
+            job.update(status=COMPLETED, finished=time.time())
+            self._save(job)
+            logger.info(f"OCR 작업 {job_id} 완료: 이미지 {len(files)}개 (오류 {manifest.errors}개, "
+                        f"이번 실행 {time.time() - start_time:.1f}초)")
+        except asyncio.CancelledError:
+            # 취소 요청이 아니면(서버 종료 등) 실행 중 상태로 남겨 두어 다음에 이어서 실행
+            raise
+        except Exception as e:
+            logger.error(f"OCR 작업 {job_id} 실패: {str(e)}")
+            job.update(status=FAILED, finished=time.time(), error=str(e))
+            self._save(job)
+        finally:
+            os.close(fd)
+
+    def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        작업을 취소합니다 (처리 중인 이미지는 끝까지 처리, 기록된 결과는 유지되어 다시 제출하면 이어서 실행).
+
+        Returns:
+            작업 상태 (작업이 없으면 None)
+        """
+        job = self._load(job_id)
+        if job is None:
+            return None
+        if job["status"] == RUNNING:
+            # 실행 중인 프로세스(이 프로세스 포함)는 job.json에서 취소 상태를 확인하고 다음 이미지부터 멈춤
+            job.update(status=CANCELLED, finished=time.time())
+            self._save(job)
+        return self.status(job_id)
+
+    async def follow(self, job_id: str, offset: int = 0) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """
+        offset번째 결과부터 기록되는 대로 결과를 하나씩 반환하고, 작업이 끝나면 마지막에 요약을 반환합니다.
+
+        이미지 하나가 오래 걸려 새 결과가 없으면 OCR_JOB_KEEPALIVE초마다 None을 반환합니다
+        (스트리밍 응답에서 빈 줄로 보내 클라이언트 읽기 타임아웃을 막음).
+
+        Yields:
+            결과 항목 또는 연결 유지용 None, 마지막은 {"done": True, "status", "total", "count", "errors"}
+        """
+        last_sent = time.time()
+        while True:
+            running = self._is_running(job_id)
+            manifest = self._manifest(job_id)
+            for item in await asyncio.to_thread(manifest.read, offset):
+                offset += 1
+                last_sent = time.time()
+                yield item
+            if not running:
+                status = self.status(job_id)
+                yield {"done": True, "status": status["status"], "total": status["total"],
+                       "count": status["done"], "errors": status["errors"]}
+                return
+            if time.time() - last_sent >= OCR_JOB_KEEPALIVE:
+                last_sent = time.time()
+                yield None
+            await asyncio.sleep(_FOLLOW_POLL_SECONDS)
+
+    def results(self, job_id: str, offset: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """offset번째부터 limit개의 결과 항목 (기록된 순서)"""
+        return self._manifest(job_id).read(offset, limit)
+
+    def resume_interrupted(self) -> None:
+        """실행 중 상태로 남아 있는 작업(서버 종료 등으로 중단된 작업)을 이어서 실행합니다."""
+        for job_id in os.listdir(self.jobs_dir):
+            job = self._load(job_id)
+            if job is not None and job["status"] == RUNNING and not self._is_running(job_id):
+                self.submit(job_id, job["directory"], job["files"], job["options"], job.get("extensions", []))
+
+    async def close(self) -> None:
+        """실행 중인 작업을 멈춥니다 (상태는 실행 중으로 남아 다음 서버 시작 시 이어서 실행)."""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """이 프로세스에서 실행 중인 작업"""
+        return {"running": list(self._tasks), "concurrency": self.concurrency}
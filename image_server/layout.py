@@ -0,0 +1,111 @@
+from typing import Any, Dict, List, Optional
+
+# Tesseract TSV(image_to_data) 열 이름 (tesserocr GetTSVText 출력에는 머리글이 없음)
+TSV_COLUMNS = ('level', 'page_num', 'block_num', 'par_num', 'line_num', 'word_num',
+               'left', 'top', 'width', 'height', 'conf', 'text')
+# image_to_data 결과에서 단어 항목의 level 값
+WORD_LEVEL = 5
+
+
+def parse_tsv(tsv: str) -> Dict[str, List[Any]]:
+    """
+    Tesseract TSV 출력을 pytesseract image_to_data(Output.DICT)와 같은 열 딕셔너리로 변환합니다.
+
+    머리글 줄이 있으면 건너뜁니다.
+    """
+    data: Dict[str, List[Any]] = {name: [] for name in TSV_COLUMNS}
+    for row in tsv.splitlines():
+        fields = row.split('\t')
+        if len(fields) < len(TSV_COLUMNS) - 1 or fields[0] == 'level':
+            continue
+        fields += [''] * (len(TSV_COLUMNS) - len(fields))
+        for name, value in zip(TSV_COLUMNS, fields):
+            data[name].append(value if name == 'text' else float(value) if name == 'conf' else int(value))
+    return data
+
+
+def build_layout(data: Dict[str, List[Any]]) -> Dict[str, Any]:
+    """
+    image_to_data 결과에서 단어 상자, 줄 묶음, 단어별 신뢰도를 열(배열) 단위의 간결한 형식으로 만듭니다.
+
+    단어마다 딕셔너리를 만드는 대신 속성별 배열을 사용하므로 단어가 많은 이미지도 응답과 캐시가 작습니다.
+
+    Args:
+        data: image_to_data(Output.DICT) 또는 parse_tsv 결과
+
+    Returns:
+        {"words": {"text", "conf", "left", "top", "width", "height", "line"},
+         "lines": {"block", "par", "left", "top", "width", "height"}}
+        (words.line은 lines 배열의 인덱스, 줄 상자는 줄에 속한 단어 상자를 모두 포함하는 사각형)
+    """
+    words: Dict[str, List[Any]] = {name: [] for name in ('text', 'conf', 'left', 'top', 'width', 'height', 'line')}
+    lines: Dict[str, List[int]] = {name: [] for name in ('block', 'par', 'left', 'top', 'width', 'height')}
+    line_index: Dict[tuple, int] = {}
+
+    for i, level in enumerate(data.get('level', [])):
+        text = str(data['text'][i]).strip()
+        if int(level) != WORD_LEVEL or not text:
+            continue
+        left, top, width, height = (int(data[name][i]) for name in ('left', 'top', 'width', 'height'))
+        key = (int(data['page_num'][i]), int(data['block_num'][i]), int(data['par_num'][i]), int(data['line_num'][i]))
+        line = line_index.get(key)
+        if line is None:
+            line = line_index[key] = len(lines['block'])
+            lines['block'].append(key[1])
+            lines['par'].append(key[2])
+            lines['left'].append(left)
+            lines['top'].append(top)
+            lines['width'].append(width)
+            lines['height'].append(height)
+        else:
+            right = max(lines['left'][line] + lines['width'][line], left + width)
+            bottom = max(lines['top'][line] + lines['height'][line], top + height)
+            lines['left'][line] = min(lines['left'][line], left)
+            lines['top'][line] = min(lines['top'][line], top)
+            lines['width'][line] = right - lines['left'][line]
+            lines['height'][line] = bottom - lines['top'][line]
+
+        words['text'].append(text)
+        words['conf'].append(round(float(data['conf'][i]), 2))
+        words['left'].append(left)
+        words['top'].append(top)
+        words['width'].append(width)
+        words['height'].append(height)
+        words['line'].append(line)
+
+    return {"words": words, "lines": lines}
+
+
+def filter_layout(layout: Dict[str, Any], min_conf: float) -> Dict[str, Any]:
+    """신뢰도가 min_conf 미만인 단어를 뺀 레이아웃을 반환합니다 (줄 목록과 인덱스는 그대로 유지)."""
+    words = layout["words"]
+    keep = [i for i, conf in enumerate(words['conf']) if conf >= min_conf]
+    return {
+        "words": {name: [values[i] for i in keep] for name, values in words.items()},
+        "lines": layout["lines"]
+    }
+
+
+def layout_text(layout: Dict[str, Any]) -> str:
+    """레이아웃의 단어를 줄 단위로 이어 텍스트로 만듭니다 (문단이 바뀌면 빈 줄로 구분, 단어가 없는 줄은 생략)."""
+    words = layout["words"]
+    lines = layout["lines"]
+    line_words: Dict[int, List[str]] = {}
+    for text, line in zip(words['text'], words['line']):
+        line_words.setdefault(line, []).append(text)
+
+    output: List[str] = []
+    previous_par: Optional[tuple] = None
+    for line in sorted(line_words):
+        par = (lines['block'][line], lines['par'][line])
+        if previous_par is not None and par != previous_par:
+            output.append('')
+        output.append(' '.join(line_words[line]))
+        previous_par = par
+    return '\n'.join(output)
+
+
+def mean_confidence(layout: Dict[str, Any]) -> float:
+    """단어 신뢰도(0~100)의 평균 (단어가 없으면 0.0)"""
+    confs = layout["words"]['conf']
+    return round(sum(confs) / len(confs), 2) if confs else 0.0
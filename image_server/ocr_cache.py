@@ -0,0 +1,198 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, Iterable, Optional
+
+logger = logging.getLogger('ocr_cache')
+
+# 저장할 때마다 사용량을 이 횟수마다 DB에서 다시 읽음 (여러 작업자 프로세스가 같은 캐시를 공유하는 경우 한도 유지)
+SYNC_EVERY_PUTS = 32
+
+# 캐시 항목 형식 버전 (OCR 결과 형식이나 전처리 방식이 바뀌면 올려서 기존 항목을 무효화)
+CACHE_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ocr_results (
+    key TEXT PRIMARY KEY,
+    result TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ocr_results_last_access ON ocr_results (last_access);
+"""
+
+
+def hash_bytes(contents: bytes) -> str:
+    """이미지 바이트의 SHA-256 해시"""
+    return hashlib.sha256(contents).hexdigest()
+
+
+def hash_file(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """이미지 파일 내용의 SHA-256 해시"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(chunk_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class OCRCache:
+    """
+    이미지 내용 해시와 OCR 옵션(언어, 전처리 단계 등)을 키로 하는 SQLite 기반 OCR 결과 캐시
+
+    같은 문서를 다시 처리하거나 여러 업로드에 같은 그림이 들어 있어도 Tesseract를 다시 실행하지 않습니다.
+    항목 수나 전체 크기가 한도를 넘으면 가장 오래 사용하지 않은 항목부터 삭제합니다.
+    여러 uvicorn 작업자 프로세스가 같은 캐시 디렉토리를 공유해도 되며, 한도는 DB의 실제 사용량 기준으로 지킵니다.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None
+    ):
+        """
+        초기화 함수
+
+        Args:
+            cache_dir: 캐시 디렉토리 (None인 경우 OCR_CACHE_DIR 환경변수 또는 .ocr_cache)
+            max_entries: 보관할 최대 결과 수
+            max_bytes: 저장된 결과 전체 최대 크기(바이트)
+        """
+        self.cache_dir = cache_dir or os.getenv("OCR_CACHE_DIR", ".ocr_cache")
+        self.max_entries = max_entries if max_entries is not None else int(os.getenv("OCR_CACHE_MAX_ENTRIES", "100000"))
+        self.max_bytes = max_bytes if max_bytes is not None else int(os.getenv("OCR_CACHE_MAX_MB", "512")) * 1024 * 1024
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        # 여러 uvicorn 작업자 프로세스가 같은 파일을 공유하므로 쓰기 잠금을 기다릴 시간을 넉넉히 둠
+        self._db = sqlite3.connect(os.path.join(self.cache_dir, "ocr_cache.sqlite3"), timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._sync_usage()
+        self._puts = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        logger.info(f"OCR 캐시 초기화 완료 (경로: {self.cache_dir}, 항목 {self._entries}개, "
+                    f"최대 {self.max_entries}개, {self.max_bytes // (1024 * 1024)} MB)")
+
+    @staticmethod
+    def make_key(image_hash: str, lang: str, steps: Iterable[str], **options: Any) -> str:
+        """
+        이미지 해시와 OCR 옵션으로 캐시 키를 생성합니다.
+
+        Args:
+            image_hash: 이미지 내용의 SHA-256 해시
+            lang: OCR 언어
+            steps: 전처리 단계
+            options: 결과에 영향을 주는 기타 옵션
+
+        Returns:
+            캐시 키 (16진수 문자열)
+        """
+        payload = json.dumps(
+            {"version": CACHE_VERSION, "image": image_hash, "lang": lang, "steps": list(steps), "options": options},
+            sort_keys=True
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        캐시된 OCR 결과를 조회합니다 (LRU 판단을 위해 마지막 사용 시간 갱신).
+
+        Returns:
+            OCR 결과 딕셔너리 또는 None (미스)
+        """
+        with self._lock:
+            row = self._db.execute("SELECT result FROM ocr_results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE ocr_results SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._db.commit()
+            self.hits += 1
+        try:
+            return json.loads(row[0])
+        except ValueError:
+            return None
+
+    def put(self, key: str, result: Dict[str, Any]) -> None:
+        """OCR 결과를 저장하고 한도를 넘으면 오래 사용하지 않은 항목을 삭제합니다."""
+        payload = json.dumps(result, ensure_ascii=False)
+        size = len(payload.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            previous = self._db.execute("SELECT size FROM ocr_results WHERE key = ?", (key,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO ocr_results (key, result, size, created, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, payload, size, now, now)
+            )
+            if previous is None:
+                self._entries += 1
+            else:
+                self._bytes -= previous[0]
+            self._bytes += size
+            self._puts += 1
+            if self._puts % SYNC_EVERY_PUTS == 0 or self._entries > self.max_entries or self._bytes > self.max_bytes:
+                # 다른 작업자 프로세스가 추가하거나 삭제한 항목까지 반영한 실제 사용량으로 판단
+                self._sync_usage()
+            self._evict()
+            self._db.commit()
+
+    def _sync_usage(self) -> None:
+        """저장된 항목 수와 전체 크기를 DB에서 다시 읽습니다 (잠금 안에서 호출)."""
+        self._entries, self._bytes = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM ocr_results").fetchone()
+
+    def _evict(self) -> None:
+        """항목 수, 전체 크기 한도를 넘으면 마지막 사용 시간이 오래된 항목부터 삭제합니다 (잠금 안에서 호출)."""
+        while self._entries > self.max_entries or self._bytes > self.max_bytes:
+            # 한 번에 조금 넉넉히 지워서 한도 근처에서 매번 삭제 쿼리가 실행되지 않도록 함
+            batch = max(1, self._entries - self.max_entries, self._entries // 100)
+            rows = self._db.execute(
+                "SELECT key, size FROM ocr_results ORDER BY last_access LIMIT ?", (batch,)
+            ).fetchall()
+            if not rows:
+                break
+            self._db.executemany("DELETE FROM ocr_results WHERE key = ?", [(row[0],) for row in rows])
+            self._entries -= len(rows)
+            self._bytes -= sum(row[1] for row in rows)
+            self.evictions += len(rows)
+
+    def clear(self) -> None:
+        """모든 캐시 항목을 삭제합니다."""
+        with self._lock:
+            self._db.execute("DELETE FROM ocr_results")
+            self._db.commit()
+            self._entries = 0
+            self._bytes = 0
+        logger.info("OCR 캐시를 비웠습니다.")
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """캐시 적중/미스 횟수(이 프로세스 기준)와 사용량"""
+        with self._lock:
+            self._sync_usage()
+        lookups = self.hits + self.misses
+        return {
+            "entries": self._entries,
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions
+        }
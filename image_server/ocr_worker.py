@@ -0,0 +1,269 @@
+import io
+import os
+import time
+import atexit
+import asyncio
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pytesseract
+from PIL import Image
+
+try:
+    # 선택 의존성: --ocr-backend tesserocr 사용 시에만 필요
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
+# 내부 모듈 임포트
+from layout import build_layout, layout_text, mean_confidence, parse_tsv
+from preprocess import TARGET_DPI, preprocess_image
+
+logger = logging.getLogger('ocr_worker')
+
+# OCR 작업자 프로세스 수 (0이면 CPU 수)
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", "0")) or os.cpu_count() or 1
+# 작업자 하나당 대기열에 쌓아 둘 수 있는 작업 수 (업로드된 이미지가 메모리에 무한히 쌓이지 않도록 제한)
+OCR_QUEUE_PER_WORKER = int(os.getenv("OCR_QUEUE_PER_WORKER", "4"))
+
+# OCR 엔진
+# - pytesseract: 요청마다 tesseract 프로세스를 새로 실행 (언어 데이터도 매번 다시 로드)
+# - tesserocr: 작업자 프로세스마다 언어별 Tesseract 엔진을 한 번 만들어 계속 재사용
+OCR_BACKENDS = ('pytesseract', 'tesserocr')
+OCR_BACKEND = os.getenv("OCR_BACKEND", "pytesseract").strip().lower()
+# 작업자 시작 시 미리 로드할 언어 (쉼표로 구분, tesserocr 백엔드에서만 사용)
+OCR_PRELOAD_LANGS = [lang.strip() for lang in os.getenv("OCR_PRELOAD_LANGS", "kor+eng,eng").split(',') if lang.strip()]
+
+# 작업자 프로세스의 OCR 엔진 설정과 언어별 tesserocr 엔진 (프로세스마다 따로 보관)
+_backend = OCR_BACKEND
+_engines: Dict[str, Any] = {}
+
+
+def check_backend(backend: str) -> None:
+    """
+    OCR 엔진 이름과 의존성을 확인합니다.
+
+    Raises:
+        ValueError: 알 수 없는 엔진 이름
+        RuntimeError: tesserocr가 설치되지 않은 경우
+    """
+    if backend not in OCR_BACKENDS:
+        raise ValueError(f"알 수 없는 OCR 백엔드: {backend} (사용 가능: {', '.join(OCR_BACKENDS)})")
+    if backend == 'tesserocr' and tesserocr is None:
+        raise RuntimeError("tesserocr 백엔드를 사용하려면 tesserocr 패키지를 설치하세요 (pip install tesserocr)")
+
+
+def _engine(lang: str) -> Any:
+    """언어별 tesserocr 엔진을 반환합니다 (처음 요청한 언어는 이때 언어 데이터를 로드)."""
+    api = _engines.get(lang)
+    if api is None:
+        kwargs = {'lang': lang}
+        if os.getenv("TESSDATA_PREFIX"):
+            kwargs['path'] = os.environ["TESSDATA_PREFIX"]
+        api = tesserocr.PyTessBaseAPI(**kwargs)
+        _engines[lang] = api
+        logger.info(f"Tesseract 엔진 로드 완료 (pid {os.getpid()}, 언어 {lang})")
+    return api
+
+
+def _end_engines() -> None:
+    for api in _engines.values():
+        api.End()
+    _engines.clear()
+
+
+def _init_worker(backend: str = OCR_BACKEND, preload_langs: Tuple[str, ...] = ()) -> None:
+    """
+    작업자 프로세스 초기화
+
+    Tesseract 내부 스레드는 1개로 제한하여 프로세스끼리 코어를 나누어 쓰게 하고,
+    tesserocr 백엔드는 자주 쓰는 언어의 엔진을 미리 만들어 첫 요청부터 언어 데이터 로드 시간이 들지 않게 합니다.
+    """
+    global _backend
+    os.environ["OMP_THREAD_LIMIT"] = "1"
+    _backend = backend
+    if backend == 'tesserocr':
+        atexit.register(_end_engines)
+        for lang in preload_langs:
+            try:
+                _engine(lang)
+            except Exception as e:
+                logger.warning(f"Tesseract 엔진 미리 로드 실패 (언어 {lang}): {str(e)}")
+
+
+def _recognize(image: Image.Image, lang: str, dpi: Optional[int] = None, layout: bool = False) -> Any:
+    """
+    설정된 OCR 엔진으로 이미지의 텍스트를 인식합니다.
+
+    Returns:
+        인식된 텍스트 (layout=True이면 image_to_data(Output.DICT) 형식의 단어 단위 결과)
+    """
+    if _backend == 'tesserocr':
+        api = _engine(lang)
+        # 0이면 이미지 정보나 추정값 사용 (이전 요청의 DPI 설정이 남지 않도록 매번 지정)
+        api.SetVariable("user_defined_dpi", str(dpi or 0))
+        api.SetImage(image)
+        try:
+            return parse_tsv(api.GetTSVText(0)) if layout else api.GetUTF8Text()
+        finally:
+            api.Clear()
+
+    config = f"--dpi {dpi}" if dpi else ""
+    if layout:
+        return pytesseract.image_to_data(image, lang=lang, config=config, output_type=pytesseract.Output.DICT)
+    return pytesseract.image_to_string(image, lang=lang, config=config)
+
+
+def run_ocr(image: Image.Image, lang: str, steps: Tuple[str, ...] = (), layout: bool = False) -> Dict[str, Any]:
+    """
+    (필요한 경우 전처리 후) Tesseract OCR을 수행합니다.
+
+    layout=True이면 한 번의 인식(image_to_data)으로 단어 상자, 줄 묶음, 단어별 신뢰도를 함께 구하고
+    텍스트도 그 결과에서 만듭니다 (OCR을 두 번 실행하지 않음).
+
+    Returns:
+        {"text", "preprocess"} 딕셔너리 (전처리하지 않은 경우 preprocess는 None,
+        layout=True이면 "layout"과 평균 단어 신뢰도 "confidence" 추가)
+    """
+    info = None
+    dpi = None
+    if steps:
+        image, info = preprocess_image(image, steps)
+        # 글자 높이를 300 DPI 기준에 맞췄으므로 Tesseract가 해상도를 추측하지 않도록 알려줌
+        dpi = TARGET_DPI if 'scale' in steps else None
+
+    if not layout:
+        return {"text": _recognize(image, lang, dpi), "preprocess": info}
+
+    words = build_layout(_recognize(image, lang, dpi, layout=True))
+    return {"text": layout_text(words), "preprocess": info, "layout": words, "confidence": mean_confidence(words)}
+
+
+def ocr_bytes(contents: bytes, lang: str, steps: Tuple[str, ...] = (), layout: bool = False) -> Dict[str, Any]:
+    """업로드된 이미지 바이트를 디코딩하여 OCR합니다 (작업자 프로세스에서 실행)."""
+    start_time = time.time()
+    with Image.open(io.BytesIO(contents)) as image:
+        result = run_ocr(image, lang, steps, layout)
+    result["ocr_time_seconds"] = time.time() - start_time
+    return result
+
+
+def ocr_path(image_path: str, lang: str, steps: Tuple[str, ...] = (), layout: bool = False) -> Dict[str, Any]:
+    """서버 로컬 경로의 이미지를 OCR합니다 (작업자 프로세스에서 실행)."""
+    start_time = time.time()
+    with Image.open(image_path) as image:
+        result = run_ocr(image, lang, steps, layout)
+    result["ocr_time_seconds"] = time.time() - start_time
+    return result
+
+
+class OCRWorkerPool:
+    """
+    Tesseract OCR을 이벤트 루프 밖의 프로세스 풀에서 실행하는 클래스
+
+    OCR과 전처리는 CPU를 오래 쓰므로 요청 핸들러에서 직접 호출하면 이벤트 루프 전체(/health 포함)가 멈춥니다.
+    작업은 프로세스 풀에 넘기고, 대기 중인 작업 수는 작업자 수 × OCR_QUEUE_PER_WORKER로 제한합니다.
+    """
+
+    def __init__(
+        self,
+        workers: int = OCR_WORKERS,
+        queue_per_worker: int = OCR_QUEUE_PER_WORKER,
+        backend: str = OCR_BACKEND,
+        preload_langs: Optional[List[str]] = None
+    ):
+        """
+        Args:
+            workers: 작업자 프로세스 수
+            queue_per_worker: 작업자 하나당 대기열에 쌓아 둘 수 있는 작업 수
+            backend: OCR 엔진 (pytesseract 또는 tesserocr)
+            preload_langs: 작업자 시작 시 엔진을 미리 만들어 둘 언어 (None이면 OCR_PRELOAD_LANGS)
+        """
+        check_backend(backend)
+        self.backend = backend
+        self.preload_langs = tuple(OCR_PRELOAD_LANGS if preload_langs is None else preload_langs)
+        self.workers = max(1, workers)
+        self.max_pending = self.workers * max(1, queue_per_worker)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.queued = 0  # 대기열 자리를 기다리는 작업 수
+        self.submitted = 0  # 프로세스 풀에 넘긴 작업 수 (실행 중 + 풀 내부 대기)
+        self.completed = 0
+        self.failed = 0
+
+    def start(self) -> None:
+        """프로세스 풀을 시작합니다 (이벤트 루프 안에서 호출)."""
+        if self._executor is None:
+            self._executor = self._new_executor()
+            self._slots = asyncio.Semaphore(self.max_pending)
+            logger.info(f"OCR 작업자 풀 시작: 프로세스 {self.workers}개, 최대 대기 작업 {self.max_pending}개, 백엔드 {self.backend}")
+
+    def shutdown(self) -> None:
+        """프로세스 풀을 종료합니다."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+            logger.info("OCR 작업자 풀 종료")
+
+    async def run(self, func: Callable[..., Dict[str, Any]], *args: Any) -> Dict[str, Any]:
+        """
+        작업자 프로세스에서 func(*args)를 실행하고 결과를 기다립니다.
+
+        대기열이 가득 차면 자리가 날 때까지 기다립니다. 작업자 프로세스가 비정상 종료되어 풀이 깨진 경우
+        풀을 새로 만든 뒤 오류를 그대로 올립니다.
+        """
+        if self._executor is None:
+            self.start()
+        self.queued += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.queued -= 1
+
+        self.submitted += 1
+        executor = self._executor
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(executor, func, *args)
+            self.completed += 1
+            return result
+        except BrokenProcessPool:
+            self.failed += 1
+            if self._executor is executor:
+                # 같은 풀에서 실패한 다른 작업이 이미 새로 만들었으면 다시 만들지 않음
+                logger.error("OCR 작업자 프로세스가 비정상 종료되어 풀을 다시 시작합니다.")
+                self._restart()
+            raise
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.submitted -= 1
+            self._slots.release()
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(self.backend, self.preload_langs)
+        )
+
+    def _restart(self) -> None:
+        executor = self._executor
+        self._executor = self._new_executor()
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """작업자 풀 상태"""
+        return {
+            "backend": self.backend,
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "queued": self.queued,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed
+        }
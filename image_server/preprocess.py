@@ -0,0 +1,236 @@
+import os
+import time
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+from PIL import Image
+
+logger = logging.getLogger('preprocess')
+
+# 사용할 수 있는 전처리 단계 (적용 순서)
+PREPROCESS_STEPS = ('scale', 'deskew', 'binarize')
+# 요청에 preprocess 값이 없을 때 사용할 기본값 ("none", "auto" 또는 "scale,deskew,binarize" 형식)
+DEFAULT_PREPROCESS = os.getenv("OCR_PREPROCESS", "none")
+
+# Tesseract가 가장 잘 읽는 글자 높이(px)에 맞춰 확대/축소 (300 DPI의 10~12pt 본문 정도)
+TARGET_GLYPH_HEIGHT = float(os.getenv("OCR_TARGET_GLYPH_HEIGHT", "24"))
+TARGET_DPI = 300
+MIN_SCALE = 0.25
+MAX_SCALE = 3.0
+MAX_SIDE = int(os.getenv("OCR_MAX_SIDE", "5000"))  # 전처리 후 긴 변 최대 픽셀
+SCALE_TOLERANCE = 0.15  # 배율이 1에서 이 이내면 다시 샘플링하지 않음
+
+# 글자 높이/기울기 추정은 축소본으로 수행 (전체 해상도로 연결 요소를 구할 필요 없음)
+ANALYSIS_MAX_SIDE = 1600
+MAX_SKEW_ANGLE = 15.0  # 이보다 크게 기울어진 값은 추정 오류로 보고 무시
+MIN_SKEW_ANGLE = 0.3   # 이보다 작은 기울기는 회전하지 않음
+
+
+def parse_steps(value: Optional[str]) -> Tuple[str, ...]:
+    """
+    요청의 preprocess 값을 전처리 단계 튜플로 변환합니다.
+
+    Args:
+        value: "none", "auto"(모든 단계) 또는 쉼표로 구분한 단계 이름 (None이면 서버 기본값)
+
+    Returns:
+        적용 순서대로 정렬된 단계 이름 튜플
+
+    Raises:
+        ValueError: 알 수 없는 단계 이름이 포함된 경우
+    """
+    value = (DEFAULT_PREPROCESS if value is None else value).strip().lower()
+    if value in ("", "none", "off", "false"):
+        return ()
+    if value in ("auto", "all", "true"):
+        return PREPROCESS_STEPS
+    requested = {step.strip() for step in value.split(',') if step.strip()}
+    unknown = requested - set(PREPROCESS_STEPS)
+    if unknown:
+        raise ValueError(f"알 수 없는 전처리 단계: {', '.join(sorted(unknown))} (사용 가능: {', '.join(PREPROCESS_STEPS)}, auto, none)")
+    return tuple(step for step in PREPROCESS_STEPS if step in requested)
+
+
+def to_gray(image: Image.Image) -> np.ndarray:
+    """PIL 이미지를 8비트 흑백 배열로 변환합니다 (투명 배경은 흰색으로 합성)."""
+    if image.mode in ('I', 'I;16', 'I;16B', 'F'):
+        # 16비트/실수 이미지는 값 범위를 0~255로 늘려서 변환
+        array = np.asarray(image, dtype=np.float32)
+        return cv2.normalize(array, None, 0, 255, cv2.NORM_MINMAX).astype(np.uint8)
+    if image.mode in ('RGBA', 'LA', 'PA') or (image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        background = Image.new('RGBA', image.size, (255, 255, 255, 255))
+        image = Image.alpha_composite(background, image)
+    return np.asarray(image.convert('L'))
+
+
+def _analysis_copy(gray: np.ndarray) -> Tuple[np.ndarray, float]:
+    """분석용 축소본과 원본 대비 배율을 반환합니다."""
+    height, width = gray.shape
+    factor = min(1.0, ANALYSIS_MAX_SIDE / max(height, width))
+    if factor < 1.0:
+        gray = cv2.resize(gray, (max(1, int(width * factor)), max(1, int(height * factor))), interpolation=cv2.INTER_AREA)
+    return gray, factor
+
+
+def _text_mask(gray: np.ndarray) -> np.ndarray:
+    """Otsu 이진화로 글자(전경) 픽셀을 255로 표시한 마스크를 만듭니다 (어두운 배경이면 반전)."""
+    _, mask = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)
+    if cv2.countNonZero(mask) > mask.size // 2:
+        mask = cv2.bitwise_not(mask)
+    return mask
+
+
+def estimate_glyph_height(gray: np.ndarray) -> Optional[float]:
+    """
+    연결 요소의 높이 중앙값으로 글자 높이(px)를 추정합니다.
+
+    Returns:
+        원본 해상도 기준 글자 높이 (글자로 볼 만한 요소가 부족하면 None)
+    """
+    small, factor = _analysis_copy(gray)
+    count, _, stats, _ = cv2.connectedComponentsWithStats(_text_mask(small), connectivity=8)
+    if count <= 1:
+        return None
+    stats = stats[1:]  # 배경 제외
+    widths = stats[:, cv2.CC_STAT_WIDTH]
+    heights = stats[:, cv2.CC_STAT_HEIGHT]
+    areas = stats[:, cv2.CC_STAT_AREA]
+    fill = areas / np.maximum(widths * heights, 1)
+    # 점, 잡음, 선, 표 테두리, 사진 덩어리는 제외하고 글자 크기의 요소만 사용
+    glyphs = (
+        (heights >= 4) & (heights <= small.shape[0] * 0.2)
+        & (widths <= heights * 3) & (areas >= 6)
+        & (fill > 0.1) & (fill < 0.95)
+    )
+    if np.count_nonzero(glyphs) < 10:
+        return None
+    return float(np.median(heights[glyphs])) / factor
+
+
+def estimate_skew(gray: np.ndarray, glyph_height: float) -> float:
+    """
+    글자를 가로로 이어 만든 줄 덩어리들의 기울기로 문서 기울기(도)를 추정합니다.
+
+    Returns:
+        cv2.getRotationMatrix2D에 그대로 넘기면 수평이 되는 각도 (추정할 수 없으면 0)
+    """
+    small, factor = _analysis_copy(gray)
+    glyph = max(2.0, glyph_height * factor)
+    mask = _text_mask(small)
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (max(3, int(glyph * 1.5)), 1))
+    lines = cv2.dilate(mask, kernel)
+    contours, _ = cv2.findContours(lines, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    angles = []
+    weights = []
+    for contour in contours:
+        _, (width, height), angle = cv2.minAreaRect(contour)
+        if width < height:
+            width, height = height, width
+            angle -= 90
+        # 줄로 볼 수 있는 가늘고 긴 덩어리만 사용
+        if width < glyph * 4 or width < height * 4:
+            continue
+        angle = (angle + 90) % 180 - 90
+        if abs(angle) <= MAX_SKEW_ANGLE:
+            angles.append(angle)
+            weights.append(width)
+    if not angles:
+        return 0.0
+
+    # 줄 길이로 가중한 중앙값
+    order = np.argsort(angles)
+    angles = np.asarray(angles)[order]
+    cumulative = np.cumsum(np.asarray(weights)[order])
+    return float(angles[np.searchsorted(cumulative, cumulative[-1] / 2)])
+
+
+def rotate(gray: np.ndarray, angle: float) -> np.ndarray:
+    """이미지를 회전하되 모서리가 잘리지 않도록 캔버스를 넓히고 가장자리 색으로 채웁니다."""
+    height, width = gray.shape
+    matrix = cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1.0)
+    cos, sin = abs(matrix[0, 0]), abs(matrix[0, 1])
+    new_width = int(height * sin + width * cos + 0.5)
+    new_height = int(height * cos + width * sin + 0.5)
+    matrix[0, 2] += new_width / 2 - width / 2
+    matrix[1, 2] += new_height / 2 - height / 2
+    return cv2.warpAffine(gray, matrix, (new_width, new_height), flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+
+
+def binarize(gray: np.ndarray, glyph_height: float) -> np.ndarray:
+    """
+    주변 밝기 기준 적응형 이진화로 흰 배경, 검은 글자 이미지를 만듭니다.
+
+    조명이 고르지 않은 스캔이나 대비가 낮은 그림도 글자 주변만 보고 판단하므로 전역 임계값보다 안정적입니다.
+    """
+    if np.median(gray) < 128:
+        # 어두운 배경의 밝은 글자는 반전하여 흰 배경으로 맞춤
+        gray = cv2.bitwise_not(gray)
+    gray = cv2.GaussianBlur(gray, (3, 3), 0)
+    block = max(15, int(glyph_height * 2) | 1)
+    return cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, block, 10)
+
+
+def _scale_factor(gray: np.ndarray, glyph_height: Optional[float], dpi: Optional[float]) -> float:
+    if glyph_height:
+        scale = TARGET_GLYPH_HEIGHT / glyph_height
+    elif dpi and dpi > TARGET_DPI:
+        # 글자를 찾지 못한 경우에는 해상도 정보로 300 DPI에 맞춤
+        scale = TARGET_DPI / dpi
+    else:
+        scale = 1.0
+    scale = min(MAX_SCALE, max(MIN_SCALE, scale))
+    scale = min(scale, MAX_SIDE / max(gray.shape))
+    return 1.0 if abs(scale - 1.0) <= SCALE_TOLERANCE else scale
+
+
+def preprocess_image(image: Image.Image, steps: Tuple[str, ...] = PREPROCESS_STEPS) -> Tuple[Image.Image, Dict[str, Any]]:
+    """
+    OCR 전에 이미지를 흑백으로 바꾸고 지정한 단계를 적용합니다.
+
+    - scale: 글자 높이(찾지 못하면 DPI)를 기준으로 Tesseract에 맞는 크기로 확대/축소
+    - deskew: 줄 기울기를 추정하여 수평으로 회전
+    - binarize: 적응형 이진화
+
+    Args:
+        image: 원본 PIL 이미지
+        steps: 적용할 단계 (parse_steps 결과)
+
+    Returns:
+        (전처리된_PIL_이미지, 전처리_정보) 튜플
+    """
+    start_time = time.time()
+    gray = to_gray(image)
+    info: Dict[str, Any] = {'steps': list(steps), 'original_size': [gray.shape[1], gray.shape[0]]}
+
+    glyph_height = estimate_glyph_height(gray)
+    info['glyph_height'] = round(glyph_height, 1) if glyph_height else None
+
+    if 'scale' in steps:
+        dpi = image.info.get('dpi', (None,))[0]
+        scale = _scale_factor(gray, glyph_height, dpi)
+        if scale != 1.0:
+            interpolation = cv2.INTER_AREA if scale < 1.0 else cv2.INTER_CUBIC
+            gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=interpolation)
+            if glyph_height:
+                glyph_height *= scale
+        info['scale'] = round(scale, 3)
+
+    if 'deskew' in steps:
+        angle = estimate_skew(gray, glyph_height or TARGET_GLYPH_HEIGHT)
+        if abs(angle) >= MIN_SKEW_ANGLE:
+            gray = rotate(gray, angle)
+        else:
+            angle = 0.0
+        info['skew_angle'] = round(angle, 2)
+
+    if 'binarize' in steps:
+        gray = binarize(gray, glyph_height or TARGET_GLYPH_HEIGHT)
+
+    info['size'] = [gray.shape[1], gray.shape[0]]
+    info['time_seconds'] = round(time.time() - start_time, 4)
+    logger.debug(f"이미지 전처리 완료: {info}")
+    return Image.fromarray(gray), info
@@ -1,15 +1,24 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, UploadFile, File, HTTPException, Body, Query
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 import pytesseract
-from PIL import Image
-import io
 import os
+import json
+import asyncio
 import uuid
 import logging
-from typing import List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 import time
 
+# 내부 모듈 임포트
+from admission import OCR_MAX_INFLIGHT, AdmissionController, AdmissionMiddleware
+from jobs import OCR_JOB_CONCURRENCY, OCR_JOBS_RESUME, JobManager, make_job_id
+from layout import filter_layout, layout_text, mean_confidence
+from ocr_cache import OCRCache, hash_bytes, hash_file
+from ocr_worker import OCR_BACKENDS, OCR_WORKERS, OCRWorkerPool, check_backend, ocr_bytes, ocr_path
+from preprocess import DEFAULT_PREPROCESS, parse_steps
+from shared_paths import DISABLED_MESSAGE, SHARED_ROOTS, resolve_shared_path
+
 # 로깅 설정
 logging.basicConfig(
     level=logging.DEBUG,
@@ -20,6 +29,11 @@ logger = logging.getLogger(__name__)
 
 app = FastAPI(title="Image Analysis Server", description="FastAPI 및 Tesseract OCR을 사용한 이미지 분석 서버")
 
+# OCR 요청 승인 제어 (동시 처리 요청 수, 대기열, 요청 본문 크기 제한, 넘치면 503 + Retry-After)
+# 대기 중인 요청은 본문을 읽지 않으므로 업로드가 몰려도 메모리에는 처리 중인 요청의 이미지만 올라감
+admission = AdmissionController(max_inflight=OCR_MAX_INFLIGHT or OCR_WORKERS * 2)
+app.add_middleware(AdmissionMiddleware, controller=admission, path_prefix="/analyze/")
+
 # CORS 설정
 app.add_middleware(
     CORSMiddleware,
@@ -33,113 +47,328 @@ app.add_middleware(
 UPLOAD_DIR = "temp_uploads"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
+def _parse_preprocess(preprocess: Optional[str]) -> Tuple[str, ...]:
+    """요청의 preprocess 값을 검사하고 전처리 단계로 변환합니다 (잘못된 값은 400 오류)."""
+    try:
+        return parse_steps(preprocess)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _shared_path(path: str) -> str:
+    """경로 기반 요청의 경로를 공유 루트 안의 실제 경로로 바꿉니다 (루트 밖이면 403 오류)."""
+    try:
+        return resolve_shared_path(path)
+    except PermissionError as e:
+        logger.warning(f"경로 기반 OCR 요청 거부: {path}")
+        raise HTTPException(status_code=403, detail=str(e))
+
+def _parse_layout(layout: bool, min_conf: Optional[float]) -> bool:
+    """
+    단어 단위 인식(image_to_data)이 필요한지 반환합니다 (layout 또는 min_conf를 지정한 경우).
+    
+    범위를 벗어난 min_conf는 400 오류입니다.
+    """
+    if min_conf is None:
+        return layout
+    if not 0 <= min_conf <= 100:
+        raise HTTPException(status_code=400, detail=f"min_conf는 0~100 사이여야 합니다: {min_conf}")
+    return True
+
+def _with_ocr(result: Dict[str, Any], ocr: Dict[str, Any], layout: bool = False, min_conf: Optional[float] = None) -> Dict[str, Any]:
+    """
+    작업자 OCR 결과(텍스트, 전처리 정보, 신뢰도, 레이아웃)를 응답 딕셔너리에 추가합니다.
+    
+    min_conf를 지정하면 신뢰도가 그보다 낮은 단어를 텍스트와 레이아웃에서 빼고 뺀 단어 수를 dropped_words로 알려줍니다.
+    캐시에는 필터링 전 결과를 저장하므로 같은 이미지를 다른 min_conf로 다시 요청해도 OCR을 다시 실행하지 않습니다.
+    """
+    result["text"] = ocr["text"]
+    if ocr.get("preprocess") is not None:
+        result["preprocess"] = ocr["preprocess"]
+    if "layout" in ocr:
+        words = ocr["layout"]
+        if min_conf:
+            words = filter_layout(words, min_conf)
+            result["text"] = layout_text(words)
+            result["dropped_words"] = len(ocr["layout"]["words"]["text"]) - len(words["words"]["text"])
+        result["confidence"] = mean_confidence(words)
+        if layout:
+            result["layout"] = words
+    if ocr.get("cached"):
+        result["cached"] = True
+    return result
+
+# OCR은 CPU를 오래 쓰므로 이벤트 루프가 아닌 작업자 프로세스에서 실행 (/health가 OCR 중에도 응답하도록)
+ocr_pool = OCRWorkerPool()
+
+# 같은 이미지(내용 해시)와 옵션의 OCR 결과는 디스크 캐시에서 바로 반환 (OCR_CACHE_ENABLED=0이면 사용 안 함)
+ocr_cache = OCRCache() if os.getenv("OCR_CACHE_ENABLED", "1") != "0" else None
+# 처리 중인 캐시 키 -> OCR 결과 Future (같은 이미지가 동시에 들어와도 OCR은 한 번만 실행)
+_inflight: Dict[str, asyncio.Future] = {}
+
+async def _ocr_job_file(index: int, path: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    """디렉토리 OCR 작업의 이미지 하나를 OCR합니다 (결과 형식은 /analyze/ocr/batch/from_paths 항목과 같음)."""
+    layout, min_conf = options["layout"], options["min_conf"]
+    return await _ocr_shared_file(index, path, options["lang"], tuple(options["preprocess"]),
+                                  _parse_layout(layout, min_conf), layout, min_conf)
+
+# 디렉토리 OCR 작업 (진행 상황을 매니페스트에 기록하므로 중단되어도 끝난 이미지부터 이어서 실행)
+jobs = JobManager(_ocr_job_file, concurrency=OCR_JOB_CONCURRENCY or ocr_pool.workers)
+
+@app.on_event("startup")
+async def start_ocr_pool():
+    ocr_pool.start()
+    if OCR_JOBS_RESUME:
+        jobs.resume_interrupted()
+
+@app.on_event("shutdown")
+async def stop_ocr_pool():
+    await jobs.close()
+    ocr_pool.shutdown()
+    if ocr_cache is not None:
+        ocr_cache.close()
+
+async def _run_ocr(func, source, lang: str, steps: Tuple[str, ...], layout: bool = False) -> Dict[str, Any]:
+    """
+    OCR 캐시를 확인하고, 없으면 작업자 프로세스에서 func(source, lang, steps, layout)를 실행한 뒤 결과를 캐시에 저장합니다.
+    
+    Args:
+        func: 작업자 함수 (ocr_bytes 또는 ocr_path)
+        source: 이미지 바이트 또는 파일 경로
+        layout: 단어 상자, 줄, 단어별 신뢰도까지 구할지 여부
+    """
+    if ocr_cache is None:
+        return await ocr_pool.run(func, source, lang, steps, layout)
+    
+    hasher = hash_bytes if isinstance(source, bytes) else hash_file
+    key = OCRCache.make_key(await asyncio.to_thread(hasher, source), lang, steps, backend=ocr_pool.backend, layout=layout)
+    cached = await asyncio.to_thread(ocr_cache.get, key)
+    if cached is not None:
+        return dict(cached, cached=True, ocr_time_seconds=0.0)
+    
+    while key in _inflight:
+        leader = _inflight[key]
+        try:
+            ocr = await asyncio.shield(leader)
+            return dict(ocr, cached=True, ocr_time_seconds=0.0)
+        except asyncio.CancelledError:
+            if not leader.cancelled():
+                # 이 요청 자체가 취소된 경우
+                raise
+            # 같은 이미지를 먼저 요청한 쪽이 취소되었으면(클라이언트 연결 끊김 등) 다시 확인하고 직접 실행
+    
+    future = asyncio.get_running_loop().create_future()
+    # 기다리는 요청이 없을 때 실패한 Future가 경고를 남기지 않도록 결과를 한 번 확인
+    future.add_done_callback(lambda f: f.cancelled() or f.exception())
+    _inflight[key] = future
+    try:
+        ocr = await ocr_pool.run(func, source, lang, steps, layout)
+        future.set_result(ocr)
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        raise
+    finally:
+        del _inflight[key]
+    
+    await asyncio.to_thread(ocr_cache.put, key, {name: value for name, value in ocr.items() if name != "ocr_time_seconds"})
+    return ocr
+
 @app.get("/")
 async def root():
     return {"message": "이미지 분석 서버가 실행 중입니다", "status": "active"}
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "timestamp": time.time()}
+    return {"status": "healthy", "timestamp": time.time(), "ocr_pool": ocr_pool.stats(), "admission": admission.stats()}
+
+@app.get("/stats")
+async def stats():
+    """OCR 작업자 풀, 승인 제어(처리 중, 대기 중 요청 수와 거절 횟수), OCR 캐시(적중/미스 횟수, 사용량) 상태"""
+    # 캐시 통계는 SQLite를 조회하므로(쓰기 경합 시 잠금 대기) 이벤트 루프 밖에서 실행
+    cache_stats = await asyncio.to_thread(ocr_cache.stats) if ocr_cache is not None else None
+    return {
+        "ocr_pool": ocr_pool.stats(),
+        "admission": admission.stats(),
+        "ocr_cache": cache_stats,
+        "jobs": jobs.stats()
+    }
 
 @app.post("/analyze/ocr")
-async def analyze_image_ocr(file: UploadFile = File(...), lang: str = "eng"):
+async def analyze_image_ocr(file: UploadFile = File(...), lang: str = "eng", preprocess: Optional[str] = None,
+                            layout: bool = False, min_conf: Optional[float] = None):
     """
     이미지에서 텍스트를 추출합니다.
     
     - file: 분석할 이미지 파일
     - lang: OCR 언어 (기본값: eng, 한국어: kor, 한국어+영어: kor+eng)
+    - preprocess: 전처리 단계 (none, auto 또는 scale,deskew,binarize 중 쉼표로 구분, 기본값: 서버 설정)
+    - layout: True이면 단어 상자, 줄 묶음, 단어별 신뢰도(layout)와 평균 단어 신뢰도(confidence)를 함께 반환
+    - min_conf: 이 신뢰도(0~100) 미만의 단어를 텍스트에서 제외 (평균 단어 신뢰도도 함께 반환)
     """
+    steps = _parse_preprocess(preprocess)
+    word_level = _parse_layout(layout, min_conf)
     try:
         start_time = time.time()
         
         # 이미지 읽기
         contents = await file.read()
-        image = Image.open(io.BytesIO(contents))
         
-        # OCR 수행
-        text = pytesseract.image_to_string(image, lang=lang)
+        # OCR 수행 (작업자 프로세스에서 디코딩, 전처리, OCR)
+        ocr = await _run_ocr(ocr_bytes, contents, lang, steps, word_level)
         
         # 처리 시간 계산
         process_time = time.time() - start_time
         
-        return {
+        return _with_ocr({
             "filename": file.filename,
-            "text": text,
             "language": lang,
             "process_time_seconds": process_time
-        }
+        }, ocr, layout, min_conf)
     except Exception as e:
         logger.error(f"OCR 처리 중 오류 발생: {str(e)}")
         raise HTTPException(status_code=500, detail=f"이미지 처리 중 오류 발생: {str(e)}")
 
+async def _ocr_upload(index: int, file: UploadFile, lang: str, steps: Tuple[str, ...], limit: asyncio.Semaphore,
+                      word_level: bool = False, layout: bool = False, min_conf: Optional[float] = None) -> Dict[str, Any]:
+    """배치의 이미지 하나를 OCR하고 입력 순번, 처리 시간을 포함한 결과를 반환합니다 (오류도 결과로 반환)."""
+    start_time = time.time()
+    item = {"index": index, "filename": file.filename, "language": lang}
+    try:
+        # 작업자 풀 대기열에 들어갈 수 있는 만큼만 업로드를 메모리로 읽음
+        async with limit:
+            contents = await file.read()
+            ocr = await _run_ocr(ocr_bytes, contents, lang, steps, word_level)
+        _with_ocr(item, ocr, layout, min_conf)
+        item["ocr_time_seconds"] = ocr["ocr_time_seconds"]
+    except Exception as e:
+        logger.error(f"배치 OCR 처리 중 오류 발생 ({file.filename}): {str(e)}")
+        item["error"] = str(e)
+    item["process_time_seconds"] = time.time() - start_time
+    return item
+
 @app.post("/analyze/ocr/batch")
-async def analyze_multiple_images(files: List[UploadFile] = File(...), lang: str = "eng"):
+async def analyze_multiple_images(files: List[UploadFile] = File(...), lang: str = "eng", preprocess: Optional[str] = None,
+                                  stream: bool = False, layout: bool = False, min_conf: Optional[float] = None):
     """
     여러 이미지에서 텍스트를 추출합니다.
     
+    이미지는 OCR 작업자 프로세스에 나누어 동시에 처리합니다.
+    
     - files: 분석할 이미지 파일 목록
     - lang: OCR 언어 (기본값: eng, 한국어: kor, 한국어+영어: kor+eng)
+    - preprocess: 전처리 단계 (none, auto 또는 scale,deskew,binarize 중 쉼표로 구분, 기본값: 서버 설정)
+    - layout: True이면 단어 상자, 줄 묶음, 단어별 신뢰도(layout)와 평균 단어 신뢰도(confidence)를 함께 반환
+    - min_conf: 이 신뢰도(0~100) 미만의 단어를 텍스트에서 제외 (평균 단어 신뢰도도 함께 반환)
+    - stream: True이면 끝난 이미지부터 한 줄에 하나씩 NDJSON으로 보내고 마지막 줄에 요약({"done": true, ...})을 보냄
+      (각 결과의 index로 입력 순서를 알 수 있음)
     """
-    results = []
+    steps = _parse_preprocess(preprocess)
+    word_level = _parse_layout(layout, min_conf)
+    start_time = time.time()
+    limit = asyncio.Semaphore(ocr_pool.max_pending)
+    tasks = [asyncio.create_task(_ocr_upload(i, file, lang, steps, limit, word_level, layout, min_conf)) for i, file in enumerate(files)]
+    return await _batch_response(tasks, start_time, stream)
+
+async def _ocr_shared_file(index: int, path: str, lang: str, steps: Tuple[str, ...],
+                           word_level: bool = False, layout: bool = False, min_conf: Optional[float] = None) -> Dict[str, Any]:
+    """배치의 공유 경로 이미지 하나를 OCR합니다 (업로드 없이 작업자가 파일을 직접 읽음, 오류도 결과로 반환)."""
+    start_time = time.time()
+    item = {"index": index, "path": path, "filename": os.path.basename(path), "language": lang}
+    try:
+        real_path = resolve_shared_path(path)
+        ocr = await _run_ocr(ocr_path, real_path, lang, steps, word_level)
+        _with_ocr(item, ocr, layout, min_conf)
+        item["ocr_time_seconds"] = ocr["ocr_time_seconds"]
+    except Exception as e:
+        logger.error(f"배치 OCR 처리 중 오류 발생 ({path}): {str(e)}")
+        item["error"] = str(e)
+    item["process_time_seconds"] = time.time() - start_time
+    return item
+
+@app.post("/analyze/ocr/batch/from_paths")
+async def analyze_multiple_paths(paths: List[str] = Body(..., embed=True), lang: str = "eng", preprocess: Optional[str] = None,
+                                 stream: bool = False, layout: bool = False, min_conf: Optional[float] = None):
+    """
+    서버와 공유하는 디렉토리(OCR_SHARED_ROOT)에 있는 여러 이미지를 경로로 받아 텍스트를 추출합니다.
     
-    for file in files:
-        try:
-            contents = await file.read()
-            image = Image.open(io.BytesIO(contents))
-            text = pytesseract.image_to_string(image, lang=lang)
-            
-            results.append({
-                "filename": file.filename,
-                "text": text,
-                "language": lang
-            })
-        except Exception as e:
-            results.append({
-                "filename": file.filename,
-                "error": str(e),
-                "language": lang
-            })
-    
-    return {"results": results}
+    같은 호스트에서 실행되는 클라이언트는 이미지를 업로드하지 않고 경로만 보내므로, 이미지마다 읽기, 전송,
+    서버 메모리 버퍼링을 생략할 수 있습니다. 응답 형식은 /analyze/ocr/batch와 같습니다.
+    
+    - paths: 분석할 이미지 경로 목록 (요청 본문: {"paths": [...]}, 공유 루트 밖의 경로는 항목별 오류)
+    - lang: OCR 언어 (기본값: eng, 한국어: kor, 한국어+영어: kor+eng)
+    - preprocess: 전처리 단계 (none, auto 또는 scale,deskew,binarize 중 쉼표로 구분, 기본값: 서버 설정)
+    - layout: True이면 단어 상자, 줄 묶음, 단어별 신뢰도(layout)와 평균 단어 신뢰도(confidence)를 함께 반환
+    - min_conf: 이 신뢰도(0~100) 미만의 단어를 텍스트에서 제외 (평균 단어 신뢰도도 함께 반환)
+    - stream: True이면 끝난 이미지부터 한 줄에 하나씩 NDJSON으로 보냄
+    """
+    steps = _parse_preprocess(preprocess)
+    word_level = _parse_layout(layout, min_conf)
+    if not SHARED_ROOTS:
+        raise HTTPException(status_code=403, detail=DISABLED_MESSAGE)
+    start_time = time.time()
+    tasks = [asyncio.create_task(_ocr_shared_file(i, path, lang, steps, word_level, layout, min_conf)) for i, path in enumerate(paths)]
+    return await _batch_response(tasks, start_time, stream)
+
+async def _batch_response(tasks: List[asyncio.Task], start_time: float, stream: bool):
+    """배치 작업 결과를 입력 순서대로 한 번에, 또는 끝난 순서대로 NDJSON으로 반환합니다."""
+    if stream:
+        async def ndjson() -> AsyncIterator[bytes]:
+            errors = 0
+            try:
+                for next_done in asyncio.as_completed(tasks):
+                    item = await next_done
+                    errors += "error" in item
+                    yield (json.dumps(item, ensure_ascii=False) + "\n").encode("utf-8")
+                summary = {"done": True, "count": len(tasks), "errors": errors, "process_time_seconds": time.time() - start_time}
+                yield (json.dumps(summary) + "\n").encode("utf-8")
+            finally:
+                # 클라이언트가 중간에 연결을 끊으면 남은 작업은 취소
+                for task in tasks:
+                    task.cancel()
+        
+        return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+    
+    # 입력 순서대로 결과 반환
+    results = await asyncio.gather(*tasks)
+    return {"results": results, "count": len(results), "process_time_seconds": time.time() - start_time}
 
 @app.post("/analyze/ocr/from_path")
-async def analyze_image_from_path(image_path: str, lang: str = "eng"):
+async def analyze_image_from_path(image_path: str, lang: str = "eng", preprocess: Optional[str] = None,
+                                  layout: bool = False, min_conf: Optional[float] = None):
     logger.debug(f"analyze_image_from_path 호출됨: 경로={image_path}, 언어={lang}")
     """
-    서버 로컬 경로에 있는 이미지에서 텍스트를 추출합니다.
+    서버 로컬 경로에 있는 이미지에서 텍스트를 추출합니다 (업로드 없이 작업자가 파일을 직접 읽음).
     
-    - image_path: 분석할 이미지의 전체 경로
+    - image_path: 분석할 이미지의 전체 경로 (공유 루트 OCR_SHARED_ROOT 안의 경로만 허용)
     - lang: OCR 언어 (기본값: eng, 한국어: kor, 한국어+영어: kor+eng)
+    - preprocess: 전처리 단계 (none, auto 또는 scale,deskew,binarize 중 쉼표로 구분, 기본값: 서버 설정)
+    - layout: True이면 단어 상자, 줄 묶음, 단어별 신뢰도(layout)와 평균 단어 신뢰도(confidence)를 함께 반환
+    - min_conf: 이 신뢰도(0~100) 미만의 단어를 텍스트에서 제외 (평균 단어 신뢰도도 함께 반환)
     """
+    steps = _parse_preprocess(preprocess)
+    word_level = _parse_layout(layout, min_conf)
+    real_path = _shared_path(image_path)
     try:
         logger.debug(f"이미지 경로 확인: {image_path}")
-        if not os.path.exists(image_path):
+        if not os.path.isfile(real_path):
             logger.error(f"이미지 파일을 찾을 수 없음: {image_path}")
             raise HTTPException(status_code=404, detail=f"이미지를 찾을 수 없습니다: {image_path}")
         
         start_time = time.time()
         
-        # 이미지 읽기
-        logger.debug(f"이미지 파일 열기 시도: {image_path}")
-        try:
-            image = Image.open(image_path)
-            logger.debug(f"이미지 크기: {image.size}, 모드: {image.mode}")
-        except Exception as img_err:
-            logger.error(f"이미지 열기 실패: {str(img_err)}")
-            raise
-        
-        # OCR 수행
-        text = pytesseract.image_to_string(image, lang=lang)
+        # OCR 수행 (작업자 프로세스에서 이미지 열기, 전처리, OCR)
+        ocr = await _run_ocr(ocr_path, real_path, lang, steps, word_level)
         
         # 처리 시간 계산
         process_time = time.time() - start_time
         
-        return {
+        return _with_ocr({
             "image_path": image_path,
-            "text": text,
             "language": lang,
             "process_time_seconds": process_time
-        }
+        }, ocr, layout, min_conf)
     except HTTPException:
         raise
     except Exception as e:
@@ -147,37 +376,46 @@ async def analyze_image_from_path(image_path: str, lang: str = "eng"):
         raise HTTPException(status_code=500, detail=f"이미지 처리 중 오류 발생: {str(e)}")
 
 @app.post("/analyze/ocr/directory")
-async def analyze_directory(directory_path: str, lang: str = "eng", extensions: List[str] = ["jpg", "jpeg", "png", "tiff", "bmp"]):
+async def analyze_directory(directory_path: str, lang: str = "eng", extensions: List[str] = ["jpg", "jpeg", "png", "tiff", "bmp"],
+                            preprocess: Optional[str] = None, layout: bool = False, min_conf: Optional[float] = None):
     """
     지정된 디렉토리에 있는 모든 이미지에서 텍스트를 추출합니다.
     
-    - directory_path: 분석할 이미지가 있는 디렉토리 경로
+    요청 하나 안에서 모든 이미지를 처리하므로 이미지가 많은 디렉토리는 POST /jobs/ocr/directory 작업을 사용하세요.
+    
+    - directory_path: 분석할 이미지가 있는 디렉토리 경로 (공유 루트 OCR_SHARED_ROOT 안의 경로만 허용)
     - lang: OCR 언어 (기본값: eng, 한국어: kor, 한국어+영어: kor+eng)
     - extensions: 처리할 이미지 파일 확장자 목록
+    - preprocess: 전처리 단계 (none, auto 또는 scale,deskew,binarize 중 쉼표로 구분, 기본값: 서버 설정)
+    - layout: True이면 단어 상자, 줄 묶음, 단어별 신뢰도(layout)와 평균 단어 신뢰도(confidence)를 함께 반환
+    - min_conf: 이 신뢰도(0~100) 미만의 단어를 텍스트에서 제외 (평균 단어 신뢰도도 함께 반환)
     """
+    steps = _parse_preprocess(preprocess)
+    word_level = _parse_layout(layout, min_conf)
+    real_directory = _shared_path(directory_path)
     try:
-        if not os.path.exists(directory_path) or not os.path.isdir(directory_path):
+        if not os.path.isdir(real_directory):
             raise HTTPException(status_code=404, detail=f"디렉토리를 찾을 수 없습니다: {directory_path}")
         
         results = []
         
         # 디렉토리 내 이미지 파일 검색
-        for filename in os.listdir(directory_path):
+        for filename in os.listdir(real_directory):
             file_ext = filename.split('.')[-1].lower() if '.' in filename else ""
             
             if file_ext in extensions:
                 file_path = os.path.join(directory_path, filename)
                 
                 try:
-                    image = Image.open(file_path)
-                    text = pytesseract.image_to_string(image, lang=lang)
+                    # 디렉토리 안의 심볼릭 링크가 공유 루트 밖을 가리키는 경우도 거부
+                    real_file = resolve_shared_path(os.path.join(real_directory, filename))
+                    ocr = await _run_ocr(ocr_path, real_file, lang, steps, word_level)
                     
-                    results.append({
+                    results.append(_with_ocr({
                         "filename": filename,
                         "path": file_path,
-                        "text": text,
                         "language": lang
-                    })
+                    }, ocr, layout, min_conf))
                 except Exception as e:
                     results.append({
                         "filename": filename,
@@ -193,9 +431,132 @@ async def analyze_directory(directory_path: str, lang: str = "eng", extensions:
         logger.error(f"디렉토리 처리 중 오류 발생: {str(e)}")
         raise HTTPException(status_code=500, detail=f"디렉토리 처리 중 오류 발생: {str(e)}")
 
+def _list_images(real_directory: str, directory_path: str, extensions: List[str]) -> List[str]:
+    """디렉토리에서 확장자가 맞는 이미지 경로를 이름순으로 반환합니다 (요청된 디렉토리 경로 기준)."""
+    extensions = [ext.lower().lstrip('.') for ext in extensions]
+    return [
+        os.path.join(directory_path, filename)
+        for filename in sorted(os.listdir(real_directory))
+        if '.' in filename and filename.rsplit('.', 1)[-1].lower() in extensions
+    ]
+
+@app.post("/jobs/ocr/directory")
+async def submit_directory_job(directory_path: str, lang: str = "eng", extensions: List[str] = Query(["jpg", "jpeg", "png", "tiff", "bmp"]),
+                               preprocess: Optional[str] = None, layout: bool = False, min_conf: Optional[float] = None,
+                               restart: bool = False):
+    """
+    디렉토리의 이미지를 백그라운드에서 OCR하는 작업을 시작하고 작업 ID를 바로 반환합니다.
+    
+    이미지는 OCR 작업자 프로세스에 나누어 동시에 처리하고, 끝날 때마다 결과를 작업 매니페스트에 기록합니다.
+    같은 디렉토리를 같은 옵션으로 다시 제출하면 같은 작업 ID가 되어, 중단되거나 취소된 작업은 끝난 이미지를 건너뛰고 이어서 실행됩니다.
+    
+    - directory_path: 분석할 이미지가 있는 디렉토리 경로 (공유 루트 OCR_SHARED_ROOT 안의 경로만 허용)
+    - lang, extensions, preprocess, layout, min_conf: /analyze/ocr/directory와 같음
+    - restart: True이면 끝난 작업도 이전 결과를 지우고 처음부터 다시 실행
+    """
+    steps = _parse_preprocess(preprocess)
+    _parse_layout(layout, min_conf)
+    real_directory = _shared_path(directory_path)
+    if not os.path.isdir(real_directory):
+        raise HTTPException(status_code=404, detail=f"디렉토리를 찾을 수 없습니다: {directory_path}")
+    
+    options = {"lang": lang, "preprocess": list(steps), "layout": layout, "min_conf": min_conf}
+    job_id = make_job_id(real_directory, options, extensions)
+    files = await asyncio.to_thread(_list_images, real_directory, directory_path, extensions)
+    return jobs.submit(job_id, directory_path, files, options, extensions, restart)
+
+@app.get("/jobs")
+async def list_jobs():
+    """모든 디렉토리 OCR 작업의 상태"""
+    return {"jobs": await asyncio.to_thread(jobs.list_jobs)}
+
+def _job_status(job_id: str) -> Dict[str, Any]:
+    status = jobs.status(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail=f"작업을 찾을 수 없습니다: {job_id}")
+    return status
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """
+    작업 상태와 진행률을 반환합니다.
+    
+    status: running, completed, cancelled, failed, interrupted(서버 종료 등으로 멈춘 작업, 다시 제출하면 이어서 실행)
+    """
+    return await asyncio.to_thread(_job_status, job_id)
+
+@app.get("/jobs/{job_id}/results")
+async def get_job_results(job_id: str, offset: int = 0, limit: Optional[int] = None, stream: bool = False):
+    """
+    작업 결과를 끝난 순서대로 반환합니다 (각 결과의 index는 이미지 순번).
+    
+    - offset: 건너뛸 결과 수 (이전 응답의 next_offset을 넘기면 새 결과만 받음)
+    - limit: 최대 결과 수 (stream이 아닌 경우)
+    - stream: True이면 offset부터 기록된 결과와 이후 끝나는 결과를 NDJSON으로 계속 보내고,
+      작업이 끝나면 마지막 줄에 요약({"done": true, ...})을 보냄 (새 결과가 없는 동안에는 OCR_JOB_KEEPALIVE초마다 빈 줄)
+    """
+    status = await asyncio.to_thread(_job_status, job_id)
+    offset = max(0, offset)
+    if stream:
+        async def ndjson() -> AsyncIterator[bytes]:
+            async for item in jobs.follow(job_id, offset):
+                if item is None:
+                    # 새 결과가 없는 동안 연결 유지 (클라이언트는 빈 줄을 건너뜀)
+                    yield b"\n"
+                    continue
+                yield (json.dumps(item, ensure_ascii=False) + "\n").encode("utf-8")
+        
+        return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+    
+    results = await asyncio.to_thread(jobs.results, job_id, offset, limit)
+    return dict(status, results=results, offset=offset, next_offset=offset + len(results))
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    """작업을 취소합니다 (처리 중인 이미지까지 기록하고 멈춤, 다시 제출하면 이어서 실행)."""
+    status = await asyncio.to_thread(jobs.cancel, job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail=f"작업을 찾을 수 없습니다: {job_id}")
+    return status
+
 if __name__ == "__main__":
+    import argparse
     import uvicorn
+
+    parser = argparse.ArgumentParser(description="이미지 분석 서버")
+    parser.add_argument("--ocr-backend", choices=OCR_BACKENDS, default=ocr_pool.backend,
+                        help="OCR 엔진 (tesserocr는 작업자마다 언어별 엔진을 유지하여 요청마다 언어 데이터를 다시 로드하지 않음)")
+    parser.add_argument("--preload-langs", help="작업자 시작 시 미리 로드할 언어 (쉼표로 구분, 예: kor+eng,eng)")
+    parser.add_argument("--host", default="0.0.0.0", help="바인드 주소")
+    parser.add_argument("--port", type=int, default=5050, help="포트")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="uvicorn 작업자 프로세스 수 (2 이상이면 운영 모드: 자동 재시작 없이 여러 프로세스가 같은 포트에서 요청을 나눠 받음)")
+    parser.add_argument("--no-reload", action="store_true", help="코드 변경 시 자동 재시작 사용 안 함 (작업자 1개 운영 모드)")
+    args = parser.parse_args()
+
+    # 서버 모듈은 uvicorn이 다시 임포트하므로 환경변수로 설정을 넘김
+    check_backend(args.ocr_backend)
+    os.environ["OCR_BACKEND"] = args.ocr_backend
+    if args.preload_langs is not None:
+        os.environ["OCR_PRELOAD_LANGS"] = args.preload_langs
+
+    workers = max(1, args.workers)
+    production = workers > 1 or args.no_reload
+    if workers > 1 and not os.getenv("OCR_WORKERS"):
+        # uvicorn 작업자마다 OCR 작업자 풀을 만들므로 CPU를 작업자 수로 나눠 과다 구독을 막음
+        os.environ["OCR_WORKERS"] = str(max(1, (os.cpu_count() or 1) // workers))
+    ocr_workers = int(os.environ.get("OCR_WORKERS", "0")) or ocr_pool.workers
+
     logger.info("이미지 분석 서버 시작 중...")
     logger.info(f"Tesseract 버전: {pytesseract.get_tesseract_version()}")
     logger.info(f"지원 언어: {', '.join(pytesseract.get_languages())}")
-    uvicorn.run("server:app", host="0.0.0.0", port=5050, reload=True, log_level="debug")
+    logger.info(f"기본 전처리: {DEFAULT_PREPROCESS}")
+    logger.info(f"실행 모드: {'운영' if production else '개발 (자동 재시작)'}, uvicorn 작업자 {workers}개")
+    logger.info(f"OCR 작업자 프로세스: uvicorn 작업자당 {ocr_workers}개 (백엔드: {args.ocr_backend})")
+    if ocr_cache is not None:
+        logger.info(f"OCR 캐시: {ocr_cache.cache_dir} (uvicorn 작업자 간 공유)")
+    logger.info(f"공유 루트: {', '.join(SHARED_ROOTS) or '없음 (경로 기반 OCR 비활성화)'}")
+    if production:
+        uvicorn.run("server:app", host=args.host, port=args.port, workers=workers, log_level="info")
+    else:
+        uvicorn.run("server:app", host=args.host, port=args.port, reload=True, log_level="debug")
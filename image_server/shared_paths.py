@@ -0,0 +1,56 @@
+import os
+import logging
+from typing import List, Optional
+
+logger = logging.getLogger('shared_paths')
+
+
+def parse_roots(value: Optional[str]) -> List[str]:
+    """
+    공유 루트 설정 값(os.pathsep으로 구분한 디렉토리 목록)을 실제 경로 목록으로 변환합니다.
+
+    존재하지 않는 디렉토리는 경고 후 제외합니다.
+    """
+    roots = []
+    for root in (value or "").split(os.pathsep):
+        root = root.strip()
+        if not root:
+            continue
+        real_root = os.path.realpath(root)
+        if os.path.isdir(real_root):
+            roots.append(real_root)
+        else:
+            logger.warning(f"공유 루트 디렉토리를 찾을 수 없어 제외합니다: {root}")
+    return roots
+
+
+# 서버가 경로로 직접 읽을 수 있는 디렉토리 (설정하지 않으면 경로 기반 OCR 요청은 모두 거부)
+SHARED_ROOTS = parse_roots(os.getenv("OCR_SHARED_ROOT"))
+
+# 공유 루트가 없을 때 경로 기반 요청(from_path, directory, 작업)에 돌려주는 오류 메시지
+DISABLED_MESSAGE = ("경로 기반 OCR이 비활성화되어 있습니다. 서버를 OCR_SHARED_ROOT=/data/images 처럼 읽을 디렉토리를 "
+                    "지정해 실행하세요 (여러 개는 ':'로 구분, 이전처럼 모든 경로를 허용하려면 OCR_SHARED_ROOT=/).")
+
+
+def resolve_shared_path(path: str, roots: Optional[List[str]] = None) -> str:
+    """
+    요청된 경로를 심볼릭 링크와 '..'까지 풀어 실제 경로로 바꾸고, 공유 루트 안에 있는지 확인합니다.
+
+    Args:
+        path: 요청된 파일 또는 디렉토리 경로
+        roots: 허용할 루트 목록 (None이면 OCR_SHARED_ROOT 설정)
+
+    Returns:
+        공유 루트 안의 실제 경로
+
+    Raises:
+        PermissionError: 공유 루트가 설정되지 않았거나 경로가 공유 루트 밖인 경우
+    """
+    roots = SHARED_ROOTS if roots is None else roots
+    if not roots:
+        raise PermissionError(DISABLED_MESSAGE)
+    real_path = os.path.realpath(path)
+    for root in roots:
+        if os.path.commonpath([root, real_path]) == root:
+            return real_path
+    raise PermissionError(f"허용되지 않은 경로입니다: {path}")
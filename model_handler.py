@@ -1,4 +1,6 @@
 import os
+import time
+import random
 import requests
 from dotenv import load_dotenv
 import google.generativeai as genai
@@ -6,10 +8,34 @@ from openai import OpenAI
 from typing import List, Optional, Tuple, Dict, Any
 import json
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+# 내부 모듈 임포트
+from http_client import get_session, request_timeout
+from rate_limiter import get_limiter
 
 # 환경 변수 로드
 load_dotenv()
 
+# 모델 타입별 요청 한도 리미터 이름 (동시 요청 수는 RATE_LIMIT_<NAME>_CONCURRENCY로 조정, 예: RATE_LIMIT_OPENAI_CHAT_CONCURRENCY)
+# 긴 문서의 청크 요약은 이 동시 요청 수만큼 함께 보냄
+MODEL_LIMITERS = {
+    "openai": "openai_chat",
+    "gemini": "gemini_chat",
+    "llama": "ollama",
+    "upstage": "upstage_chat"
+}
+# 청크 요약이 실패했을 때 그 청크만 다시 요청할 횟수
+SUMMARY_CHUNK_RETRIES = int(os.getenv("SUMMARY_CHUNK_RETRIES", "2"))
+# 청크 요약에 쓰는 최대 스레드 수 (리미터 동시 요청 수가 0(제한 없음)이거나 이보다 큰 경우에도 이 수를 넘지 않음)
+SUMMARY_MAX_WORKERS = int(os.getenv("SUMMARY_MAX_WORKERS", "8"))
+
+
+class SummaryError(Exception):
+    """모델 API가 요약을 반환하지 못한 경우 (오류 응답, 빈 응답, 연결 실패)"""
+    pass
+
+
 class ModelHandler:
     """
     A handler class for different AI models to generate summaries from text.
@@ -191,36 +217,8 @@ class ModelHandler:
                 print(f"[완료] 텍스트를 {len(chunks)}개의 청크로 분할했습니다.")
                 print(f"[디버그] 각 청크 길이: {', '.join([str(len(chunk)) for chunk in chunks])}")
                 
-                # 각 청크를 개별적으로 요약
-                print(f"\n[진행] 각 청크 요약 시작...")
-                summaries = []
-                for i, chunk in enumerate(chunks):
-                    print(f"\n[진행] 청크 {i+1}/{len(chunks)} 요약 중... (길이: {len(chunk):,} 글자)")
-                    print(f"[디버그] 청크 {i+1} 시작 부분: {chunk[:100]}...")
-                    
-                    start_time = datetime.now()
-                    if self.model_type == "openai":
-                        print(f"[API] OpenAI API 요청 중... (모델: {self.model_name})")
-                        summary = self._generate_openai(chunk)
-                    elif self.model_type == "gemini":
-                        print(f"[API] Gemini API 요청 중... (모델: {self.model_name})")
-                        summary = self._generate_gemini(chunk)
-                    elif self.model_type == "llama":
-                        print(f"[API] Llama API 요청 중... (모델: {self.model_name or 'llama3:latest'})")
-                        summary = self._generate_llama(chunk)
-                    elif self.model_type == "upstage":
-                        print(f"[API] Upstage API 요청 중... (모델: {self.model_name})")
-                        summary = self._generate_upstage(chunk)
-                    else:
-                        raise ValueError(f"Unsupported model type: {self.model_type}")
-                    
-                    end_time = datetime.now()
-                    duration = (end_time - start_time).total_seconds()
-                    print(f"[완료] 청크 {i+1} 요약 완료 (소요 시간: {duration:.2f}초)")
-                    print(f"[디버그] 요약 길이: {len(summary)} 글자")
-                    print(f"[디버그] 요약 시작 부분: {summary[:150]}...")
-                    
-                    summaries.append(summary)
+                # 청크를 동시에 요약 (입력 순서대로 결과를 모음)
+                summaries = self._summarize_chunks(chunks)
                 
                 # 각 청크의 요약을 합치기
                 print("\n[진행] 각 청크의 요약을 합치는 중...")
@@ -233,21 +231,71 @@ class ModelHandler:
                 return final_summary
             
             # 텍스트가 충분히 짧은 경우 일반적인 방식으로 요약
-            if self.model_type == "openai":
-                return self._generate_openai(text)
-            elif self.model_type == "gemini":
-                return self._generate_gemini(text)
-            elif self.model_type == "llama":
-                return self._generate_llama(text)
-            elif self.model_type == "upstage":
-                return self._generate_upstage(text)
-            else:
-                raise ValueError(f"Unsupported model type: {self.model_type}")
+            return self._generate(text)
         except Exception as e:
             error_msg = f"Error generating summary with {self.model_type.upper()}: {str(e)}"
             print(error_msg)
             return error_msg
 
+    def _generate(self, text: str) -> str:
+        """모델 타입에 맞는 API로 요약을 생성합니다."""
+        if self.model_type == "openai":
+            return self._generate_openai(text)
+        elif self.model_type == "gemini":
+            return self._generate_gemini(text)
+        elif self.model_type == "llama":
+            return self._generate_llama(text)
+        elif self.model_type == "upstage":
+            return self._generate_upstage(text)
+        else:
+            raise ValueError(f"Unsupported model type: {self.model_type}")
+    
+    def _summarize_chunks(self, chunks: List[str]) -> List[str]:
+        """
+        청크들을 모델 타입별 동시 요청 수만큼 함께 요약합니다.
+        
+        실패한 청크는 그 청크만 다시 요청하며(SUMMARY_CHUNK_RETRIES회), 재시도 후에도 실패하면
+        남은 청크 요청을 취소하고 예외를 올립니다.
+        
+        Args:
+            chunks: 요약할 텍스트 청크 리스트
+        Returns:
+            청크 순서대로 정렬된 요약 리스트
+        """
+        max_concurrent = get_limiter(MODEL_LIMITERS[self.model_type]).max_concurrent or SUMMARY_MAX_WORKERS
+        workers = max(1, min(max_concurrent, SUMMARY_MAX_WORKERS, len(chunks)))
+        print(f"\n[진행] 청크 {len(chunks)}개 요약 시작... (동시 요청 {workers}개, 모델: {self.model_name})")
+        
+        start_time = datetime.now()
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="summary")
+        try:
+            futures = [executor.submit(self._summarize_chunk, i, chunk, len(chunks)) for i, chunk in enumerate(chunks)]
+            summaries = [future.result() for future in futures]
+        finally:
+            # 실패한 경우 아직 시작하지 않은 청크 요청은 보내지 않음
+            executor.shutdown(wait=True, cancel_futures=True)
+        
+        duration = (datetime.now() - start_time).total_seconds()
+        print(f"[완료] 청크 {len(chunks)}개 요약 완료 (소요 시간: {duration:.2f}초)")
+        return summaries
+    
+    def _summarize_chunk(self, index: int, chunk: str, total: int) -> str:
+        """청크 하나를 요약합니다 (실패하면 지터를 둔 지수 백오프 후 이 청크만 다시 요청)."""
+        for attempt in range(SUMMARY_CHUNK_RETRIES + 1):
+            start_time = datetime.now()
+            try:
+                summary = self._generate(chunk)
+            except Exception as e:
+                if attempt >= SUMMARY_CHUNK_RETRIES:
+                    raise
+                delay = random.uniform(0, min(30.0, 2.0 ** (attempt + 1)))
+                print(f"[재시도] 청크 {index+1}/{total} 요약 실패 ({str(e)}), {delay:.1f}초 후 다시 요청합니다. "
+                      f"({attempt+1}/{SUMMARY_CHUNK_RETRIES})")
+                time.sleep(delay)
+                continue
+            duration = (datetime.now() - start_time).total_seconds()
+            print(f"[완료] 청크 {index+1}/{total} 요약 완료 (길이: {len(chunk):,} → {len(summary):,} 글자, 소요 시간: {duration:.2f}초)")
+            return summary
     
     def _generate_openai(self, text: str) -> str:
         """Generate a summary using OpenAI's API."""
@@ -270,15 +318,17 @@ class ModelHandler:
             }
         ]
         
-        response = self.client.chat.completions.create(
-            model=self.model_name or "gpt-4-turbo-preview",
-            messages=messages,
-            temperature=0.3,
-            max_tokens=2000,
-            top_p=1.0,
-            frequency_penalty=0.0,
-            presence_penalty=0.0
-        )
+        # 프로세스 공유 리미터로 동시 요청 수 제한 (여러 문서를 함께 요약하는 경우 포함)
+        with get_limiter("openai_chat"):
+            response = self.client.chat.completions.create(
+                model=self.model_name or "gpt-4-turbo-preview",
+                messages=messages,
+                temperature=0.3,
+                max_tokens=2000,
+                top_p=1.0,
+                frequency_penalty=0.0,
+                presence_penalty=0.0
+            )
         
         return response.choices[0].message.content
     
@@ -300,21 +350,22 @@ class ModelHandler:
             
             English summary:"""
         
-        response = self.model.generate_content(
-            prompt,
-            generation_config={
-                "temperature": 0.3,
-                "top_p": 0.95,
-                "top_k": 40,
-                "max_output_tokens": 2000,
-            },
-            safety_settings=[
-                {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_NONE"},
-                {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_NONE"},
-                {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_NONE"},
-                {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_NONE"},
-            ]
-        )
+        with get_limiter("gemini_chat"):
+            response = self.model.generate_content(
+                prompt,
+                generation_config={
+                    "temperature": 0.3,
+                    "top_p": 0.95,
+                    "top_k": 40,
+                    "max_output_tokens": 2000,
+                },
+                safety_settings=[
+                    {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_NONE"},
+                    {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_NONE"},
+                    {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_NONE"},
+                    {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_NONE"},
+                ]
+            )
         
         return response.text
     
@@ -376,11 +427,12 @@ class ModelHandler:
             # API 요청 디버깅
             print(f"Payload: {payload['model']}, 프롬프트 길이: {len(prompt)}")
             
-            response = requests.post(
-                self.api_url,
-                json=payload,
-                timeout=300  # 5분 타임아웃
-            )
+            with get_limiter("ollama"):
+                response = get_session("ollama").post(
+                    self.api_url,
+                    json=payload,
+                    timeout=request_timeout(300)  # 5분 타임아웃
+                )
             
             # 응답 디버깅
             print(f"Ollama API 응답 코드: {response.status_code}")
@@ -388,7 +440,7 @@ class ModelHandler:
             # 오류 응답 확인
             if response.status_code != 200:
                 print(f"응답 내용: {response.text[:500]}")
-                return f"Ollama API 오류: HTTP {response.status_code} - {response.text[:200]}"
+                raise SummaryError(f"Ollama API 오류: HTTP {response.status_code} - {response.text[:200]}")
             
             result = response.json()
             
@@ -402,29 +454,29 @@ class ModelHandler:
                 backup_payload = payload.copy()
                 backup_payload["model"] = "llama3.2:latest"
                 
-                backup_response = requests.post(
-                    self.api_url,
-                    json=backup_payload,
-                    timeout=300
-                )
+                with get_limiter("ollama"):
+                    backup_response = get_session("ollama").post(
+                        self.api_url,
+                        json=backup_payload,
+                        timeout=request_timeout(300)
+                    )
                 
                 if backup_response.status_code == 200:
                     backup_result = backup_response.json()
                     if "response" in backup_result and backup_result["response"].strip():
                         return backup_result["response"]
                 
-                return "한국어 요약을 생성하지 못했습니다. 다른 모델을 사용해보세요."
+                raise SummaryError("요약을 생성하지 못했습니다 (빈 응답). 다른 모델을 사용해보세요.")
             
-            return result.get("response", "요약을 생성하지 못했습니다.")
+            # 빈 응답은 위에서 SummaryError로 처리했으므로 여기서는 항상 응답이 있음
+            return result["response"]
             
         except requests.exceptions.ConnectionError as e:
-            error_msg = f"Ollama 서버 연결 오류: {str(e)}. Ollama가 실행 중인지 확인하세요."
-            print(error_msg)
-            return error_msg
+            raise SummaryError(f"Ollama 서버 연결 오류: {str(e)}. Ollama가 실행 중인지 확인하세요.") from e
+        except SummaryError:
+            raise
         except Exception as e:
-            error_msg = f"Ollama API 요청 중 오류 발생: {str(e)}"
-            print(error_msg)
-            return error_msg
+            raise SummaryError(f"Ollama API 요청 중 오류 발생: {str(e)}") from e
     
     def _generate_upstage(self, text: str) -> str:
         """Generate a summary using Upstage's chat/completions API."""
@@ -472,12 +524,14 @@ class ModelHandler:
             }
             
             print(f"Upstage API 요청 중: {self.model_name or 'solar-1-mini'}")
-            response = requests.post(
-                "https://api.upstage.ai/v1/chat/completions",
-                headers=headers,
-                json=payload,
-                timeout=300
-            )
+            # 프로세스 공유 리미터로 Upstage chat 한도 안에서 순서대로 요청
+            with get_limiter("upstage_chat"):
+                response = get_session("upstage").post(
+                    "https://api.upstage.ai/v1/chat/completions",
+                    headers=headers,
+                    json=payload,
+                    timeout=request_timeout(300)
+                )
             
             # 오류 디버깅을 위한 상태 코드 출력
             if response.status_code != 200:
@@ -488,6 +542,4 @@ class ModelHandler:
             result = response.json()
             return result["choices"][0]["message"]["content"]
         except Exception as e:
-            error_msg = f"Upstage API 요청 중 오류 발생: {str(e)}"
-            print(error_msg)
-            return error_msg
+            raise SummaryError(f"Upstage API 요청 중 오류 발생: {str(e)}") from e
@@ -0,0 +1,275 @@
+import os
+import time
+import random
+import logging
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Set, Union
+
+import requests
+
+# 내부 모듈 임포트
+from retry_policy import parse_retry_after
+
+logger = logging.getLogger('ocr_endpoints')
+
+# 연속 실패가 이 횟수에 이르면 엔드포인트를 잠시 제외
+OCR_ENDPOINT_FAILURES = int(os.getenv("OCR_ENDPOINT_FAILURES", "3"))
+# 제외 시간(초, 다시 실패할 때마다 두 배씩 늘어나며 OCR_ENDPOINT_MAX_COOLDOWN까지)
+OCR_ENDPOINT_COOLDOWN = float(os.getenv("OCR_ENDPOINT_COOLDOWN", "10"))
+OCR_ENDPOINT_MAX_COOLDOWN = float(os.getenv("OCR_ENDPOINT_MAX_COOLDOWN", "120"))
+# OCR 서버가 바빠서(503) 거절한 요청을 Retry-After만큼 기다렸다 다시 보내는 횟수
+OCR_BUSY_RETRIES = int(os.getenv("OCR_BUSY_RETRIES", "3"))
+
+
+def parse_urls(urls: Union[str, Iterable[str]]) -> List[str]:
+    """서버 URL 목록(또는 쉼표로 구분한 문자열)을 정리하고 중복을 제거합니다."""
+    if isinstance(urls, str):
+        urls = urls.split(',')
+    result: List[str] = []
+    for url in urls:
+        url = url.strip().rstrip('/')
+        if url and url not in result:
+            result.append(url)
+    return result
+
+
+class Endpoint:
+    """OCR 서버 엔드포인트 하나의 요청 수, 응답 시간, 상태"""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.outstanding = 0  # 응답을 기다리는(또는 스트리밍 중인) 요청 수
+        self.requests = 0
+        self.failures = 0
+        self.busy = 0
+        self.consecutive_failures = 0
+        self.down_until = 0.0  # 연속 실패로 제외된 시각까지
+        self.busy_until = 0.0  # 503(Retry-After)으로 피하는 시각까지
+        self.latency: Optional[float] = None  # 응답 시간의 지수 이동 평균(초)
+
+    def available(self, now: float) -> bool:
+        return self.down_until <= now and self.busy_until <= now
+
+    def stats(self, now: float) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "healthy": self.down_until <= now,
+            "outstanding": self.outstanding,
+            "requests": self.requests,
+            "failures": self.failures,
+            "busy": self.busy,
+            "latency_seconds": round(self.latency, 3) if self.latency is not None else None
+        }
+
+
+class OCREndpoints:
+    """
+    여러 OCR 서버 중 처리 중인 요청이 가장 적은 서버를 고르는 클라이언트 측 분산기
+
+    서버마다 응답을 기다리는 요청 수를 세어 가장 한가한 서버로 보내고(같으면 응답이 빠른 서버),
+    연결 실패나 5xx가 연속되면 그 서버를 잠시 제외했다가 제외 시간이 지나면 다시 시도합니다.
+    503(Retry-After)을 보낸 서버는 그 시간 동안만 피합니다. 여러 스레드에서 함께 사용할 수 있습니다.
+    """
+
+    def __init__(
+        self,
+        urls: Union[str, Iterable[str]],
+        failure_threshold: int = OCR_ENDPOINT_FAILURES,
+        cooldown: float = OCR_ENDPOINT_COOLDOWN,
+        max_cooldown: float = OCR_ENDPOINT_MAX_COOLDOWN
+    ):
+        """
+        Args:
+            urls: OCR 서버 URL 목록 (또는 쉼표로 구분한 문자열)
+            failure_threshold: 서버를 제외할 연속 실패 횟수
+            cooldown: 처음 제외할 시간(초)
+            max_cooldown: 최대 제외 시간(초)
+        """
+        self.endpoints = [Endpoint(url) for url in parse_urls(urls)]
+        if not self.endpoints:
+            raise ValueError("OCR 서버 URL이 없습니다.")
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.endpoints)
+
+    @property
+    def urls(self) -> List[str]:
+        return [endpoint.url for endpoint in self.endpoints]
+
+    def acquire(self, exclude: Iterable[str] = ()) -> Optional[Endpoint]:
+        """
+        요청을 보낼 엔드포인트를 고르고 처리 중인 요청 수를 늘립니다.
+
+        사용할 수 있는 서버가 없으면 제외 시간이 가장 먼저 끝나는 서버를 고릅니다 (다시 살아났는지 확인).
+
+        Args:
+            exclude: 이번 요청에서 이미 실패했거나 바빴던 서버 URL
+
+        Returns:
+            엔드포인트 (exclude로 모든 서버가 빠진 경우 None)
+        """
+        exclude = set(exclude)
+        now = time.time()
+        with self._lock:
+            candidates = [endpoint for endpoint in self.endpoints if endpoint.url not in exclude]
+            if not candidates:
+                return None
+            available = [endpoint for endpoint in candidates if endpoint.available(now)]
+            if available:
+                endpoint = min(available, key=lambda e: (e.outstanding, e.latency or 0.0))
+            else:
+                endpoint = min(candidates, key=lambda e: max(e.down_until, e.busy_until))
+            endpoint.outstanding += 1
+            endpoint.requests += 1
+            return endpoint
+
+    def release(self, endpoint: Endpoint, outcome: str, elapsed: float = 0.0, retry_after: Optional[float] = None) -> None:
+        """
+        요청 결과를 기록하고 처리 중인 요청 수를 줄입니다.
+
+        Args:
+            endpoint: acquire로 받은 엔드포인트
+            outcome: 'ok'(응답 받음), 'busy'(503), 'failed'(연결 실패, 5xx)
+            elapsed: 응답 시간(초, 'ok'인 경우 평균에 반영)
+            retry_after: 'busy'인 경우 서버가 알려준 대기 시간(초)
+        """
+        now = time.time()
+        with self._lock:
+            endpoint.outstanding -= 1
+            if outcome == 'ok':
+                if endpoint.down_until > now or endpoint.consecutive_failures >= self.failure_threshold:
+                    logger.info(f"OCR 서버 복구: {endpoint.url}")
+                endpoint.consecutive_failures = 0
+                endpoint.down_until = 0.0
+                endpoint.latency = elapsed if endpoint.latency is None else 0.8 * endpoint.latency + 0.2 * elapsed
+            elif outcome == 'busy':
+                endpoint.busy += 1
+                endpoint.busy_until = now + (retry_after if retry_after is not None else 1.0)
+            else:
+                endpoint.failures += 1
+                endpoint.consecutive_failures += 1
+                if endpoint.consecutive_failures >= self.failure_threshold:
+                    extra = endpoint.consecutive_failures - self.failure_threshold
+                    cooldown = min(self.max_cooldown, self.cooldown * (2 ** extra))
+                    endpoint.down_until = now + cooldown
+                    logger.warning(f"OCR 서버 {endpoint.url}가 {endpoint.consecutive_failures}회 연속 실패하여 "
+                                   f"{cooldown:.0f}초 동안 제외합니다.")
+
+    def check_health(self, session: requests.Session, timeout: Any = 5) -> int:
+        """
+        모든 서버의 /health를 확인하고 상태를 갱신합니다.
+
+        Returns:
+            정상 응답한 서버 수
+        """
+        healthy = 0
+        for endpoint in self.endpoints:
+            with self._lock:
+                endpoint.outstanding += 1
+            start_time = time.time()
+            try:
+                response = session.get(f"{endpoint.url}/health", timeout=timeout)
+                ok = response.status_code == 200
+            except requests.exceptions.RequestException as e:
+                logger.warning(f"OCR 서버 상태 확인 실패: {endpoint.url} ({str(e)})")
+                ok = False
+            self.release(endpoint, 'ok' if ok else 'failed', time.time() - start_time)
+            healthy += ok
+        return healthy
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """서버별 처리 중인 요청 수, 요청/실패 횟수, 평균 응답 시간, 상태"""
+        now = time.time()
+        with self._lock:
+            return [endpoint.stats(now) for endpoint in self.endpoints]
+
+
+class EndpointAttempt:
+    """
+    요청 하나의 서버 선택과 재시도 규칙 (동기, 비동기 클라이언트가 함께 사용)
+
+    연결에 실패하면 다른 서버로 바로 다시 보내고, 서버가 바빠서 거절하면(503) 다른 서버로 보냅니다.
+    모든 서버가 바쁘면 Retry-After만큼 기다렸다가 다시 보냅니다 (busy_retries회까지).
+    요청을 보내고 기다리는 일은 호출하는 쪽이 맡습니다. 시도마다 acquire로 서버를 고르고 연결 실패는 connection_failed,
+    응답은 check로 알린 뒤, 사용할 응답을 다 읽으면 finish를 호출합니다.
+    """
+
+    def __init__(self, endpoints: OCREndpoints, busy_retries: int = OCR_BUSY_RETRIES):
+        """
+        Args:
+            endpoints: 요청을 나누어 보낼 OCR 서버 목록
+            busy_retries: 모든 서버가 바쁠 때 기다렸다 다시 보내는 최대 횟수
+        """
+        self.endpoints = endpoints
+        self.busy_retries = busy_retries
+        self.retries = 0
+        self.excluded: Set[str] = set()
+        self.endpoint: Optional[Endpoint] = None
+        self.start_time = 0.0
+        self.outcome = 'ok'
+        self.retry_after: Optional[float] = None
+
+    def acquire(self) -> Endpoint:
+        """이번 시도에서 요청을 보낼 서버를 고릅니다."""
+        self.endpoint = self.endpoints.acquire(self.excluded)
+        self.start_time = time.time()
+        return self.endpoint
+
+    def connection_failed(self, error: Exception) -> bool:
+        """
+        연결 실패를 기록합니다.
+
+        Returns:
+            다른 서버로 다시 보낼 수 있으면 True (모든 서버가 실패했으면 False, 호출한 쪽이 예외를 그대로 올림)
+        """
+        self.endpoints.release(self.endpoint, 'failed')
+        self.excluded.add(self.endpoint.url)
+        if len(self.excluded) >= len(self.endpoints):
+            return False
+        logger.warning(f"OCR 서버 요청 실패({self.endpoint.url}: {str(error)}), 다른 서버로 다시 보냅니다.")
+        return True
+
+    def check(self, status_code: int, retry_after: Optional[str] = None) -> Optional[float]:
+        """
+        응답 상태 코드로 다음 동작을 정합니다.
+
+        Args:
+            status_code: 응답 상태 코드
+            retry_after: 응답의 Retry-After 헤더 값
+
+        Returns:
+            응답을 그대로 사용하면 None (응답을 다 읽은 뒤 finish 호출),
+            그렇지 않으면 응답을 닫고 이 시간(초)만큼 기다렸다가 다시 acquire (0이면 바로 다른 서버로)
+        """
+        if status_code != 503:
+            self.outcome = 'failed' if status_code >= 500 else 'ok'
+            return None
+        self.retry_after = parse_retry_after(retry_after)
+        self.excluded.add(self.endpoint.url)
+        all_busy = len(self.excluded) >= len(self.endpoints)
+        if all_busy and self.retries >= self.busy_retries:
+            self.outcome = 'busy'
+            return None
+        self.endpoints.release(self.endpoint, 'busy', retry_after=self.retry_after)
+        if not all_busy:
+            return 0.0
+        # 같이 거절된 요청들이 한꺼번에 다시 몰리지 않도록 대기 시간을 조금씩 다르게 함
+        delay = min(self.retry_after if self.retry_after is not None else 2 ** self.retries, 60) * random.uniform(1.0, 1.5)
+        self.retries += 1
+        self.excluded.clear()
+        logger.warning(f"OCR 서버가 모두 바빠 {delay:.1f}초 후 다시 요청합니다. (재시도 {self.retries}/{self.busy_retries})")
+        return delay
+
+    def finish(self, failed: bool = False) -> None:
+        """
+        사용한 응답의 결과를 기록합니다.
+
+        Args:
+            failed: 응답을 읽다가 연결이 끊긴 경우 True
+        """
+        outcome = 'failed' if failed else self.outcome
+        self.endpoints.release(self.endpoint, outcome, time.time() - self.start_time, self.retry_after)
@@ -0,0 +1,253 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+from typing import List, Dict, Any, Optional
+
+logger = logging.getLogger('parse_cache')
+
+# 캐시 항목 형식 버전 (텍스트 정규화 방식이 바뀌면 올려서 기존 항목을 무효화)
+CACHE_VERSION = 2
+
+# 캐시 키에 포함되는 업스테이지 요청 옵션
+CACHE_KEY_OPTIONS = ('model', 'ocr', 'chart_recognition', 'output_formats', 'base64_encoding')
+
+ENTRY_FILE = "entry.json"
+FIGURES_DIR = "figures"
+
+
+class ParseCache:
+    """PDF 파일 해시(SHA-256)와 요청 옵션을 키로 하는 디스크 기반 파싱 결과 캐시"""
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        max_age_days: Optional[float] = None
+    ):
+        """
+        초기화 함수
+
+        Args:
+            cache_dir: 캐시 디렉토리 (None인 경우 PARSE_CACHE_DIR 환경변수 또는 .parse_cache)
+            max_entries: 보관할 최대 문서 수
+            max_bytes: 캐시 전체 최대 크기(바이트)
+            max_age_days: 항목 최대 보관 기간(일), 0 이하이면 무제한
+        """
+        self.cache_dir = cache_dir or os.getenv("PARSE_CACHE_DIR", ".parse_cache")
+        self.max_entries = max_entries if max_entries is not None else int(os.getenv("PARSE_CACHE_MAX_ENTRIES", "500"))
+        self.max_bytes = max_bytes if max_bytes is not None else int(os.getenv("PARSE_CACHE_MAX_MB", "2048")) * 1024 * 1024
+        self.max_age_days = max_age_days if max_age_days is not None else float(os.getenv("PARSE_CACHE_MAX_AGE_DAYS", "30"))
+        os.makedirs(self.cache_dir, exist_ok=True)
+        logger.info(f"파싱 캐시 초기화 완료 (경로: {self.cache_dir}, 최대 {self.max_entries}개, {self.max_bytes // (1024 * 1024)} MB)")
+
+    @staticmethod
+    def hash_file(path: str, chunk_size: int = 1024 * 1024) -> str:
+        """파일 내용의 SHA-256 해시를 계산합니다."""
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(chunk_size), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    @staticmethod
+    def make_key(file_hash: str, options: Dict[str, Any]) -> str:
+        """
+        파일 해시와 요청 옵션으로 캐시 키를 생성합니다.
+
+        Args:
+            file_hash: 파일 내용의 SHA-256 해시
+            options: 업스테이지 API 요청 파라미터
+
+        Returns:
+            캐시 키 (16진수 문자열)
+        """
+        key_options = {name: options.get(name) for name in CACHE_KEY_OPTIONS}
+        payload = json.dumps(
+            {"version": CACHE_VERSION, "file": file_hash, "options": key_options},
+            sort_keys=True
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def _is_expired(self, entry_dir: str, now: Optional[float] = None) -> bool:
+        # 항목 디렉토리의 mtime은 생성 시점에 고정되므로(접근 시에는 entry.json만 갱신) 생성 시간으로 사용
+        if self.max_age_days <= 0:
+            return False
+        now = now or time.time()
+        try:
+            created = os.path.getmtime(entry_dir)
+        except OSError:
+            return True
+        return now - created > self.max_age_days * 86400
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        캐시 항목을 조회합니다.
+
+        Args:
+            key: make_key()로 생성한 캐시 키
+
+        Returns:
+            {'text', 'figures', 'metadata'} 딕셔너리 또는 None (미스/만료)
+        """
+        entry_dir = self._entry_dir(key)
+        entry_path = os.path.join(entry_dir, ENTRY_FILE)
+        if not os.path.exists(entry_path):
+            return None
+
+        if self._is_expired(entry_dir):
+            logger.info(f"만료된 캐시 항목 삭제: {key[:12]}")
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            return None
+
+        try:
+            with open(entry_path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"손상된 캐시 항목 삭제: {key[:12]} ({str(e)})")
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            return None
+
+        # LRU 판단을 위해 마지막 접근 시간 갱신
+        try:
+            os.utime(entry_path, None)
+        except OSError:
+            pass
+
+        figures_dir = os.path.join(entry_dir, FIGURES_DIR)
+        entry['figures'] = [os.path.join(figures_dir, name) for name in entry.get('figures', [])]
+        return entry
+
+    def restore_figures(self, entry: Dict[str, Any], images_dir: str) -> List[str]:
+        """
+        캐시된 이미지를 출력 디렉토리로 복원합니다 (가능하면 하드 링크 사용).
+
+        Args:
+            entry: get()이 반환한 캐시 항목
+            images_dir: 이미지를 복원할 디렉토리
+
+        Returns:
+            복원된 이미지 경로 리스트
+        """
+        os.makedirs(images_dir, exist_ok=True)
+        image_paths = []
+        for src in entry.get('figures', []):
+            dst = os.path.join(images_dir, os.path.basename(src))
+            try:
+                if not os.path.exists(dst):
+                    try:
+                        os.link(src, dst)
+                    except OSError:
+                        shutil.copy2(src, dst)
+                image_paths.append(dst)
+            except OSError as e:
+                logger.warning(f"캐시 이미지 복원 실패: {src} ({str(e)})")
+        return image_paths
+
+    def put(self, key: str, text: str, image_paths: List[str], metadata: Optional[Dict[str, Any]] = None) -> None:
+        """
+        파싱 결과를 캐시에 저장합니다.
+
+        Args:
+            key: make_key()로 생성한 캐시 키
+            text: 정규화된 추출 텍스트
+            image_paths: 추출된 이미지 경로 리스트
+            metadata: 함께 저장할 부가 정보
+        """
+        entry_dir = self._entry_dir(key)
+        tmp_dir = f"{entry_dir}.tmp{os.getpid()}_{int(time.time() * 1000)}"
+        figures_dir = os.path.join(tmp_dir, FIGURES_DIR)
+        os.makedirs(figures_dir, exist_ok=True)
+
+        try:
+            figure_names = []
+            for path in image_paths:
+                name = os.path.basename(path)
+                shutil.copy2(path, os.path.join(figures_dir, name))
+                figure_names.append(name)
+
+            entry = {
+                'version': CACHE_VERSION,
+                'created_at': time.time(),
+                'text': text,
+                'figures': figure_names,
+                'metadata': metadata or {}
+            }
+            with open(os.path.join(tmp_dir, ENTRY_FILE), 'w', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False)
+
+            # 임시 디렉토리를 완성한 뒤 교체하여 반쯤 쓰인 항목이 읽히지 않도록 함
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            os.makedirs(os.path.dirname(entry_dir), exist_ok=True)
+            os.replace(tmp_dir, entry_dir)
+            logger.info(f"파싱 결과 캐시 저장: {key[:12]} (텍스트 {len(text)} 자, 이미지 {len(figure_names)}개)")
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        self.evict()
+
+    def _scan_entries(self) -> List[Dict[str, Any]]:
+        entries = []
+        for prefix in os.listdir(self.cache_dir):
+            prefix_dir = os.path.join(self.cache_dir, prefix)
+            if not os.path.isdir(prefix_dir):
+                continue
+            for key in os.listdir(prefix_dir):
+                entry_dir = os.path.join(prefix_dir, key)
+                entry_path = os.path.join(entry_dir, ENTRY_FILE)
+                if '.tmp' in key or not os.path.exists(entry_path):
+                    continue
+                size = 0
+                for root, _, files in os.walk(entry_dir):
+                    for name in files:
+                        try:
+                            size += os.path.getsize(os.path.join(root, name))
+                        except OSError:
+                            pass
+                entries.append({
+                    'dir': entry_dir,
+                    'path': entry_path,
+                    'size': size,
+                    'last_access': os.path.getmtime(entry_path)
+                })
+        return entries
+
+    def evict(self) -> int:
+        """
+        만료된 항목을 삭제하고, 개수/크기 한도를 넘으면 오래 사용되지 않은 항목부터 삭제합니다.
+
+        Returns:
+            삭제된 항목 수
+        """
+        removed = 0
+        now = time.time()
+        entries = []
+        for entry in self._scan_entries():
+            if self._is_expired(entry['dir'], now):
+                shutil.rmtree(entry['dir'], ignore_errors=True)
+                removed += 1
+            else:
+                entries.append(entry)
+
+        entries.sort(key=lambda e: e['last_access'])
+        total_bytes = sum(e['size'] for e in entries)
+        while entries and (len(entries) > self.max_entries or total_bytes > self.max_bytes):
+            oldest = entries.pop(0)
+            shutil.rmtree(oldest['dir'], ignore_errors=True)
+            total_bytes -= oldest['size']
+            removed += 1
+
+        if removed:
+            logger.info(f"캐시 항목 {removed}개 삭제 (남은 항목: {len(entries)}개, {total_bytes / (1024 * 1024):.1f} MB)")
+        return removed
+
+    def clear(self) -> None:
+        """캐시 전체를 삭제합니다."""
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        os.makedirs(self.cache_dir, exist_ok=True)
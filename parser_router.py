@@ -0,0 +1,209 @@
+import os
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+import fitz  # PyMuPDF
+
+# 내부 모듈 임포트
+from document_elements import DocumentElements
+from document_processor import UpstageDocumentParser
+from pymupdf_extractor import extract_pages
+
+logger = logging.getLogger('parser_router')
+
+# 페이지 분류 기준 (환경 변수로 조정 가능)
+AUTO_MIN_TEXT_CHARS = int(os.getenv("AUTO_MIN_TEXT_CHARS", "80"))  # 이보다 글자가 적은 페이지는 텍스트 레이어가 없는 것으로 판단
+AUTO_DENSE_TEXT_CHARS = int(os.getenv("AUTO_DENSE_TEXT_CHARS", "800"))  # 이미지가 페이지를 덮어도 이만큼 글자가 있으면 로컬 추출
+AUTO_IMAGE_COVERAGE = float(os.getenv("AUTO_IMAGE_COVERAGE", "0.5"))  # 페이지 면적 대비 이미지 비율 기준
+AUTO_SAMPLE_PAGES = int(os.getenv("AUTO_SAMPLE_PAGES", "12"))  # 문서 전체 스캔 여부를 판단할 표본 페이지 수
+AUTO_SCANNED_RATIO = float(os.getenv("AUTO_SCANNED_RATIO", "0.8"))  # 표본 중 이 비율 이상이 스캔 페이지면 문서 전체를 업스테이지로 처리
+
+
+class PageProfile:
+    """페이지 하나의 텍스트 레이어 밀도와 이미지 면적 비율"""
+
+    __slots__ = ('page', 'chars', 'image_coverage')
+
+    def __init__(self, page: int, chars: int, image_coverage: float):
+        self.page = page  # 0부터 시작하는 페이지 번호
+        self.chars = chars
+        self.image_coverage = image_coverage
+
+    @property
+    def needs_ocr(self) -> bool:
+        """텍스트 레이어가 없거나 스캔 이미지 위주인 페이지인지 여부"""
+        if self.chars < AUTO_MIN_TEXT_CHARS:
+            return True
+        return self.image_coverage >= AUTO_IMAGE_COVERAGE and self.chars < AUTO_DENSE_TEXT_CHARS
+
+    def __repr__(self) -> str:
+        return f"<PageProfile p{self.page + 1} chars={self.chars} images={self.image_coverage:.0%}>"
+
+
+def _image_coverage(page: fitz.Page) -> float:
+    """페이지 면적 대비 이미지가 차지하는 비율 (이미지를 디코딩하지 않고 배치 정보만 사용)"""
+    page_rect = page.rect
+    page_area = page_rect.width * page_rect.height
+    if page_area <= 0:
+        return 0.0
+    covered = 0.0
+    for info in page.get_image_info():
+        rect = fitz.Rect(info['bbox']) & page_rect
+        if not rect.is_empty:
+            covered += rect.width * rect.height
+    return min(1.0, covered / page_area)
+
+
+def profile_page(page: fitz.Page, text: Optional[str] = None) -> PageProfile:
+    """
+    페이지의 텍스트 밀도와 이미지 면적을 측정합니다.
+
+    Args:
+        page: fitz 페이지
+        text: 이미 추출한 페이지 텍스트 (None이면 새로 추출)
+    """
+    if text is None:
+        text = page.get_text()
+    chars = sum(1 for char in text if not char.isspace())
+    return PageProfile(page.number, chars, _image_coverage(page))
+
+
+def sample_profiles(doc: fitz.Document, sample_size: int = AUTO_SAMPLE_PAGES) -> List[PageProfile]:
+    """문서 전체에서 고르게 표본 페이지를 골라 측정합니다."""
+    page_count = doc.page_count
+    if page_count <= sample_size:
+        indices = range(page_count)
+    else:
+        step = page_count / sample_size
+        indices = sorted({int(i * step) for i in range(sample_size)})
+    return [profile_page(doc.load_page(i)) for i in indices]
+
+
+def _write_subset_pdf(doc: fitz.Document, pages: List[int], path: str) -> None:
+    """지정한 페이지만 담은 PDF를 만듭니다."""
+    subset = fitz.open()
+    try:
+        for page in pages:
+            subset.insert_pdf(doc, from_page=page, to_page=page)
+        subset.save(path)
+    finally:
+        subset.close()
+
+
+def _map_remote_text(elements: Optional[DocumentElements], remote_text: str, remote_pages: List[int]) -> Dict[int, str]:
+    """업스테이지 결과를 원본 페이지 번호별 텍스트로 나눕니다 (요소 목록의 페이지 정보 사용, 빈 페이지는 제외)."""
+    if elements:
+        page_texts = {}
+        for sub_page in elements.pages:
+            if 1 <= sub_page <= len(remote_pages):
+                page_text = elements.page_text(sub_page, remote_text)
+                # 업스테이지가 텍스트를 찾지 못한 페이지는 로컬 추출 텍스트와 이미지를 그대로 사용
+                if page_text.strip():
+                    page_texts[remote_pages[sub_page - 1]] = page_text
+        if page_texts:
+            return page_texts
+
+    # 요소 정보가 없으면 첫 번째 페이지 자리에 전체 텍스트를 둠
+    if len(remote_pages) > 1:
+        logger.warning("업스테이지 요소 정보가 없어 페이지별로 나누지 못했습니다. 첫 번째 대상 페이지에 전체 텍스트를 넣습니다.")
+    return {remote_pages[0]: remote_text}
+
+
+def route_pdf(
+    pdf_path: str,
+    output_dir: str,
+    parser: Optional[UpstageDocumentParser] = None
+) -> Tuple[str, List[str], Dict[str, Any]]:
+    """
+    페이지별 텍스트 레이어 밀도에 따라 로컬 추출과 업스테이지 파싱을 나누어 처리합니다.
+
+    1. 표본 페이지 대부분이 스캔 페이지면 문서 전체를 업스테이지로 보냅니다.
+    2. 그렇지 않으면 PyMuPDF로 모든 페이지를 추출한 뒤, 텍스트가 부족하거나 이미지 위주인 페이지만
+       모아 작은 PDF로 만들어 업스테이지로 보내고, 결과를 페이지 순서대로 합칩니다.
+    업스테이지를 사용할 수 없으면(API 키 없음, 요청 실패) 로컬 추출 결과를 그대로 사용합니다.
+    1단계의 전체 문서 파싱이 실패하면 2단계에서 업스테이지를 다시 호출하지 않고 로컬 추출만 사용합니다.
+
+    Args:
+        pdf_path: PDF 파일 경로
+        output_dir: 출력 디렉토리 (이미지는 output_dir/images에 저장)
+        parser: 업스테이지 파서 (None이면 필요할 때 생성)
+
+    Returns:
+        (추출된_텍스트, 이미지_경로_리스트, 라우팅_정보) 튜플
+        라우팅_정보: {'mode': 'pymupdf' | 'upstage' | 'hybrid', 'page_count', 'remote_pages'(1부터 시작)}
+    """
+    images_dir = os.path.join(output_dir, "images")
+    os.makedirs(images_dir, exist_ok=True)
+
+    with fitz.open(pdf_path) as doc:
+        page_count = doc.page_count
+        samples = sample_profiles(doc)
+
+    scanned = sum(1 for profile in samples if profile.needs_ocr)
+    logger.info(f"표본 {len(samples)}페이지 중 스캔/저밀도 페이지: {scanned}개")
+
+    # 1. 대부분 스캔 문서면 로컬 추출을 건너뛰고 업스테이지로 전체 처리
+    remote_failed = False
+    if samples and scanned / len(samples) >= AUTO_SCANNED_RATIO:
+        try:
+            parser = parser or UpstageDocumentParser()
+            text, image_paths = parser.parse_document(pdf_path, output_dir)
+            if text:
+                logger.info("스캔 문서로 판단하여 업스테이지로 전체 문서를 처리했습니다.")
+                return text, image_paths, {'mode': 'upstage', 'page_count': page_count, 'remote_pages': list(range(1, page_count + 1))}
+            logger.warning("업스테이지 전체 문서 파싱 결과가 비어 있어 로컬 추출로 대체합니다.")
+        except Exception as e:
+            logger.warning(f"업스테이지 파싱을 사용할 수 없어 로컬 추출로 대체합니다: {str(e)}")
+        # 방금 실패한 API에 거의 모든 페이지를 다시 보내지 않도록 이후에는 로컬 추출만 사용
+        remote_failed = True
+
+    # 2. 로컬 추출 후 텍스트가 부족한 페이지만 골라냄
+    pages = extract_pages(pdf_path, images_dir)
+    with fitz.open(pdf_path) as doc:
+        remote_pages = [
+            page_num for page_num, page_text, _ in pages
+            if profile_page(doc.load_page(page_num), page_text).needs_ocr
+        ]
+
+        remote_texts: Dict[int, str] = {}
+        remote_images: List[str] = []
+        if remote_pages and remote_failed:
+            logger.info(f"업스테이지 파싱이 실패하여 텍스트가 부족한 {len(remote_pages)}페이지도 로컬 추출 결과를 사용합니다.")
+        elif remote_pages:
+            subset_path = os.path.join(output_dir, f"_upstage_pages_{os.getpid()}.pdf")
+            try:
+                _write_subset_pdf(doc, remote_pages, subset_path)
+                parser = parser or UpstageDocumentParser()
+                remote = parser.parse(subset_path, output_dir)
+                remote_images = remote.image_paths
+                if remote.text:
+                    remote_texts = _map_remote_text(remote.elements, remote.text, remote_pages)
+                else:
+                    logger.warning("업스테이지 파싱 결과가 비어 있어 해당 페이지는 로컬 추출 결과를 사용합니다.")
+            except Exception as e:
+                logger.warning(f"업스테이지 파싱을 사용할 수 없어 로컬 추출 결과를 사용합니다: {str(e)}")
+            finally:
+                if os.path.exists(subset_path):
+                    os.remove(subset_path)
+
+    # 3. 페이지 순서대로 병합 (업스테이지로 처리한 스캔 페이지의 페이지 전체 이미지는 다시 OCR하지 않도록 제외)
+    text_parts = []
+    image_paths = []
+    for page_num, page_text, page_images in pages:
+        text_parts.append(f"\n--- Page {page_num + 1} ---\n")
+        if page_num in remote_texts:
+            text_parts.append(remote_texts[page_num])
+            text_parts.append("\n")
+        else:
+            text_parts.append(page_text)
+            image_paths.extend(page_images)
+    image_paths.extend(remote_images)
+
+    handled_remote = sorted(remote_texts)
+    mode = "hybrid" if handled_remote else "pymupdf"
+    logger.info(f"자동 파서 라우팅 완료: 전체 {page_count}페이지 중 업스테이지 {len(handled_remote)}페이지")
+    return "".join(text_parts), image_paths, {
+        'mode': mode,
+        'page_count': page_count,
+        'remote_pages': [page + 1 for page in handled_remote]
+    }
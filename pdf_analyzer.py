@@ -8,6 +8,8 @@ from typing import List, Dict, Any, Optional, Tuple
 from document_processor import extract_text_and_images_from_pdf
 from model_handler import ModelHandler
 from image_analyzer import analyze_pdf_images
+from pymupdf_extractor import extract_from_pdf
+from parser_router import route_pdf
 
 # 로깅 설정
 logging.basicConfig(
@@ -17,6 +19,43 @@ logging.basicConfig(
 )
 logger = logging.getLogger('pdf_analyzer')
 
+# 네트워크 없이 PyMuPDF로 처리하는 파서 옵션
+LOCAL_PARSERS = ('pymupdf', 'local')
+
+def _extract_with_upstage(pdf_path: str, output_dir: str) -> Tuple[str, List[str]]:
+    """업스테이지 Document Parser API로 텍스트와 이미지를 추출합니다."""
+    # 이미지 저장을 위한 디렉토리 생성
+    images_output_dir = os.path.join(output_dir, "images")
+    os.makedirs(images_output_dir, exist_ok=True)
+    
+    text, images = extract_text_and_images_from_pdf(
+        pdf_path, 
+        output_dir=output_dir  # 이미지 저장 디렉토리는 parse_document 내부에서 처리
+    )
+    logger.info("업스테이지 PDF 파서를 사용하여 문서를 처리했습니다.")
+    
+    if not text:
+        # API 응답에서 직접 텍스트 추출 시도
+        response_file = os.path.join(output_dir, "images", "logs", "response_*.json")
+        import glob
+        response_files = glob.glob(response_file)
+        if response_files:
+            with open(response_files[0], 'r', encoding='utf-8') as f:
+                response_data = json.load(f)
+            
+            # 다양한 키에서 텍스트 추출 시도
+            for key in ['text', 'markdown', 'html']:
+                if key in response_data.get('content', {}):
+                    text = response_data['content'][key]
+                    logger.info(f"API 응답에서 {key} 형식으로 텍스트 추출 성공")
+                    break
+            
+            # 여전히 텍스트가 없으면 content에서 직접 추출
+            if not text and 'content' in response_data:
+                text = str(response_data['content'])
+    
+    return text, images
+
 def analyze_pdf(
     pdf_path: str, 
     output_dir: str = "output", 
@@ -36,7 +75,7 @@ def analyze_pdf(
         output_dir: 출력 디렉토리
         model_type: 요약에 사용할 모델 타입 ('upstage', 'llama', 'openai', 'gemini')
         model_name: 특정 모델 이름/버전
-        parser: PDF 파서 ('auto', 'upstage', 'pymupdf')
+        parser: PDF 파서 ('auto': 페이지별 자동 선택 / 'upstage', 'api': 업스테이지 API / 'pymupdf', 'local': 네트워크 없이 로컬 추출)
         language: 요약 언어 ('ko', 'en')
         ocr_language: OCR 언어 ('kor+eng', 'eng', 'kor' 등)
         save_json: JSON 형식으로도 결과를 저장할지 여부
@@ -80,38 +119,22 @@ def analyze_pdf(
         image_paths = []
         parser_used = ""
         
-        # PDF 파싱 (업스테이지 파서만 사용)
+        # PDF 파싱 (parser 옵션에 따라 로컬 PyMuPDF 또는 업스테이지 API 사용)
         try:
-            # 이미지 저장을 위한 디렉토리 생성
-            images_output_dir = os.path.join(output_dir, "images")
-            os.makedirs(images_output_dir, exist_ok=True)
-            
-            text, images = extract_text_and_images_from_pdf(
-                pdf_path, 
-                output_dir=output_dir  # 이미지 저장 디렉토리는 parse_document 내부에서 처리
-            )
-            metadata = {}  # 메타데이터는 빈 딕셔너리로 초기화
-            logger.info("업스테이지 PDF 파서를 사용하여 문서를 처리했습니다.")
-            
-            if not text:
-                # API 응답에서 직접 텍스트 추출 시도
-                response_file = os.path.join(output_dir, "images", "logs", "response_*.json")
-                import glob
-                response_files = glob.glob(response_file)
-                if response_files:
-                    with open(response_files[0], 'r', encoding='utf-8') as f:
-                        response_data = json.load(f)
-                    
-                    # 다양한 키에서 텍스트 추출 시도
-                    for key in ['text', 'markdown', 'html']:
-                        if key in response_data.get('content', {}):
-                            text = response_data['content'][key]
-                            logger.info(f"API 응답에서 {key} 형식으로 텍스트 추출 성공")
-                            break
-                    
-                    # 여전히 텍스트가 없으면 content에서 직접 추출
-                    if not text and 'content' in response_data:
-                        text = str(response_data['content'])
+            parser_choice = (parser or "auto").lower()
+            if parser_choice in LOCAL_PARSERS:
+                text, images = extract_from_pdf(pdf_path, pdf_specific_output_dir)
+                parser_used = "pymupdf"
+                logger.info("PyMuPDF 로컬 추출기를 사용하여 문서를 처리했습니다.")
+            elif parser_choice == "auto":
+                # 텍스트 레이어가 있는 페이지는 로컬에서, 스캔/저밀도 페이지만 업스테이지로 처리
+                text, images, route_info = route_pdf(pdf_path, pdf_specific_output_dir)
+                parser_used = f"auto ({route_info['mode']})"
+                if route_info['remote_pages'] and route_info['mode'] == 'hybrid':
+                    log_message(f"업스테이지 처리 페이지: {route_info['remote_pages']}")
+            else:
+                text, images = _extract_with_upstage(pdf_path, output_dir)
+                parser_used = "upstage"
             
             if not text:
                 raise ValueError("PDF에서 텍스트를 추출할 수 없습니다.")
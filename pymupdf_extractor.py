@@ -1,75 +1,170 @@
 import fitz  # PyMuPDF
 import os
 import sys
+import shutil
+import logging
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger('pymupdf_extractor')
+
+# 이보다 페이지가 적은 문서는 프로세스 풀 없이 현재 프로세스에서 처리
+MIN_PAGES_FOR_POOL = int(os.getenv("PYMUPDF_MIN_PAGES_FOR_POOL", "16"))
+# 작업자 하나가 한 번에 맡을 페이지 수
+PAGES_PER_TASK = int(os.getenv("PYMUPDF_PAGES_PER_TASK", "8"))
+
+# (페이지 번호, 페이지 텍스트, 이미지 경로 리스트)
+PageResult = Tuple[int, str, List[str]]
+
+
+def _extract_page_range(pdf_path: str, start: int, end: int, images_dir: str) -> List[PageResult]:
+    """
+    페이지 범위 [start, end)를 한 번씩만 훑으며 텍스트와 이미지를 함께 추출합니다.
+
+    프로세스 풀 작업자에서 실행되므로 fitz 문서는 작업자마다 따로 엽니다.
+    """
+    results = []
+    saved_xrefs: Dict[int, str] = {}  # 같은 xref(로고, 머리글 배너 등)는 한 번만 디코딩
+    with fitz.open(pdf_path) as doc:
+        for page_num in range(start, end):
+            page = doc.load_page(page_num)
+            page_text = page.get_text()
+
+            image_paths = []
+            for img_index, img in enumerate(page.get_images(full=True)):
+                xref = img[0]
+                if xref in saved_xrefs:
+                    # 반복되는 이미지는 하드 링크로 저장하여 디스크에는 한 번만 기록하고,
+                    # OCR 단계의 중복 제거가 같은 파일임을 바로 알아볼 수 있게 함
+                    first_path = saved_xrefs[xref]
+                    image_path = os.path.join(images_dir, f"page_{page_num + 1}_img_{img_index + 1}{os.path.splitext(first_path)[1]}")
+                    if not os.path.exists(image_path):
+                        try:
+                            os.link(first_path, image_path)
+                        except OSError:
+                            shutil.copyfile(first_path, image_path)
+                    image_paths.append(image_path)
+                    continue
+                try:
+                    base_image = doc.extract_image(xref)
+                except Exception as e:
+                    logger.warning(f"이미지 추출 실패 (페이지 {page_num + 1}, xref {xref}): {str(e)}")
+                    continue
+                if not base_image:
+                    continue
+
+                image_filename = f"page_{page_num + 1}_img_{img_index + 1}.{base_image['ext']}"
+                image_path = os.path.join(images_dir, image_filename)
+                with open(image_path, "wb") as f:
+                    f.write(base_image["image"])
+                saved_xrefs[xref] = image_path
+                image_paths.append(image_path)
+
+            results.append((page_num, page_text, image_paths))
+    return results
+
+
+def _page_ranges(page_count: int, pages_per_task: int) -> List[Tuple[int, int]]:
+    return [(start, min(start + pages_per_task, page_count)) for start in range(0, page_count, pages_per_task)]
+
+
+def extract_pages(
+    pdf_path: str,
+    images_dir: str,
+    workers: Optional[int] = None,
+    pages_per_task: int = PAGES_PER_TASK
+) -> List[PageResult]:
+    """
+    모든 페이지의 텍스트와 이미지를 페이지 순서대로 추출합니다.
+
+    페이지가 많으면 페이지 범위를 프로세스 풀에 나누어 맡기고, 풀을 사용할 수 없는 환경에서는
+    현재 프로세스에서 순서대로 처리합니다.
+
+    Args:
+        pdf_path: PDF 파일 경로
+        images_dir: 이미지를 저장할 디렉토리
+        workers: 작업자 프로세스 수 (None이면 CPU 수, 1이면 현재 프로세스에서 처리)
+        pages_per_task: 작업자 하나가 한 번에 맡을 페이지 수
+
+    Returns:
+        페이지 번호 순으로 정렬된 (페이지 번호, 텍스트, 이미지 경로 리스트) 리스트
+    """
+    with fitz.open(pdf_path) as doc:
+        page_count = doc.page_count
+
+    workers = workers or os.cpu_count() or 1
+    ranges = _page_ranges(page_count, max(1, pages_per_task))
+    if workers <= 1 or len(ranges) <= 1 or page_count < MIN_PAGES_FOR_POOL:
+        return _extract_page_range(pdf_path, 0, page_count, images_dir)
+
+    workers = min(workers, len(ranges))
+    logger.info(f"페이지 병렬 추출: {page_count}페이지, 작업 {len(ranges)}개, 작업자 {workers}개")
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            chunks = executor.map(
+                _extract_page_range,
+                [pdf_path] * len(ranges),
+                [start for start, _ in ranges],
+                [end for _, end in ranges],
+                [images_dir] * len(ranges)
+            )
+            # map은 제출 순서대로 결과를 돌려주므로 페이지 순서가 유지됨
+            return [page for chunk in chunks for page in chunk]
+    except Exception as e:
+        logger.warning(f"프로세스 풀 추출 실패, 현재 프로세스에서 다시 추출합니다: {str(e)}")
+        return _extract_page_range(pdf_path, 0, page_count, images_dir)
+
+
+def extract_from_pdf(pdf_path, output_dir, workers=None):
+    """PDF 파일에서 텍스트와 이미지를 추출합니다 (네트워크 없이 로컬에서 처리).
 
-def extract_from_pdf(pdf_path, output_dir):
-    """PDF 파일에서 텍스트와 이미지를 추출합니다.
-    
     Args:
         pdf_path (str): PDF 파일 경로
         output_dir (str): 출력 디렉토리
+        workers (int, optional): 페이지 추출 작업자 프로세스 수 (None이면 CPU 수)
+
+    Returns:
+        (추출된_텍스트, 이미지_경로_리스트) 튜플
     """
     # 출력 디렉토리 생성
     os.makedirs(output_dir, exist_ok=True)
     images_dir = os.path.join(output_dir, "images")
     os.makedirs(images_dir, exist_ok=True)
-    
-    # PDF 열기
-    doc = fitz.open(pdf_path)
-    
-    print(f"PDF 페이지 수: {len(doc)}")
-    
-    # 텍스트 추출
-    text = ""
-    for page_num in range(len(doc)):
-        page = doc.load_page(page_num)
-        text += f"\n--- Page {page_num + 1} ---\n"
-        text += page.get_text()
-    
+
+    pages = extract_pages(pdf_path, images_dir, workers=workers)
+    print(f"PDF 페이지 수: {len(pages)}")
+
+    # 페이지 텍스트는 리스트에 모았다가 한 번에 합침
+    text_parts = []
+    image_paths = []
+    for page_num, page_text, page_images in pages:
+        text_parts.append(f"\n--- Page {page_num + 1} ---\n")
+        text_parts.append(page_text)
+        image_paths.extend(page_images)
+    text = "".join(text_parts)
+
     # 텍스트 저장
     text_file = os.path.join(output_dir, "extracted_text.txt")
     with open(text_file, 'w', encoding='utf-8') as f:
         f.write(text)
     print(f"추출된 텍스트가 저장되었습니다: {text_file}")
-    
-    # 이미지 추출
-    image_count = 0
-    for page_num in range(len(doc)):
-        page = doc.load_page(page_num)
-        image_list = page.get_images(full=True)
-        
-        for img_index, img in enumerate(image_list):
-            xref = img[0]
-            base_image = doc.extract_image(xref)
-            image_bytes = base_image["image"]
-            image_ext = base_image["ext"]
-            
-            image_filename = f"page_{page_num + 1}_img_{img_index + 1}.{image_ext}"
-            image_path = os.path.join(images_dir, image_filename)
-            
-            with open(image_path, "wb") as f:
-                f.write(image_bytes)
-            
-            image_count += 1
-            print(f"이미지 저장됨: {image_path}")
-    
-    print(f"\n총 {image_count}개의 이미지를 추출했습니다.")
+
+    print(f"\n총 {len(image_paths)}개의 이미지를 추출했습니다.")
     print(f"결과가 저장된 디렉토리: {output_dir}")
-    
-    doc.close()
-    return text, image_count
+
+    return text, image_paths
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
         print("사용법: python pymupdf_extractor.py <PDF 파일 경로> [출력 디렉토리]")
         sys.exit(1)
-    
+
     pdf_path = sys.argv[1]
     output_dir = sys.argv[2] if len(sys.argv) > 2 else "output_pymupdf"
-    
+
     # 타임스탬프 추가
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     output_dir = f"{output_dir}_{timestamp}"
-    
+
     extract_from_pdf(pdf_path, output_dir)
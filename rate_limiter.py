@@ -0,0 +1,236 @@
+import os
+import time
+import logging
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+logger = logging.getLogger('rate_limiter')
+
+# 이름별 기본 한도 (분당 요청 수, 동시 요청 수)
+# 환경 변수 RATE_LIMIT_<NAME>_RPM, RATE_LIMIT_<NAME>_CONCURRENCY로 조정 가능 (예: RATE_LIMIT_UPSTAGE_PARSE_RPM)
+DEFAULT_LIMITS: Dict[str, Dict[str, int]] = {
+    "upstage_parse": {"rpm": 60, "max_concurrent": 4},
+    "upstage_chat": {"rpm": 100, "max_concurrent": 4},
+    "openai_chat": {"rpm": 0, "max_concurrent": 4},
+    "gemini_chat": {"rpm": 0, "max_concurrent": 4},
+    # 로컬 Ollama는 기본 설정에서 요청을 하나씩 처리하므로 동시에 보내도 대기열만 길어짐 (OLLAMA_NUM_PARALLEL과 맞춰 조정)
+    "ollama": {"rpm": 0, "max_concurrent": 1},
+}
+
+
+class RateLimitTimeout(Exception):
+    """대기 시간 안에 요청 허가를 받지 못했을 때 발생하는 예외"""
+    pass
+
+
+class TokenBucketLimiter:
+    """
+    분당 요청 수(토큰 버킷)와 동시 요청 수를 함께 제한하는 스레드 안전 리미터
+
+    대기 중인 호출자는 도착 순서(FIFO)대로 허가를 받으므로, 요청이 몰려도 특정 스레드가
+    계속 밀려나지 않고 429 응답으로 재시도를 소모하는 대신 클라이언트 쪽에서 줄을 섭니다.
+    """
+
+    def __init__(self, name: str, rpm: int = 0, max_concurrent: int = 0, burst: Optional[int] = None):
+        """
+        Args:
+            name: 리미터 이름 (로그/통계 표시용)
+            rpm: 분당 최대 요청 수 (0이면 제한 없음)
+            max_concurrent: 최대 동시 요청 수 (0이면 제한 없음)
+            burst: 버킷 용량 (한 번에 몰아서 보낼 수 있는 요청 수, None이면 max_concurrent 또는 1)
+        """
+        self.name = name
+        self.rpm = rpm
+        self.max_concurrent = max_concurrent
+        self.capacity = float(burst if burst is not None else max(1, max_concurrent))
+        self._rate = rpm / 60.0  # 초당 토큰 충전량
+        self._tokens = self.capacity
+        self._last_refill = time.monotonic()
+        self._paused_until = 0.0
+
+        self._cond = threading.Condition()
+        self._queue: Deque[object] = deque()
+        self._in_flight = 0
+
+        # 통계
+        self._acquired = 0
+        self._timeouts = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._max_queue_depth = 0
+
+    def _refill(self, now: float) -> None:
+        if self._rate > 0:
+            self._tokens = min(self.capacity, self._tokens + (now - self._last_refill) * self._rate)
+        self._last_refill = now
+
+    def _ready_in(self, now: float) -> Optional[float]:
+        """맨 앞 호출자가 허가를 받기까지 남은 시간 (0이면 즉시, None이면 release()를 기다려야 함)"""
+        if self._paused_until > now:
+            return self._paused_until - now
+        if self.max_concurrent and self._in_flight >= self.max_concurrent:
+            return None
+        if self._rate > 0 and self._tokens < 1:
+            return (1 - self._tokens) / self._rate
+        return 0.0
+
+    def acquire(self, timeout: Optional[float] = None) -> float:
+        """
+        요청 허가를 받을 때까지 대기합니다. 허가를 받은 뒤에는 반드시 release()를 호출해야 합니다.
+
+        Args:
+            timeout: 최대 대기 시간(초), None이면 무한 대기
+
+        Returns:
+            실제로 대기한 시간(초)
+
+        Raises:
+            RateLimitTimeout: timeout 안에 허가를 받지 못한 경우
+        """
+        ticket = object()
+        start = time.monotonic()
+        deadline = start + timeout if timeout is not None else None
+
+        with self._cond:
+            self._queue.append(ticket)
+            self._max_queue_depth = max(self._max_queue_depth, len(self._queue))
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait = None
+                    if self._queue[0] is ticket:
+                        self._refill(now)
+                        wait = self._ready_in(now)
+                        if wait == 0.0:
+                            if self._rate > 0:
+                                self._tokens -= 1
+                            self._in_flight += 1
+                            self._queue.popleft()
+                            waited = now - start
+                            self._acquired += 1
+                            self._total_wait += waited
+                            self._max_wait = max(self._max_wait, waited)
+                            if waited > 1:
+                                logger.info(f"요청 한도 대기 완료: {self.name} ({waited:.2f}초)")
+                            # 다음 호출자가 조건을 다시 확인하도록 깨움
+                            self._cond.notify_all()
+                            return waited
+
+                    if deadline is not None:
+                        remaining = deadline - now
+                        if remaining <= 0:
+                            self._timeouts += 1
+                            raise RateLimitTimeout(f"요청 한도 대기 시간 초과: {self.name} ({timeout}초)")
+                        wait = remaining if wait is None else min(wait, remaining)
+                    self._cond.wait(wait)
+            except BaseException:
+                if ticket in self._queue:
+                    self._queue.remove(ticket)
+                    self._cond.notify_all()
+                raise
+
+    def release(self) -> None:
+        """acquire()로 받은 동시 요청 슬롯을 반납합니다."""
+        with self._cond:
+            self._in_flight = max(0, self._in_flight - 1)
+            self._cond.notify_all()
+
+    def pause(self, seconds: float) -> None:
+        """
+        서버가 Retry-After로 대기를 요청했을 때 모든 호출자의 허가를 일정 시간 멈춥니다.
+
+        Args:
+            seconds: 멈출 시간(초)
+        """
+        if seconds <= 0:
+            return
+        with self._cond:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = min(self._tokens, 0.0)
+            self._cond.notify_all()
+        logger.warning(f"요청 한도 일시 정지: {self.name} ({seconds:.1f}초)")
+
+    def __enter__(self) -> "TokenBucketLimiter":
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.release()
+
+    def stats(self) -> Dict[str, Any]:
+        """대기열 길이, 대기 시간 등 현재 통계를 반환합니다."""
+        with self._cond:
+            return {
+                'name': self.name,
+                'rpm': self.rpm,
+                'max_concurrent': self.max_concurrent,
+                'in_flight': self._in_flight,
+                'queue_depth': len(self._queue),
+                'max_queue_depth': self._max_queue_depth,
+                'acquired': self._acquired,
+                'timeouts': self._timeouts,
+                'total_wait_seconds': round(self._total_wait, 3),
+                'avg_wait_seconds': round(self._total_wait / self._acquired, 3) if self._acquired else 0.0,
+                'max_wait_seconds': round(self._max_wait, 3),
+                'paused_seconds': round(max(0.0, self._paused_until - time.monotonic()), 3)
+            }
+
+
+_limiters: Dict[str, TokenBucketLimiter] = {}
+_lock = threading.Lock()
+
+
+def _limit_from_env(name: str, key: str, env_suffix: str) -> int:
+    default = DEFAULT_LIMITS.get(name, {}).get(key, 0)
+    return int(os.getenv(f"RATE_LIMIT_{name.upper()}_{env_suffix}", str(default)))
+
+
+def configure_limiter(name: str, rpm: int, max_concurrent: int, burst: Optional[int] = None) -> TokenBucketLimiter:
+    """
+    이름별 공유 리미터의 한도를 지정합니다. 기존 리미터는 새 설정으로 교체됩니다.
+
+    Args:
+        name: 리미터 이름 (예: 'upstage_parse', 'upstage_chat')
+        rpm: 분당 최대 요청 수 (0이면 제한 없음)
+        max_concurrent: 최대 동시 요청 수 (0이면 제한 없음)
+        burst: 버킷 용량
+
+    Returns:
+        새로 만든 리미터
+    """
+    limiter = TokenBucketLimiter(name, rpm, max_concurrent, burst)
+    with _lock:
+        _limiters[name] = limiter
+    return limiter
+
+
+def get_limiter(name: str) -> TokenBucketLimiter:
+    """
+    이름별로 프로세스 전체에서 공유되는 리미터를 반환합니다.
+
+    Args:
+        name: 리미터 이름 (예: 'upstage_parse', 'upstage_chat')
+
+    Returns:
+        공유 TokenBucketLimiter
+    """
+    limiter = _limiters.get(name)
+    if limiter is not None:
+        return limiter
+    with _lock:
+        limiter = _limiters.get(name)
+        if limiter is None:
+            rpm = _limit_from_env(name, "rpm", "RPM")
+            max_concurrent = _limit_from_env(name, "max_concurrent", "CONCURRENCY")
+            limiter = TokenBucketLimiter(name, rpm, max_concurrent)
+            _limiters[name] = limiter
+            logger.info(f"요청 한도 리미터 생성: {name} (분당 {rpm}회, 동시 {max_concurrent}개)")
+        return limiter
+
+
+def all_limiter_stats() -> Dict[str, Dict[str, Any]]:
+    """생성된 모든 리미터의 통계를 반환합니다."""
+    with _lock:
+        limiters = list(_limiters.values())
+    return {limiter.name: limiter.stats() for limiter in limiters}
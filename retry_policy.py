@@ -0,0 +1,278 @@
+import time
+import random
+import logging
+import threading
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Iterable, Optional
+
+import requests
+
+logger = logging.getLogger('retry_policy')
+
+# 재시도 대상 HTTP 상태 코드
+RETRYABLE_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+class CircuitOpenError(Exception):
+    """서킷 브레이커가 열려 있어 요청을 보내지 않을 때 발생하는 예외"""
+    pass
+
+
+class RetryMetrics:
+    """재시도 정책의 시도/재시도/대기 시간 통계 (스레드 안전)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.attempts = 0
+        self.retries = 0
+        self.successes = 0
+        self.failures = 0
+        self.circuit_rejections = 0
+        self.backoff_seconds = 0.0
+        self.status_counts: Dict[str, int] = {}
+
+    def record(self, **increments: float) -> None:
+        with self._lock:
+            for name, value in increments.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def record_status(self, status: str) -> None:
+        with self._lock:
+            self.status_counts[status] = self.status_counts.get(status, 0) + 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """현재 통계를 딕셔너리로 반환합니다."""
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'attempts': self.attempts,
+                'retries': self.retries,
+                'successes': self.successes,
+                'failures': self.failures,
+                'circuit_rejections': self.circuit_rejections,
+                'backoff_seconds': round(self.backoff_seconds, 3),
+                'status_counts': dict(self.status_counts)
+            }
+
+
+class CircuitBreaker:
+    """연속된 서버 오류(5xx, 연결 실패)가 임계값을 넘으면 일정 시간 요청을 차단하는 서킷 브레이커"""
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 60.0):
+        """
+        Args:
+            name: 로그에 표시할 이름
+            failure_threshold: 서킷을 열기까지의 연속 실패 횟수
+            reset_timeout: 서킷을 연 뒤 시험 요청을 허용하기까지의 시간(초)
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                return "half_open"
+            return "open"
+
+    def allow(self) -> bool:
+        """요청을 보내도 되는지 확인합니다 (열린 뒤 reset_timeout이 지나면 시험 요청 허용)."""
+        return self.state != "open"
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info(f"서킷 브레이커 닫힘: {self.name}")
+            self._failures = 0
+            self._opened_at = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.failure_threshold:
+                if self._opened_at is None:
+                    logger.warning(f"서킷 브레이커 열림: {self.name} (연속 실패 {self._failures}회, {self.reset_timeout}초 동안 요청 차단)")
+                # 반쯤 열린 상태에서 다시 실패하면 차단 시간을 새로 시작
+                self._opened_at = time.monotonic()
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(name: str, failure_threshold: int = 5, reset_timeout: float = 60.0) -> CircuitBreaker:
+    """이름별로 프로세스 전체에서 공유되는 서킷 브레이커를 반환합니다."""
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name, failure_threshold, reset_timeout)
+        return _breakers[name]
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Retry-After 헤더 값을 대기 시간(초)으로 변환합니다.
+
+    Args:
+        value: 초 단위 숫자 또는 HTTP 날짜 문자열
+
+    Returns:
+        대기 시간(초), 해석할 수 없으면 None
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class RetryPolicy:
+    """지터가 적용된 지수 백오프, Retry-After 준수, 서킷 브레이커를 갖춘 HTTP 재시도 정책"""
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+        multiplier: float = 2.0,
+        retry_statuses: Iterable[int] = RETRYABLE_STATUS_CODES,
+        respect_retry_after: bool = True,
+        max_retry_after: float = 300.0,
+        circuit_breaker: Optional[CircuitBreaker] = None
+    ):
+        """
+        Args:
+            max_attempts: 최대 시도 횟수 (첫 시도 포함)
+            base_delay: 첫 재시도의 최대 대기 시간(초)
+            max_delay: 백오프 대기 시간 상한(초)
+            multiplier: 시도마다 대기 시간 상한을 늘리는 배수
+            retry_statuses: 재시도할 HTTP 상태 코드
+            respect_retry_after: 429/503 응답의 Retry-After 헤더를 따를지 여부
+            max_retry_after: Retry-After로 기다릴 최대 시간(초)
+            circuit_breaker: 연속 서버 오류 시 요청을 차단할 서킷 브레이커
+        """
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.retry_statuses = set(retry_statuses)
+        self.respect_retry_after = respect_retry_after
+        self.max_retry_after = max_retry_after
+        self.circuit_breaker = circuit_breaker
+        self.metrics = RetryMetrics()
+
+    def compute_delay(self, attempt: int, response: Optional[requests.Response] = None) -> float:
+        """
+        다음 재시도까지의 대기 시간을 계산합니다.
+
+        Retry-After 헤더가 있으면 그 값을 따르고, 없으면 full jitter 방식
+        (0 ~ min(max_delay, base_delay * multiplier^(attempt-1)) 사이의 무작위 값)을 사용하여
+        동시에 실패한 요청들이 같은 시점에 다시 몰리지 않도록 합니다.
+
+        Args:
+            attempt: 방금 실패한 시도 번호 (1부터 시작)
+            response: 실패한 응답 (없으면 None)
+        """
+        if self.respect_retry_after and response is not None:
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            if retry_after is not None:
+                return min(retry_after, self.max_retry_after)
+        ceiling = min(self.max_delay, self.base_delay * (self.multiplier ** (attempt - 1)))
+        return random.uniform(0, ceiling)
+
+    def _counts_as_server_failure(self, response: Optional[requests.Response]) -> bool:
+        return response is None or response.status_code >= 500
+
+    def execute(
+        self,
+        send: Callable[[int], requests.Response],
+        on_failure: Optional[Callable[[int, Optional[requests.Response], Optional[Exception]], None]] = None,
+        sleep: Callable[[float], None] = time.sleep
+    ) -> requests.Response:
+        """
+        재시도 정책에 따라 요청을 실행합니다.
+
+        send는 시도마다 호출되므로 업로드 본문을 매번 처음부터 보내도록
+        (파일을 되감거나 다시 열도록) 구현해야 합니다.
+
+        Args:
+            send: 시도 번호를 받아 요청을 보내고 응답을 반환하는 함수
+            on_failure: 실패한 시도마다 (시도 번호, 응답, 예외)와 함께 호출되는 함수 (로깅용)
+            sleep: 대기 함수
+
+        Returns:
+            성공한 응답 (상태 코드 < 400)
+
+        Raises:
+            CircuitOpenError: 서킷 브레이커가 열려 있는 경우
+            requests.exceptions.RequestException: 재시도 후에도 실패한 경우
+        """
+        self.metrics.record(calls=1)
+        if self.circuit_breaker is not None and not self.circuit_breaker.allow():
+            self.metrics.record(circuit_rejections=1, failures=1)
+            raise CircuitOpenError(f"서킷 브레이커가 열려 있어 요청을 보내지 않습니다: {self.circuit_breaker.name}")
+
+        response: Optional[requests.Response] = None
+        error: Optional[Exception] = None
+        for attempt in range(1, self.max_attempts + 1):
+            response, error = None, None
+            self.metrics.record(attempts=1)
+            try:
+                response = send(attempt)
+            except requests.exceptions.RequestException as e:
+                # 타임아웃, 연결 끊김 등 응답을 받지 못한 경우
+                error = e
+                self.metrics.record_status(type(e).__name__)
+            else:
+                self.metrics.record_status(str(response.status_code))
+                if response.status_code < 400:
+                    if self.circuit_breaker is not None:
+                        self.circuit_breaker.record_success()
+                    self.metrics.record(successes=1)
+                    return response
+                if response.status_code not in self.retry_statuses:
+                    # 재시도해도 소용없는 클라이언트 오류
+                    if on_failure:
+                        on_failure(attempt, response, None)
+                    self.metrics.record(failures=1)
+                    response.raise_for_status()
+
+            if self.circuit_breaker is not None and self._counts_as_server_failure(response):
+                self.circuit_breaker.record_failure()
+            if on_failure:
+                on_failure(attempt, response, error)
+
+            if attempt >= self.max_attempts:
+                break
+            if self.circuit_breaker is not None and not self.circuit_breaker.allow():
+                logger.warning("서킷 브레이커가 열려 재시도를 중단합니다.")
+                break
+
+            delay = self.compute_delay(attempt, response)
+            if response is not None:
+                response.close()
+            logger.info(f"{delay:.2f}초 후 재시도 예정... (시도 {attempt}/{self.max_attempts})")
+            self.metrics.record(retries=1, backoff_seconds=delay)
+            sleep(delay)
+
+        self.metrics.record(failures=1)
+        if error is not None:
+            raise error
+        response.raise_for_status()
+        return response
@@ -0,0 +1,279 @@
+import os
+import re
+import json
+import base64
+import binascii
+import tempfile
+from typing import Any, List, Optional, TextIO
+
+# 공백 및 토큰 패턴
+_WHITESPACE = re.compile(r'[ \t\r\n]*')
+_STRING_SPECIAL = re.compile(r'["\\]')
+_LITERAL = re.compile(r'-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?|true|false|null')
+
+# base64 문자열 판별 패턴 (JSON 이스케이프 \/, \n, \r 허용)
+_BASE64_RAW = re.compile(r'(?:data:[\w.+-]+(?:/|\\/)[\w.+-]+;base64,)?(?:[A-Za-z0-9+/=]|\\[/nr])*')
+_BASE64_SEGMENT = re.compile(r'[A-Za-z0-9+/=\r\n]*')
+_DATA_URI = re.compile(r'data:([\w.+-]+)/([\w.+-]+);base64,')
+
+_STRING_DECODER = json.JSONDecoder(strict=False)
+
+
+class StreamingJSONError(ValueError):
+    """스트리밍 JSON 파싱 중 발생하는 예외"""
+    pass
+
+
+class SpilledBlob:
+    """디스크로 디코딩되어 저장된 base64 문자열 값"""
+
+    __slots__ = ('path', 'size', 'mime')
+
+    def __init__(self, path: str, size: int, mime: Optional[str] = None):
+        self.path = path
+        self.size = size
+        self.mime = mime
+
+    def __repr__(self) -> str:
+        return f"<SpilledBlob {os.path.basename(self.path)} ({self.size} bytes, {self.mime or 'unknown'})>"
+
+
+class _BlobWriter:
+    """base64 문자열 조각을 4글자 단위로 디코딩하여 파일에 바로 기록"""
+
+    def __init__(self, spill_dir: str, prefix: str):
+        fd, self.path = tempfile.mkstemp(prefix="blob_", suffix=".bin", dir=spill_dir)
+        self.file = os.fdopen(fd, 'wb')
+        self.carry = ""
+        self.size = 0
+        self.mime = None
+
+        match = _DATA_URI.match(prefix)
+        if match:
+            self.mime = f"{match.group(1)}/{match.group(2)}"
+            prefix = prefix[match.end():]
+        self.write(prefix)
+
+    def write(self, text: str) -> None:
+        if not text:
+            return
+        data = self.carry + text.replace("\n", "").replace("\r", "")
+        usable = len(data) - len(data) % 4
+        if usable:
+            try:
+                decoded = base64.b64decode(data[:usable])
+            except binascii.Error as e:
+                raise StreamingJSONError(f"base64 디코딩 실패: {str(e)}") from e
+            self.file.write(decoded)
+            self.size += len(decoded)
+        self.carry = data[usable:]
+
+    def close(self) -> SpilledBlob:
+        if self.carry:
+            self.write("=" * (-len(self.carry) % 4))
+        self.file.close()
+        return SpilledBlob(self.path, self.size, self.mime)
+
+    def abort(self) -> None:
+        self.file.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+class _SpillingParser:
+    """텍스트 스트림을 청크 단위로 읽는 재귀 하강 JSON 파서"""
+
+    def __init__(self, fp: TextIO, spill_dir: str, threshold: int, chunk_size: int):
+        self.fp = fp
+        self.spill_dir = spill_dir
+        self.threshold = threshold
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.blobs: List[_BlobWriter] = []
+
+    def _fill(self, need: int = 1) -> bool:
+        """현재 위치부터 need 글자 이상이 버퍼에 있도록 읽어옵니다 (소비한 부분은 버림)."""
+        while len(self.buf) - self.pos < need and not self.eof:
+            chunk = self.fp.read(self.chunk_size)
+            if not chunk:
+                self.eof = True
+                break
+            self.buf = self.buf[self.pos:] + chunk
+            self.pos = 0
+        return len(self.buf) - self.pos >= need
+
+    def _skip_whitespace(self) -> None:
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf) or not self._fill(1):
+                return
+
+    def _next_char(self) -> str:
+        self._skip_whitespace()
+        if not self._fill(1):
+            raise StreamingJSONError("예상치 못한 JSON 끝")
+        char = self.buf[self.pos]
+        self.pos += 1
+        return char
+
+    def parse(self) -> Any:
+        value = self._parse_value()
+        self._skip_whitespace()
+        if self._fill(1):
+            raise StreamingJSONError(f"JSON 값 뒤에 불필요한 데이터가 있습니다: {self.buf[self.pos:self.pos + 20]!r}")
+        return value
+
+    def _parse_value(self) -> Any:
+        self._skip_whitespace()
+        if not self._fill(1):
+            raise StreamingJSONError("예상치 못한 JSON 끝")
+        char = self.buf[self.pos]
+
+        if char == '{':
+            self.pos += 1
+            obj = {}
+            self._skip_whitespace()
+            if self._fill(1) and self.buf[self.pos] == '}':
+                self.pos += 1
+                return obj
+            while True:
+                if self._next_char() != '"':
+                    raise StreamingJSONError("객체 키는 문자열이어야 합니다")
+                key = self._parse_string(allow_spill=False)
+                if self._next_char() != ':':
+                    raise StreamingJSONError(f"키 '{key}' 뒤에 ':'가 필요합니다")
+                obj[key] = self._parse_value()
+                separator = self._next_char()
+                if separator == '}':
+                    return obj
+                if separator != ',':
+                    raise StreamingJSONError(f"객체에 예상치 못한 문자: {separator!r}")
+
+        if char == '[':
+            self.pos += 1
+            items = []
+            self._skip_whitespace()
+            if self._fill(1) and self.buf[self.pos] == ']':
+                self.pos += 1
+                return items
+            while True:
+                items.append(self._parse_value())
+                separator = self._next_char()
+                if separator == ']':
+                    return items
+                if separator != ',':
+                    raise StreamingJSONError(f"배열에 예상치 못한 문자: {separator!r}")
+
+        if char == '"':
+            self.pos += 1
+            return self._parse_string(allow_spill=True)
+
+        # 숫자, true, false, null
+        self._fill(64)
+        match = _LITERAL.match(self.buf, self.pos)
+        if not match:
+            raise StreamingJSONError(f"잘못된 JSON 토큰: {self.buf[self.pos:self.pos + 20]!r}")
+        self.pos = match.end()
+        return json.loads(match.group())
+
+    def _parse_string(self, allow_spill: bool) -> Any:
+        """여는 따옴표 다음부터 문자열을 읽습니다. 임계값을 넘는 base64 문자열은 파일로 디코딩합니다."""
+        parts: List[str] = []
+        length = 0
+        blob: Optional[_BlobWriter] = None
+
+        def consume(segment: str) -> None:
+            nonlocal length, blob, allow_spill, parts
+            if not segment:
+                return
+            if blob is not None:
+                if not _BASE64_SEGMENT.fullmatch(segment):
+                    raise StreamingJSONError("base64 문자열에 잘못된 문자가 있습니다")
+                blob.write(segment)
+                return
+            parts.append(segment)
+            length += len(segment)
+            if allow_spill and length >= self.threshold:
+                raw = "".join(parts)
+                if _BASE64_RAW.fullmatch(raw):
+                    prefix = raw.replace("\\/", "/").replace("\\n", "").replace("\\r", "")
+                    blob = _BlobWriter(self.spill_dir, prefix)
+                    self.blobs.append(blob)
+                    parts = []
+                else:
+                    # base64가 아닌 긴 문자열(HTML 등)은 그대로 메모리에 보관
+                    allow_spill = False
+                    parts = [raw]
+
+        while True:
+            match = _STRING_SPECIAL.search(self.buf, self.pos)
+            if match is None:
+                consume(self.buf[self.pos:])
+                self.pos = len(self.buf)
+                if not self._fill(1):
+                    raise StreamingJSONError("닫히지 않은 문자열")
+                continue
+
+            consume(self.buf[self.pos:match.start()])
+            self.pos = match.start()
+            if self.buf[self.pos] == '"':
+                self.pos += 1
+                break
+
+            # 이스케이프 시퀀스는 버퍼 경계에서 잘리지 않도록 한 번에 처리
+            if not self._fill(2):
+                raise StreamingJSONError("잘못된 이스케이프 시퀀스")
+            escape_length = 6 if self.buf[self.pos + 1] == 'u' else 2
+            if not self._fill(escape_length):
+                raise StreamingJSONError("잘못된 유니코드 이스케이프")
+            escape = self.buf[self.pos:self.pos + escape_length]
+            self.pos += escape_length
+
+            if blob is None:
+                parts.append(escape)
+                length += escape_length
+            elif escape == "\\/":
+                blob.write("/")
+            elif escape not in ("\\n", "\\r"):
+                raise StreamingJSONError(f"base64 문자열에 예상치 못한 이스케이프: {escape!r}")
+
+        if blob is not None:
+            return blob.close()
+        return _STRING_DECODER.decode('"' + "".join(parts) + '"')
+
+
+def load_spilling(
+    fp: TextIO,
+    spill_dir: str,
+    threshold: int = 64 * 1024,
+    chunk_size: int = 256 * 1024
+) -> Any:
+    """
+    JSON 스트림을 청크 단위로 파싱합니다.
+
+    threshold 글자를 넘는 base64 문자열(data URI 포함)은 메모리에 올리지 않고
+    spill_dir 아래 파일로 바로 디코딩되며, 값 자리에는 SpilledBlob이 들어갑니다.
+
+    Args:
+        fp: 텍스트 모드로 열린 JSON 파일 객체
+        spill_dir: 디코딩된 바이너리를 저장할 디렉토리
+        threshold: 파일로 내보낼 문자열의 최소 길이
+        chunk_size: 한 번에 읽을 글자 수
+
+    Returns:
+        파싱된 JSON 값
+
+    Raises:
+        StreamingJSONError: JSON 형식이 잘못되었거나 base64 디코딩에 실패한 경우
+    """
+    parser = _SpillingParser(fp, spill_dir, threshold, chunk_size)
+    try:
+        return parser.parse()
+    except Exception:
+        for blob in parser.blobs:
+            blob.abort()
+        raise